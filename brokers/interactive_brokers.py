@@ -1,15 +1,22 @@
 
-from ib_insync import IB
 from threading import Lock
 
 class IBKRConnector:
 	def __init__(self):
-		self.ib = IB()
+		self._ib = None
 		self.connected = False
 		self.account = None
 		self.lock = Lock()
 		self.last_error = None
 
+	@property
+	def ib(self):
+		"""חיבור ib_insync - הספרייה מיובאת רק בשימוש הראשון"""
+		if self._ib is None:
+			from ib_insync import IB
+			self._ib = IB()
+		return self._ib
+
 	def connect(self, host='127.0.0.1', port=7497, account='', password=None):
 		with self.lock:
 			try:
@@ -47,6 +47,21 @@ class DataConfig:
     options_provider: str = "polygon"
     options_fallback: list = None
     
+    # DataRouter cache
+    cache_max_entries: int = 5000
+    cache_max_mb: int = 256
+    disk_cache_enabled: bool = True
+    disk_cache_max_mb: int = 64
+    
+    # Rate limiting - שיתוף מצב ה-token buckets בין תהליכים (קובץ SQLite)
+    rate_limit_shared: bool = False
+    rate_limit_persist_daily: bool = True  # מכסה יומית נשמרת בקובץ ולא מתאפסת בהפעלה מחדש
+    
+    # Executor משותף לקריאות חוסמות לספקים
+    provider_max_workers: int = 32
+    provider_max_concurrency: int = 4  # ברירת מחדל לכל ספק
+    provider_queue_size: int = 64  # קריאות ממתינות לכל ספק לפני backpressure
+    
     def __post_init__(self):
         """הגדרות ברירת מחדל לאחר יצירה"""
         if self.vix_fallback is None:
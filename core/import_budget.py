@@ -0,0 +1,102 @@
+"""
+core/import_budget.py - מדידת זמן הייבוא של מודולים
+הייבוא נמדד בתהליך Python חדש עם -X importtime (הפעלה קרה, ללא מודולים טעונים),
+כך שאפשר לבדוק שמודול נשאר בתקציב הזמן ושלא נמשכו ספריות כבדות.
+
+דוגמה:
+    python -m core.import_budget data_management.data_router 300
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# ספריות שאסור שייטענו בהפעלה (נטענות רק בשימוש)
+HEAVY_MODULES = ("pandas", "numpy", "yfinance", "ib_insync", "matplotlib", "scipy")
+
+
+@dataclass
+class ImportProfile:
+    """תוצאת מדידה של ייבוא מודול"""
+    module: str
+    total_ms: float  # זמן הייבוא הכולל של המודול
+    modules: Dict[str, float] = field(default_factory=dict)  # מודול -> זמן מצטבר (ms)
+
+    def loaded(self, name: str) -> bool:
+        """האם המודול (או תת-מודול שלו) נטען במהלך הייבוא"""
+        return any(m == name or m.startswith(name + ".") for m in self.modules)
+
+    def heavy_loaded(self, heavy: Iterable[str] = HEAVY_MODULES) -> List[str]:
+        """הספריות הכבדות שנטענו"""
+        return [name for name in heavy if self.loaded(name)]
+
+    def slowest(self, count: int = 10) -> List[Tuple[str, float]]:
+        """המודולים עם הזמן המצטבר הגבוה ביותר"""
+        return sorted(self.modules.items(), key=lambda item: item[1], reverse=True)[:count]
+
+    def violations(self, budget_ms: float, forbidden: Iterable[str] = HEAVY_MODULES) -> List[str]:
+        """הפרות תקציב: חריגה בזמן או ספריות אסורות שנטענו"""
+        problems = []
+        if self.total_ms > budget_ms:
+            slowest = ", ".join(f"{name} {ms:.0f}ms" for name, ms in self.slowest(5))
+            problems.append(f"{self.module} took {self.total_ms:.0f}ms (budget {budget_ms:.0f}ms); slowest: {slowest}")
+        for name in self.heavy_loaded(forbidden):
+            problems.append(f"{self.module} imported {name} at load time")
+        return problems
+
+
+def measure_import(module: str, python: Optional[str] = None, cwd: Optional[Path] = None) -> ImportProfile:
+    """ייבוא module בתהליך חדש ופענוח הפלט של -X importtime"""
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(cwd or PROJECT_ROOT), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [python or sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(cwd or PROJECT_ROOT), env=env, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise ImportError(f"Importing {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+
+    modules: Dict[str, float] = {}
+    total_ms = 0.0
+    for line in result.stderr.splitlines():
+        # import time: <self us> | <cumulative us> | <name, מוזח לפי עומק>
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip()
+        cumulative_ms = int(parts[1]) / 1000
+        modules[name] = max(modules.get(name, 0.0), cumulative_ms)
+        if name == module:
+            total_ms = cumulative_ms
+    return ImportProfile(module=module, total_ms=total_ms, modules=modules)
+
+
+def check_import_budget(module: str, budget_ms: float, forbidden: Iterable[str] = HEAVY_MODULES) -> List[str]:
+    """
+    בדיקת תקציב ייבוא
+
+    Returns:
+        רשימת הפרות (ריקה אם המודול בתקציב ולא טען ספריות אסורות)
+    """
+    return measure_import(module).violations(budget_ms, forbidden)
+
+
+if __name__ == "__main__":
+    target = sys.argv[1] if len(sys.argv) > 1 else "main"
+    budget = float(sys.argv[2]) if len(sys.argv) > 2 else 500.0
+    profile = measure_import(target)
+    print(f"{target}: {profile.total_ms:.1f}ms")
+    for name, ms in profile.slowest(15):
+        print(f"  {ms:8.1f}ms  {name}")
+    violations = profile.violations(budget)
+    for violation in violations:
+        print(f"FAIL: {violation}")
+    sys.exit(1 if violations else 0)
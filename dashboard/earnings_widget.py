@@ -29,8 +29,8 @@ class EarningsWidget(QWidget):
         provider_ok = False
         error_msg = None
         try:
-            from data_management.data_router import DataRouter
-            router = DataRouter()
+            from data_management.data_router import get_data_router
+            router = get_data_router()
             if hasattr(router, 'get_earnings'):
                 earnings_items = router.get_earnings()
                 provider_ok = True
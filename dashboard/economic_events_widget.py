@@ -30,8 +30,8 @@ class EconomicEventsWidget(QWidget):
         fred_ok = False
         error_msg = None
         try:
-            from data_management.data_router import DataRouter
-            router = DataRouter()
+            from data_management.data_router import get_data_router
+            router = get_data_router()
             events = router.get_economic_events(days_ahead=30)
             fred_ok = True
         except Exception as e:
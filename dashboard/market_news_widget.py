@@ -32,9 +32,9 @@ class MarketNewsWidget(QWidget):
 		import sys
 		import sys
 		try:
-			from data_management.data_router import DataRouter
+			from data_management.data_router import get_data_router
 			print("[MarketNewsWidget] Loading market news...", file=sys.stderr)
-			router = DataRouter()
+			router = get_data_router()
 			if hasattr(router, 'get_market_news'):
 				news_items = router.get_market_news()
 				print(f"[MarketNewsWidget] news_items: {news_items}", file=sys.stderr)
@@ -0,0 +1,218 @@
+"""
+data_management/circuit_breaker.py - מפסק זרם (circuit breaker) לכל ספק וסוג נתונים
+closed: בקשות עוברות, תוצאות נאספות בחלון זמן נע
+open: שיעור השגיאות בחלון עבר את הסף - הספק מדולג עד סוף ה-cooldown
+half_open: אחרי ה-cooldown עוברת בקשת בדיקה (probe) אחת בלבד;
+הצלחה סוגרת את המפסק, כישלון פותח אותו שוב עם cooldown כפול
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Deque, Dict, Optional, Tuple
+
+
+class BreakerState(Enum):
+    """מצב המפסק"""
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclass
+class BreakerConfig:
+    """הגדרות מפסק"""
+    window_seconds: float = 120.0  # חלון הזמן לחישוב שיעור השגיאות
+    min_requests: int = 4  # מינימום בקשות בחלון לפני שהמפסק יכול להיפתח
+    failure_rate_threshold: float = 0.5
+    base_cooldown_seconds: float = 30.0
+    max_cooldown_seconds: float = 900.0
+    backoff_factor: float = 2.0
+    probe_timeout_seconds: float = 60.0  # probe שלא דיווח תוך הזמן הזה משוחרר
+
+
+class CircuitBreaker:
+    """מפסק בודד - בטוח לשימוש מכמה threads"""
+
+    def __init__(self, config: Optional[BreakerConfig] = None, clock: Callable[[], float] = time.monotonic):
+        self.config = config or BreakerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+        self._state = BreakerState.CLOSED
+        self._opened_at = 0.0
+        self._cooldown = 0.0
+        self._trips = 0  # פתיחות רצופות ללא הצלחה ביניהן
+        self._probe_started: Optional[float] = None
+
+    @property
+    def state(self) -> BreakerState:
+        """המצב הנוכחי (open הופך ל-half_open כשה-cooldown נגמר)"""
+        with self._lock:
+            self._advance()
+            return self._state
+
+    def _advance(self):
+        """מעבר open -> half_open בתום ה-cooldown - בתוך המנעול"""
+        if self._state is BreakerState.OPEN and self._clock() - self._opened_at >= self._cooldown:
+            self._state = BreakerState.HALF_OPEN
+            self._probe_started = None
+
+    def _probe_busy(self) -> bool:
+        """האם יש probe פעיל שעדיין לא פג תוקפו - בתוך המנעול"""
+        return (self._probe_started is not None and
+                self._clock() - self._probe_started < self.config.probe_timeout_seconds)
+
+    def _trim(self, now: float):
+        """הסרת תוצאות שיצאו מחלון הזמן - בתוך המנעול"""
+        cutoff = now - self.config.window_seconds
+        while self._outcomes and self._outcomes[0][0] < cutoff:
+            self._outcomes.popleft()
+
+    def is_available(self) -> bool:
+        """בדיקה ללא שריון - האם בקשה הייתה מורשית כרגע"""
+        with self._lock:
+            self._advance()
+            if self._state is BreakerState.OPEN:
+                return False
+            if self._state is BreakerState.HALF_OPEN:
+                return not self._probe_busy()
+            return True
+
+    def allow_request(self) -> bool:
+        """שריון בקשה. במצב half_open רק הקורא הראשון מקבל את ה-probe"""
+        with self._lock:
+            self._advance()
+            if self._state is BreakerState.OPEN:
+                return False
+            if self._state is BreakerState.HALF_OPEN:
+                if self._probe_busy():
+                    return False
+                self._probe_started = self._clock()
+            return True
+
+    def record_success(self):
+        """רישום הצלחה"""
+        with self._lock:
+            now = self._clock()
+            if self._state is not BreakerState.CLOSED:
+                self._state = BreakerState.CLOSED
+                self._outcomes.clear()
+                self._trips = 0
+                self._probe_started = None
+            self._outcomes.append((now, True))
+            self._trim(now)
+
+    def record_failure(self):
+        """רישום כישלון - עשוי לפתוח את המפסק"""
+        with self._lock:
+            now = self._clock()
+            self._advance()
+            if self._state is BreakerState.HALF_OPEN:
+                self._open(now)
+                return
+            if self._state is BreakerState.OPEN:
+                return
+            self._outcomes.append((now, False))
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if total >= self.config.min_requests and failures / total >= self.config.failure_rate_threshold:
+                self._open(now)
+
+    def release(self):
+        """שחרור probe שבוטל בלי תוצאה (למשל בקשת hedge שהפסידה)"""
+        with self._lock:
+            self._probe_started = None
+
+    def _open(self, now: float):
+        """פתיחת המפסק עם cooldown אקספוננציאלי - בתוך המנעול"""
+        cfg = self.config
+        self._cooldown = min(cfg.base_cooldown_seconds * (cfg.backoff_factor ** self._trips), cfg.max_cooldown_seconds)
+        self._trips += 1
+        self._state = BreakerState.OPEN
+        self._opened_at = now
+        self._probe_started = None
+        self._outcomes.clear()
+
+    def reset(self):
+        """החזרה ידנית למצב closed"""
+        with self._lock:
+            self._state = BreakerState.CLOSED
+            self._outcomes.clear()
+            self._trips = 0
+            self._probe_started = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """מצב המפסק לתצוגה"""
+        with self._lock:
+            now = self._clock()
+            self._advance()
+            self._trim(now)
+            total = len(self._outcomes)
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            remaining = self._cooldown - (now - self._opened_at) if self._state is BreakerState.OPEN else 0.0
+            return {
+                "state": self._state.value,
+                "window_requests": total,
+                "failure_rate": round(failures / total, 3) if total else 0.0,
+                "trips": self._trips,
+                "cooldown_remaining": round(max(remaining, 0.0), 1)
+            }
+
+
+class CircuitBreakerRegistry:
+    """מפסק לכל זוג (ספק, סוג נתונים) - נוצר בשימוש הראשון"""
+
+    def __init__(self, config: Optional[BreakerConfig] = None, clock: Callable[[], float] = time.monotonic):
+        self.config = config or BreakerConfig()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._breakers: Dict[Tuple[str, str], CircuitBreaker] = {}
+
+    def get(self, provider: str, data_type: str) -> CircuitBreaker:
+        """המפסק של (ספק, סוג נתונים)"""
+        key = (provider, data_type)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = CircuitBreaker(self.config, clock=self._clock)
+                    self._breakers[key] = breaker
+        return breaker
+
+    def is_available(self, provider: str, data_type: str) -> bool:
+        """בדיקה ללא שריון"""
+        return self.get(provider, data_type).is_available()
+
+    def allow_request(self, provider: str, data_type: str) -> bool:
+        """שריון בקשה (או probe)"""
+        return self.get(provider, data_type).allow_request()
+
+    def record_success(self, provider: str, data_type: str):
+        """רישום הצלחה"""
+        self.get(provider, data_type).record_success()
+
+    def record_failure(self, provider: str, data_type: str):
+        """רישום כישלון"""
+        self.get(provider, data_type).record_failure()
+
+    def release(self, provider: str, data_type: str):
+        """שחרור probe ללא תוצאה"""
+        self.get(provider, data_type).release()
+
+    def reset(self, provider: Optional[str] = None):
+        """איפוס המפסקים של ספק אחד או של כולם"""
+        with self._lock:
+            breakers = [b for (name, _), b in self._breakers.items() if provider is None or name == provider]
+        for breaker in breakers:
+            breaker.reset()
+
+    def get_provider_stats(self, provider: str) -> Dict[str, Dict[str, Any]]:
+        """מצב המפסקים של ספק לפי סוג נתונים"""
+        with self._lock:
+            items = [(data_type, b) for (name, data_type), b in self._breakers.items() if name == provider]
+        return {data_type: breaker.get_stats() for data_type, breaker in items}
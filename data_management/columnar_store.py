@@ -0,0 +1,149 @@
+"""
+data_management/columnar_store.py - עותק עמודתי של הנרות היומיים מ-StockDB
+לכל (provider, symbol) תיקייה עם קובץ .npy לכל עמודה, שנקרא כ-memmap: שליפה של
+שנים של נרות היא slice על מערכים רציפים, בלי שורה/dict של Python לכל נר.
+ה-SQLite נשאר מקור האמת - התיקייה נבנית ממנו בשליפה הראשונה ונמחקת בכל כתיבה לסימבול.
+לכל (provider, symbol) יש מונה דורות שעולה בכל מחיקה: עותק שנבנה מקריאה שהתחילה לפני
+מחיקה אינו נשמר, כך שכתיבה שהסתיימה באמצע הבנייה לא משאירה עותק ישן.
+"""
+
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# עמודות המחיר (float64, NaN = חסר); date הוא int64 של ימים מ-1970-01-01, volume הוא int64 (0 = חסר)
+PRICE_COLUMNS = ("open", "high", "low", "close", "adj_close")
+COLUMNS = ("date",) + PRICE_COLUMNS + ("volume",)
+ALL_PROVIDERS = "_all"  # תיקיית הנרות המאוחדים (שורה אחת לתאריך מכל הספקים)
+
+_META_FILE = "meta.json"
+_FORMAT_VERSION = 1
+
+
+class ColumnarStore:
+    """מערכים לכל (provider, symbol) תחת root"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._generations: Dict[Tuple[str, str], int] = {}
+
+    def _path(self, symbol: str, provider: Optional[str]) -> Path:
+        return self.root / (provider or ALL_PROVIDERS) / symbol
+
+    def has(self, symbol: str, provider: Optional[str] = None) -> bool:
+        """האם יש עותק שלם (meta.json נכתב אחרון)"""
+        return (self._path(symbol, provider) / _META_FILE).exists()
+
+    def generation(self, symbol: str, provider: Optional[str] = None) -> int:
+        """הדור הנוכחי של (provider, symbol) - יש לקרוא לפני הקריאה מה-SQLite שממנה נבנה העותק"""
+        with self._lock:
+            return self._generations.get((provider or ALL_PROVIDERS, symbol), 0)
+
+    def write(self, symbol: str, provider: Optional[str], columns: Dict[str, np.ndarray],
+              generation: Optional[int] = None) -> bool:
+        """
+        כתיבת העמודות (ממוינות לפי date). הקבצים נכתבים לקבצים זמניים ומוחלפים יחד, meta.json אחרון
+
+        Args:
+            generation: הדור שנקרא לפני הקריאה מה-SQLite - אם היתה מחיקה מאז, העותק ישן ואינו נשמר
+
+        Returns:
+            האם העותק נשמר
+        """
+        path = self._path(symbol, provider)
+        path.mkdir(parents=True, exist_ok=True)
+        suffix = f"{os.getpid()}.{threading.get_ident()}"
+        staged = []
+        try:
+            for name in COLUMNS:
+                tmp = path / f".{name}.{suffix}.npy"
+                np.save(tmp, np.ascontiguousarray(columns[name]))
+                staged.append((tmp, path / f"{name}.npy"))
+            tmp = path / f".{_META_FILE}.{suffix}"
+            tmp.write_text(json.dumps({"version": _FORMAT_VERSION, "rows": len(columns["date"])}))
+            staged.append((tmp, path / _META_FILE))
+
+            with self._lock:
+                current = self._generations.get((provider or ALL_PROVIDERS, symbol), 0)
+                if generation is not None and generation != current:
+                    return False
+                path.mkdir(parents=True, exist_ok=True)  # invalidate במקביל מוחק את התיקייה
+                for tmp, target in staged:
+                    os.replace(tmp, target)
+                staged = []
+                return True
+        finally:
+            for tmp, _ in staged:
+                try:
+                    tmp.unlink()
+                except OSError:
+                    pass
+
+    def read(self, symbol: str, provider: Optional[str] = None) -> Optional[Dict[str, np.ndarray]]:
+        """כל העמודות כ-memmap לקריאה בלבד (None אם אין עותק או שהוא לא תקין)"""
+        path = self._path(symbol, provider)
+        try:
+            meta = json.loads((path / _META_FILE).read_text())
+            if meta.get("version") != _FORMAT_VERSION:
+                return None
+            columns = {}
+            for name in COLUMNS:
+                # קובץ ריק לא ניתן ל-memmap
+                columns[name] = np.load(path / f"{name}.npy", mmap_mode="r" if meta["rows"] else None)
+        except (OSError, ValueError):
+            return None
+        if any(len(values) != meta["rows"] for values in columns.values()):
+            return None
+        return columns
+
+    def invalidate(self, symbol: str, provider: Optional[str] = None):
+        """מחיקת העותק של (provider, symbol) - meta.json קודם, כך שקורא במקביל לא יראה עותק חלקי"""
+        path = self._path(symbol, provider)
+        with self._lock:
+            key = (provider or ALL_PROVIDERS, symbol)
+            self._generations[key] = self._generations.get(key, 0) + 1
+            try:
+                (path / _META_FILE).unlink()
+            except FileNotFoundError:
+                return
+            shutil.rmtree(path, ignore_errors=True)
+
+    def clear(self):
+        """מחיקת כל העותקים"""
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def rows_to_columns(rows) -> Dict[str, np.ndarray]:
+    """
+    שורות (date, open, high, low, close, adj_close, volume) ממוינות לפי תאריך -> עמודות.
+    date יכול לכלול שעה ("2024-01-05 00:00:00") - נלקח רק התאריך
+    """
+    n = len(rows)
+    if not n:
+        return {name: np.empty(0, dtype=np.float64 if name in PRICE_COLUMNS else np.int64) for name in COLUMNS}
+    dates, *values = zip(*rows)
+    columns = {"date": np.array([d[:10] for d in dates], dtype="datetime64[D]").view(np.int64)}
+    for name, column in zip(PRICE_COLUMNS, values[:5]):
+        columns[name] = np.array(column, dtype=np.float64)  # None -> NaN
+    volume = np.array(values[5], dtype=np.float64)
+    columns["volume"] = np.nan_to_num(volume, nan=0.0).astype(np.int64)
+    return columns
+
+
+def slice_dates(columns: Dict[str, np.ndarray], start_date: str = None,
+                end_date: str = None) -> Tuple[int, int]:
+    """טווח השורות [first, last) של [start_date, end_date] (כולל) בעמודת date הממוינת"""
+    dates = columns["date"]
+    first = 0 if not start_date else int(np.searchsorted(dates, _day_number(start_date), side="left"))
+    last = len(dates) if not end_date else int(np.searchsorted(dates, _day_number(end_date), side="right"))
+    return first, max(first, last)
+
+
+def _day_number(d: str) -> int:
+    return int(np.datetime64(d[:10], "D").astype(np.int64))
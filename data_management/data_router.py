@@ -3,17 +3,30 @@ data_management/data_router.py - ניתוב חכם בין ספקי נתונים
 בחירת ספק אוטומטית + Fallback cascade + Load balancing + Cache חכם
 """
 
-from typing import Dict, List, Optional, Any, Callable
+from typing import Dict, List, Optional, Any, Callable, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import copy
+import dataclasses
 import json
-from pathlib import Path
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, wait
 from dataclasses import dataclass, asdict
 
 from core.logger import get_logger
 from core.config import config
 from .providers.base_provider import BaseProvider, QuoteData
-from .providers.fred_provider import FREDProvider
-from .providers.yahoo_provider import YahooProvider
+from .single_flight import SingleFlight, AsyncSingleFlight
+from .router_cache import RouterCache
+from .provider_metrics import ProviderMetrics
+from .circuit_breaker import CircuitBreakerRegistry
+from .disk_cache import DiskCache
+from . import rate_limiter
+from .retry_policy import Deadline, RetryPolicy, is_provider_failure, is_retryable, request_scope
+from .provider_executor import CallCancelled, get_provider_executor, is_cancelled
+from .providers import registry as provider_registry
 
 
 @dataclass
@@ -23,8 +36,22 @@ class ProviderConfig:
     primary: bool = False
     priority: int = 1  # נמוך = עדיפות גבוהה
     enabled: bool = True
-    max_errors: int = 5
-    cooldown_minutes: int = 15
+
+
+class CircuitOpenError(Exception):
+    """המפסק של הספק פתוח (או שה-probe כבר תפוס) - יש לעבור לספק הבא"""
+
+
+@dataclass
+class BatchQuoteResult:
+    """תוצאת בקשת ציטוטים מרובים"""
+    quotes: Dict[str, QuoteData]
+    failed: List[str]
+
+    def to_batch(self):
+        """הציטוטים שהתקבלו כ-QuoteBatch (ייצוג עמודות)"""
+        from .providers.quote_batch import QuoteBatch
+        return QuoteBatch.from_quotes(self.quotes.values())
 
 
 @dataclass
@@ -39,57 +66,60 @@ class DataRequest:
 
 class DataRouter:
     def get_market_news(self):
-        """שליפת חדשות שוק מספק Finnhub (אם קיים)"""
-        try:
-            provider = self._providers.get("finnhub")
-            if provider and hasattr(provider, "get_market_news"):
-                return provider.get_market_news()
-            else:
-                self.logger.error("No Finnhub provider available for market news")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error in get_market_news: {e}")
-            return []
+        """שליפת חדשות שוק (Finnhub) דרך ה-routing וה-cache"""
+        return self.get_data(DataRequest(data_type="market_news", max_age_seconds=900)) or []
 
     def get_earnings(self):
-        """שליפת דוחות רבעוניים מספק FMP (אם קיים)"""
-        try:
-            provider = self._providers.get("fmp")
-            if provider and hasattr(provider, "get_earnings"):
-                return provider.get_earnings()
-            else:
-                self.logger.error("No FMP provider available for earnings")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error in get_earnings: {e}")
-            return []
+        """שליפת דוחות רבעוניים (FMP) דרך ה-routing וה-cache"""
+        return self.get_data(DataRequest(data_type="earnings", max_age_seconds=3600)) or []
+
     def get_economic_events(self, days_ahead=30):
-        """שליפת אירועים כלכליים קרובים דרך ספק מרכזי (FRED)"""
-        try:
-            provider = self._providers.get("fred")
-            if provider:
-                return provider.get_economic_events(days_ahead=days_ahead)
-            else:
-                self.logger.error("No FRED provider available for economic events")
-                return []
-        except Exception as e:
-            self.logger.error(f"Error in get_economic_events: {e}")
-            return []
+        """שליפת אירועים כלכליים קרובים (FRED) דרך ה-routing וה-cache"""
+        request = DataRequest(data_type="economic_events", parameters={"days_ahead": days_ahead}, max_age_seconds=3600)
+        return self.get_data(request) or []
     """נתב נתונים חכם עם fallback ו-load balancing"""
+
+    # סוגי נתונים שממופים ישירות למתודה בספק (הפרמטרים של הבקשה מועברים כ-kwargs)
+    _provider_methods: Dict[str, str] = {
+        "market_news": "get_market_news",
+        "earnings": "get_earnings",
+        "economic_events": "get_economic_events",
+    }
     
     def __init__(self):
         self.logger = get_logger("DataRouter")
         
-        # ספקי נתונים רשומים
+        # ספקי נתונים רשומים (נוצרים בשימוש הראשון)
         self._providers: Dict[str, BaseProvider] = {}
         self._provider_configs: Dict[str, ProviderConfig] = {}
+        self._failed_providers: set = set()
+        # מנעול יצירה לכל ספק - יצירה ובדיקת חיבור איטית של ספק אחד לא חוסמות את האחרים
+        self._provider_locks: Dict[str, threading.Lock] = {}
+        self._provider_locks_lock = threading.Lock()
         
         # מטמון גלובלי
-        self._global_cache: Dict[str, tuple] = {}  # key -> (data, timestamp)
         self.default_cache_ttl = 60  # שניות
+        self.default_deadline_ms = 15000  # תקציב זמן לבקשה כשלא הוגדר deadline_ms
+        self._global_cache = RouterCache(
+            max_entries=config.data.cache_max_entries,
+            max_bytes=config.data.cache_max_mb * 1024 * 1024,
+            default_ttl=self.default_cache_ttl
+        )
         
-        # מעקב אחר כישלונות ו-cooldowns
-        self._provider_cooldowns: Dict[str, datetime] = {}
+        # איחוד בקשות זהות שרצות במקביל (לפי מפתח cache)
+        self._single_flight = SingleFlight()
+        self._async_single_flight = AsyncSingleFlight()
+        self._background_tasks: set = set()
+        
+        # מדדי latency/הצלחה לכל ספק וסוג נתונים (משמשים גם ל-hedging)
+        self._metrics = ProviderMetrics()
+        # החלטת הדירוג האחרונה לכל סוג נתונים (לתצוגה ב-get_provider_status)
+        self._routing_decisions: Dict[str, Dict[str, Any]] = {}
+        # כל הקריאות החוסמות לספקים (כולל hedging) רצות ב-executor המשותף
+        self._executor = get_provider_executor()
+        
+        # מעקב אחר כישלונות: מפסק לכל (ספק, סוג נתונים) ומונה שגיאות רצופות לתצוגה
+        self._breakers = CircuitBreakerRegistry()
         self._provider_errors: Dict[str, int] = {}
         
         # הגדרות routing לפי סוג נתונים
@@ -98,104 +128,149 @@ class DataRouter:
                 "primary": "fred",
                 "fallback": ["yahoo"],  # yahoo כ-fallback
                 "cache_ttl": 300,  # 5 דקות
-                "max_retries": 2
+                "max_retries": 2,
+                # תקציב זמן כולל לבקשה (כל הספקים וכל הניסיונות)
+                "deadline_ms": 4000,
+                # דירוג ספקים לפי EWMA של latency, שיעור הצלחה ומכסה;
+                # pin_primary=True משאיר את הספק הראשי תמיד ראשון
+                "adaptive_ranking": True,
+                "pin_primary": False,
+                # החזרת ערך קודם מיד ורענון ברקע (עד שעה אחרי ה-TTL)
+                "stale_while_revalidate": True,
+                "max_stale_seconds": 3600,
+                # אם הספק הראשי לא ענה עד ה-p90 שלו - פנייה מקבילה ל-fallback
+                "hedge": {
+                    "enabled": True,
+                    "percentile": 90,
+                    "default_delay_ms": 2000,  # כשאין עדיין מספיק דגימות
+                    "min_delay_ms": 200,
+                    "max_hedges": 1
+                },
+                # שמירה בדיסק: אחרי הפעלה מחדש הערך מוגש כ-stale עד keep_seconds
+                "disk_cache": {"keep_seconds": 86400, "max_entries": 5}
             },
             "quote": {
                 "primary": "yahoo", 
                 "fallback": ["yahoo"],
                 "cache_ttl": 30,
-                "max_retries": 2
+                "max_retries": 2,
+                "deadline_ms": 5000,
+                "batch_deadline_ms": 15000  # get_quotes - לכל ספק בשרשרת
             },
             "market_data": {
                 "primary": "yahoo",
                 "fallback": ["yahoo"],
                 "cache_ttl": 300,  # 5 דקות
-                "max_retries": 1
+                "max_retries": 1,
+                "stale_while_revalidate": True,
+                "max_stale_seconds": 3600,
+                "disk_cache": {"keep_seconds": 86400, "max_entries": 5}
+            },
+            "market_news": {
+                "primary": "finnhub",
+                "fallback": [],
+                "cache_ttl": 900,  # 15 דקות
+                "max_retries": 1,
+                "stale_while_revalidate": True,
+                "max_stale_seconds": 6 * 3600,
+                "disk_cache": {"keep_seconds": 86400, "max_entries": 5}
+            },
+            "earnings": {
+                "primary": "fmp",
+                "fallback": [],
+                "cache_ttl": 3600,
+                "max_retries": 1,
+                "stale_while_revalidate": True,
+                "max_stale_seconds": 12 * 3600,
+                "disk_cache": {"keep_seconds": 3 * 86400, "max_entries": 5}
+            },
+            "economic_events": {
+                "primary": "fred",
+                "fallback": [],
+                "cache_ttl": 3600,
+                "max_retries": 1,
+                "stale_while_revalidate": True,
+                "max_stale_seconds": 12 * 3600,
+                "disk_cache": {"keep_seconds": 3 * 86400, "max_entries": 10}
             }
         }
         
+        # מטמון L2 בדיסק - שורד הפעלה מחדש, מחמם את ה-cache בזיכרון בעלייה
+        self._disk_cache: Optional[DiskCache] = None
+        if config.data.disk_cache_enabled:
+            try:
+                self._disk_cache = DiskCache(max_bytes=config.data.disk_cache_max_mb * 1024 * 1024)
+                self._warm_from_disk()
+            except Exception as e:
+                self.logger.warning(f"Disk cache unavailable: {e}")
+                self._disk_cache = None
+        
+        # מגבלות קצב משותפות לכמה תהליכים (למשל הורדות מקבילות בתהליכים נפרדים)
+        if config.data.rate_limit_shared:
+            rate_limiter.configure_shared_state(rate_limiter.DEFAULT_STATE_PATH)
+        if not config.data.rate_limit_persist_daily:
+            rate_limiter.configure_daily_state(None)
+        
         self._initialize_providers()
         self.logger.info("DataRouter initialized")
     
     def _initialize_providers(self):
-        """אתחול ספקי נתונים"""
-        # FRED לVIX (יציב ואמין)
-        try:
-            self.logger.info("Initializing FRED provider...")
-            from .providers.fred_provider import FREDProvider
-            fred_provider = FREDProvider(config)
-            self.register_provider("fred", fred_provider, is_primary=True)
-            self.logger.info("FRED provider registered successfully")
-            connection_test = fred_provider.test_connection()
-            self.logger.info(f"FRED connection test: {'PASS' if connection_test else 'FAIL'}")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize FRED provider: {e}")
-            import traceback
-            self.logger.error(f"Full traceback: {traceback.format_exc()}")
+        """רישום ספקי נתונים ללא יצירתם - כל ספק נוצר ונבדק בשימוש הראשון"""
+        for name in provider_registry.provider_names():
+            spec = provider_registry.get_spec(name)
+            self._provider_configs[name] = ProviderConfig(
+                name=name,
+                primary=spec.is_primary,
+                priority=1 if spec.is_primary else 2,
+                enabled=True
+            )
+            self._provider_errors.setdefault(name, 0)
+        self.logger.info(f"Deferred provider initialization: {provider_registry.provider_names()}")
 
-        # Yahoo Finance
-        try:
-            self.logger.info("Initializing Yahoo Finance provider...")
-            from .providers.yahoo_provider import YahooProvider
-            yahoo_provider = YahooProvider(config)
-            self.register_provider("yahoo", yahoo_provider, is_primary=False)
-            self.logger.info("Yahoo Finance provider registered")
-        except Exception as e:
-            self.logger.warning(f"Yahoo Finance provider failed: {e}")
+    def _get_provider(self, name: str) -> Optional[BaseProvider]:
+        """קבלת ספק לפי שם - יצירה ובדיקת תקינות בשימוש הראשון"""
+        provider = self._providers.get(name)
+        if provider is not None:
+            return provider
 
-        # Finnhub
-        try:
-            self.logger.info("Initializing Finnhub provider...")
-            from .providers.finnhub_provider import FinnhubProvider
-            finnhub_provider = FinnhubProvider(config)
-            self.register_provider("finnhub", finnhub_provider, is_primary=False)
-            self.logger.info("Finnhub provider registered")
-        except Exception as e:
-            self.logger.warning(f"Finnhub provider failed: {e}")
+        spec = provider_registry.get_spec(name)
+        if spec is None or name in self._failed_providers:
+            return None
 
-        # Alphavantage
-        try:
-            self.logger.info("Initializing Alphavantage provider...")
-            from .providers.alphavantage_provider import AlphavantageProvider
-            alphavantage_provider = AlphavantageProvider(config)
-            self.register_provider("alphavantage", alphavantage_provider, is_primary=False)
-            self.logger.info("Alphavantage provider registered")
-        except Exception as e:
-            self.logger.warning(f"Alphavantage provider failed: {e}")
+        with self._provider_locks_lock:
+            lock = self._provider_locks.setdefault(name, threading.Lock())
+        with lock:
+            # ייתכן ש-thread אחר יצר את הספק בזמן שחיכינו למנעול
+            provider = self._providers.get(name)
+            if provider is not None:
+                return provider
+            if name in self._failed_providers:
+                return None
+            try:
+                self.logger.info(f"Initializing {name} provider...")
+                provider = provider_registry.create_provider(name, config)
+            except Exception as e:
+                self._failed_providers.add(name)
+                self.logger.error(f"Failed to initialize {name} provider: {e}")
+                self.logger.error(f"Full traceback: {traceback.format_exc()}")
+                return None
 
-        # Polygon
-        try:
-            self.logger.info("Initializing Polygon provider...")
-            from .providers.polygon_provider import PolygonProvider
-            polygon_provider = PolygonProvider(config)
-            self.register_provider("polygon", polygon_provider, is_primary=False)
-            self.logger.info("Polygon provider registered")
-        except Exception as e:
-            self.logger.warning(f"Polygon provider failed: {e}")
+            if spec.health_check:
+                connection_test = provider.test_connection()
+                self.logger.info(f"{name} connection test: {'PASS' if connection_test else 'FAIL'}")
 
-        # Twelvedata
-        try:
-            self.logger.info("Initializing Twelvedata provider...")
-            from .providers.twelvedata_provider import TwelvedataProvider
-            twelvedata_provider = TwelvedataProvider(config)
-            self.register_provider("twelvedata", twelvedata_provider, is_primary=False)
-            self.logger.info("Twelvedata provider registered")
-        except Exception as e:
-            self.logger.warning(f"Twelvedata provider failed: {e}")
+            self.register_provider(name, provider, is_primary=spec.is_primary)
+            return provider
 
-        # FMP
-        try:
-            self.logger.info("Initializing FMP provider...")
-            from .providers.fmp_provider import FMPProvider
-            fmp_provider = FMPProvider(config)
-            self.register_provider("fmp", fmp_provider, is_primary=False)
-            self.logger.info("FMP provider registered")
-        except Exception as e:
-            self.logger.warning(f"FMP provider failed: {e}")
+    def get_provider(self, name: str) -> Optional[BaseProvider]:
+        """קבלת ספק רשום לפי שם (נוצר לפי דרישה)"""
+        return self._get_provider(name)
     
     def register_provider(self, name: str, provider: BaseProvider, is_primary: bool = False):
         """רישום ספק נתונים"""
         self._providers[name] = provider
+        provider.executor_key = name
+        self._executor.ensure_limit(name, getattr(provider, "max_concurrent_calls", self._executor.default_limit))
         
         config = ProviderConfig(
             name=name,
@@ -204,7 +279,7 @@ class DataRouter:
             enabled=True
         )
         self._provider_configs[name] = config
-        self._provider_errors[name] = 0
+        self._provider_errors.setdefault(name, 0)
         
         self.logger.info(f"Provider '{name}' registered (primary={is_primary})")
     
@@ -219,46 +294,99 @@ class DataRouter:
             base += f"_{params_str}"
         return base
     
-    def _get_from_cache(self, cache_key: str, max_age_seconds: int) -> Optional[Any]:
-        """קבלת נתונים מ-cache"""
-        if cache_key in self._global_cache:
-            data, timestamp = self._global_cache[cache_key]
-            age = (datetime.now() - timestamp).total_seconds()
-            
-            if age <= max_age_seconds:
-                self.logger.debug(f"Cache hit for {cache_key} (age: {age:.1f}s)")
-                return data
-            else:
-                # נתונים ישנים - מחיקה
-                del self._global_cache[cache_key]
-                self.logger.debug(f"Cache expired for {cache_key} (age: {age:.1f}s)")
+    def _get_from_cache(self, cache_key: str, max_age_seconds: int, data_type: Optional[str] = None) -> Optional[Any]:
+        """קבלת נתונים מ-cache (בזיכרון, ואם אין - מהדיסק עבור סוגים שנשמרים בו)"""
+        data = self._global_cache.get(cache_key, max_age=max_age_seconds)
+        if data is not None:
+            self.logger.debug(f"Cache hit for {cache_key}")
+            return data
         
-        return None
+        if self._disk_cache is None or not self._disk_cache_config(data_type):
+            return None
+        entry = self._disk_cache.get(cache_key)
+        if entry is None or entry.age > min(max_age_seconds, entry.ttl):
+            return None
+        self._global_cache.set(cache_key, entry.data, ttl=entry.ttl,
+                               stale_ttl=max(entry.expires_at - entry.timestamp - entry.ttl, 0),
+                               timestamp=entry.timestamp)
+        self.logger.debug(f"Disk cache hit for {cache_key}")
+        return entry.data
     
-    def _set_cache(self, cache_key: str, data: Any):
-        """שמירה ב-cache"""
-        self._global_cache[cache_key] = (data, datetime.now())
+    def _set_cache(self, cache_key: str, data: Any, ttl: Optional[int] = None, stale_ttl: int = 0,
+                   data_type: Optional[str] = None):
+        """שמירה ב-cache (ובדיסק עבור סוגים שמוגדר להם disk_cache)"""
+        self._global_cache.set(cache_key, data, ttl=ttl, stale_ttl=stale_ttl)
         self.logger.debug(f"Cached data for {cache_key}")
+        
+        disk_config = self._disk_cache_config(data_type)
+        if self._disk_cache is not None and disk_config:
+            ttl = ttl if ttl is not None else self.default_cache_ttl
+            keep_seconds = max(disk_config.get("keep_seconds", 86400), ttl + stale_ttl)
+            self._disk_cache.set(cache_key, data_type, data, ttl=ttl, keep_seconds=keep_seconds,
+                                 max_entries=disk_config.get("max_entries"))
+    
+    def _disk_cache_config(self, data_type: Optional[str]) -> Optional[Dict[str, Any]]:
+        """הגדרות מטמון הדיסק לסוג נתונים (None אם הסוג לא נשמר בדיסק)"""
+        if not data_type:
+            return None
+        return self._routing_config.get(data_type, {}).get("disk_cache")
+    
+    def _warm_from_disk(self):
+        """טעינת הרשומות מהדיסק ל-cache בזיכרון (ערכים ישנים יוגשו כ-stale וירועננו ברקע)"""
+        loaded = 0
+        for entry in self._disk_cache.iter_entries():
+            if not self._disk_cache_config(entry.data_type):
+                continue
+            self._global_cache.set(entry.key, entry.data, ttl=entry.ttl,
+                                   stale_ttl=max(entry.expires_at - entry.timestamp - entry.ttl, 0),
+                                   timestamp=entry.timestamp)
+            loaded += 1
+        if loaded:
+            self.logger.info(f"Warmed {loaded} cache entries from disk")
+    
+    def _mark_stale(self, data: Any, age: float) -> Any:
+        """סימון עותק של הנתונים כ-stale עם הגיל שלהם"""
+        if isinstance(data, QuoteData):
+            return dataclasses.replace(data, is_stale=True, age_seconds=age)
+        if isinstance(data, dict):
+            return {k: self._mark_stale(v, age) if isinstance(v, QuoteData) else v for k, v in data.items()}
+        try:
+            stale = copy.copy(data)
+            stale.is_stale = True
+            stale.age_seconds = age
+            return stale
+        except Exception:
+            return data
     
-    def _is_provider_available(self, provider_name: str) -> bool:
-        """בדיקה אם ספק זמין"""
-        # בדיקת cooldown
-        if provider_name in self._provider_cooldowns:
-            cooldown_end = self._provider_cooldowns[provider_name]
-            if datetime.now() < cooldown_end:
-                return False
+    def _refresh_in_background(self, request: DataRequest, cache_key: str):
+        """רענון רשומה ברקע (אם אין כבר קריאה פעילה לאותו מפתח)"""
+        if self._single_flight.in_flight(cache_key):
+            return
         
+        def refresh():
+            try:
+                self._single_flight.do(cache_key, lambda: self._fetch_from_providers(request, cache_key))
+            except Exception as e:
+                self.logger.warning(f"Background refresh failed for {cache_key}: {e}")
+        
+        threading.Thread(target=refresh, name=f"Refresh-{cache_key}", daemon=True).start()
+    
+    def _is_provider_available(self, provider_name: str, data_type: Optional[str] = None) -> bool:
+        """בדיקה אם ספק זמין (ואם ניתן סוג נתונים - גם שהמפסק שלו לא פתוח)"""
         # בדיקת הגדרות
         config = self._provider_configs.get(provider_name)
         if not config or not config.enabled:
             return False
         
-        # בדיקת מספר שגיאות
-        error_count = self._provider_errors.get(provider_name, 0)
-        if error_count >= config.max_errors:
+        # בדיקת מפסק
+        if data_type and not self._breakers.is_available(provider_name, data_type):
             return False
         
-        # בדיקת health של הספק
+        # ספק שנכשל ביצירה אינו זמין
+        if provider_name in self._failed_providers:
+            return False
+        
+        # בדיקת health של הספק (רק אם כבר נוצר)
         provider = self._providers.get(provider_name)
         if provider and not provider.is_healthy():
             return False
@@ -268,7 +396,7 @@ class DataRouter:
     def _get_available_providers(self, data_type: str) -> List[str]:
         """קבלת רשימת ספקים זמינים לסוג נתונים"""
         self.logger.debug(f"Looking for providers for data_type: {data_type}")
-        self.logger.debug(f"Registered providers: {list(self._providers.keys())}")
+        self.logger.debug(f"Initialized providers: {list(self._providers.keys())}")
         
         routing = self._routing_config.get(data_type, {})
         primary = routing.get("primary")
@@ -278,37 +406,115 @@ class DataRouter:
         
         # בניית רשימה מסודרת
         provider_list = []
-        if primary and self._is_provider_available(primary):
+        if primary and self._is_provider_available(primary, data_type):
             provider_list.append(primary)
             self.logger.debug(f"Added primary provider: {primary}")
         elif primary:
             self.logger.warning(f"Primary provider '{primary}' not available")
         
         for provider_name in fallback:
-            if provider_name != primary and self._is_provider_available(provider_name):
+            if provider_name != primary and self._is_provider_available(provider_name, data_type):
                 provider_list.append(provider_name)
                 self.logger.debug(f"Added fallback provider: {provider_name}")
         
+        if routing.get("adaptive_ranking", True) and len(provider_list) > 1:
+            provider_list = self._rank_providers(data_type, provider_list, routing)
+        
         self.logger.info(f"Available providers for {data_type}: {provider_list}")
         return provider_list
     
+    def _provider_score(self, provider_name: str, data_type: str, routing: Dict[str, Any]) -> float:
+        """ציון ספק (נמוך = עדיף): EWMA latency חלקי EWMA הצלחה, עם קנס על מכסה שנגמרת"""
+        latency, success = self._metrics.get_ewma(provider_name, data_type)
+        if latency is None:
+            # ספק ללא דגימות מקבל ערך התחלתי כדי שייבדק מדי פעם
+            latency = routing.get("prior_latency_ms", 1000) / 1000.0
+            success = 1.0
+        score = latency / max(success, 0.05)
+        
+        provider = self._providers.get(provider_name)
+        quota = provider.status.quota_usage_percent if provider else 0.0
+        if quota >= 80:
+            # מעל 80% מהמכסה - הספק נדחק אחורה (פי 5 ב-100%)
+            score *= 1 + (quota - 80) / 5
+        return score
+    
+    def _rank_providers(self, data_type: str, provider_list: List[str], routing: Dict[str, Any]) -> List[str]:
+        """סידור ספקים לפי ציון, תוך שמירה על ספק ראשי מוצמד"""
+        primary = routing.get("primary")
+        pinned = primary if routing.get("pin_primary", False) and provider_list[0] == primary else None
+        
+        scores = {name: self._provider_score(name, data_type, routing) for name in provider_list}
+        candidates = [name for name in provider_list if name != pinned]
+        # sorted יציב - בציון שווה נשמר הסדר מה-routing config
+        ranked = sorted(candidates, key=lambda name: scores[name])
+        if pinned:
+            ranked.insert(0, pinned)
+        
+        if ranked != provider_list:
+            self.logger.info(f"Adaptive ranking for {data_type}: {provider_list} -> {ranked}")
+        self._routing_decisions[data_type] = {
+            "order": ranked,
+            "configured_order": provider_list,
+            "pinned": pinned,
+            "scores": {name: round(score, 4) for name, score in scores.items()},
+            "timestamp": datetime.now().isoformat()
+        }
+        return ranked
+    
     def _handle_provider_error(self, provider_name: str, error: Exception):
         """טיפול בשגיאת ספק"""
         self._provider_errors[provider_name] = self._provider_errors.get(provider_name, 0) + 1
-        
-        config = self._provider_configs.get(provider_name)
-        if config and self._provider_errors[provider_name] >= config.max_errors:
-            # הכנסה ל-cooldown
-            cooldown_end = datetime.now() + timedelta(minutes=config.cooldown_minutes)
-            self._provider_cooldowns[provider_name] = cooldown_end
-            
-            self.logger.warning(f"Provider '{provider_name}' in cooldown until {cooldown_end}")
-        
         self.logger.error(f"Provider '{provider_name}' error: {error}")
     
-    def _execute_request(self, provider_name: str, request: DataRequest) -> Optional[Any]:
-        """ביצוע בקשה לספק ספציפי"""
-        provider = self._providers.get(provider_name)
+    def _record_outcome(self, provider_name: str, data_type: str, success: bool):
+        """עדכון המפסק לפי תוצאת בקשה"""
+        breaker = self._breakers.get(provider_name, data_type)
+        before = breaker.state
+        if success:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        after = breaker.state
+        if after is not before:
+            self.logger.warning(f"Circuit for {provider_name}/{data_type}: {before.value} -> {after.value}")
+    
+    def _record_error(self, provider_name: str, data_type: str, error: Exception):
+        """
+        עדכון המפסק לפי שגיאה: רק תקלה בספק (timeout, ניתוק, 5xx, 429) נספרת ככישלון.
+        "לא נמצא" ושגיאות לוגיות משחררות את ה-probe בלי לשנות את המצב
+        """
+        if is_provider_failure(error):
+            self._record_outcome(provider_name, data_type, False)
+        else:
+            self._breakers.release(provider_name, data_type)
+    
+    def _execute_request(self, provider_name: str, request: DataRequest,
+                         deadline: Optional[Deadline] = None) -> Optional[Any]:
+        """ביצוע בקשה לספק ספציפי (כולל מדידת latency ועדכון המפסק). שגיאות הספק נזרקות"""
+        if not self._breakers.allow_request(provider_name, request.data_type):
+            raise CircuitOpenError(f"Circuit open for {provider_name}/{request.data_type}")
+        started = time.monotonic()
+        try:
+            with request_scope(deadline):
+                data = self._executor.run(provider_name, self._call_provider, provider_name, request,
+                                          timeout=deadline.remaining() if deadline else None)
+        except Exception as e:
+            if isinstance(e, CallCancelled) or is_cancelled():
+                # בקשה שבוטלה (hedge שהפסיד) אינה הצלחה ואינה כישלון
+                self._breakers.release(provider_name, request.data_type)
+                raise
+            self._metrics.record(provider_name, request.data_type, time.monotonic() - started, success=False)
+            self._record_error(provider_name, request.data_type, e)
+            raise
+        # תשובה ריקה (סימבול לא מוכר) היא תשובה תקינה של הספק
+        self._metrics.record(provider_name, request.data_type, time.monotonic() - started, success=data is not None)
+        self._record_outcome(provider_name, request.data_type, True)
+        return data
+    
+    def _call_provider(self, provider_name: str, request: DataRequest) -> Optional[Any]:
+        """קריאה לפונקציה המתאימה בספק לפי סוג הנתונים"""
+        provider = self._get_provider(provider_name)
         if not provider:
             raise ValueError(f"Provider '{provider_name}' not found")
         
@@ -324,6 +530,11 @@ class DataRouter:
                     return provider.get_market_data()
                 else:
                     raise NotImplementedError(f"Provider '{provider_name}' doesn't support market_data")
+            elif request.data_type in self._provider_methods:
+                method = getattr(provider, self._provider_methods[request.data_type], None)
+                if method is None:
+                    raise NotImplementedError(f"Provider '{provider_name}' doesn't support {request.data_type}")
+                return method(**(request.parameters or {}))
             else:
                 raise ValueError(f"Unsupported data type: {request.data_type}")
                 
@@ -331,13 +542,123 @@ class DataRouter:
             self._handle_provider_error(provider_name, e)
             raise
     
+    async def _execute_request_async(self, provider_name: str, request: DataRequest,
+                                     deadline: Optional[Deadline] = None) -> Optional[Any]:
+        """ביצוע בקשה לספק ספציפי בלי לחסום את ה-event loop (כולל מדידת latency ועדכון המפסק)"""
+        if not self._breakers.allow_request(provider_name, request.data_type):
+            raise CircuitOpenError(f"Circuit open for {provider_name}/{request.data_type}")
+        started = time.monotonic()
+        data = None
+        try:
+            with request_scope(deadline):
+                data = await self._call_provider_async(provider_name, request)
+        except asyncio.CancelledError:
+            # בקשה שבוטלה (hedge שהפסיד) אינה הצלחה ואינה כישלון
+            self._breakers.release(provider_name, request.data_type)
+            raise
+        except Exception as e:
+            self._metrics.record(provider_name, request.data_type, time.monotonic() - started, success=False)
+            self._record_error(provider_name, request.data_type, e)
+            raise
+        self._metrics.record(provider_name, request.data_type, time.monotonic() - started, success=data is not None)
+        self._record_outcome(provider_name, request.data_type, True)
+        return data
+    
+    async def _call_provider_async(self, provider_name: str, request: DataRequest) -> Optional[Any]:
+        """קריאה אסינכרונית לפונקציה המתאימה בספק לפי סוג הנתונים"""
+        provider = self._providers.get(provider_name)
+        if provider is None:
+            # יצירת ספק (ובדיקת חיבור) היא פעולה חוסמת
+            provider = await self._executor.run_async(provider_name, self._get_provider, provider_name)
+        if not provider:
+            raise ValueError(f"Provider '{provider_name}' not found")
+        
+        try:
+            if request.data_type == "VIX":
+                return await provider.get_vix_async()
+            elif request.data_type == "quote":
+                if not request.symbol:
+                    raise ValueError("Symbol required for quote request")
+                return await provider.get_quote_async(request.symbol)
+            elif request.data_type == "market_data":
+                if hasattr(provider, 'get_market_data_async'):
+                    return await provider.get_market_data_async()
+                elif hasattr(provider, 'get_market_data'):
+                    return await self._executor.run_async(provider_name, provider.get_market_data)
+                else:
+                    raise NotImplementedError(f"Provider '{provider_name}' doesn't support market_data")
+            elif request.data_type in self._provider_methods:
+                method_name = self._provider_methods[request.data_type]
+                params = request.parameters or {}
+                if hasattr(provider, method_name + "_async"):
+                    return await getattr(provider, method_name + "_async")(**params)
+                elif hasattr(provider, method_name):
+                    return await self._executor.run_async(provider_name, getattr(provider, method_name), **params)
+                else:
+                    raise NotImplementedError(f"Provider '{provider_name}' doesn't support {request.data_type}")
+            else:
+                raise ValueError(f"Unsupported data type: {request.data_type}")
+                
+        except Exception as e:
+            self._handle_provider_error(provider_name, e)
+            raise
+    
+    def _lookup_cache(self, request: DataRequest, cache_key: str) -> Tuple[Optional[Any], bool]:
+        """
+        חיפוש ב-cache
+        
+        Returns:
+            (נתונים, האם הנתונים stale ויש לרענן אותם ברקע)
+        """
+        cached_data = self._get_from_cache(cache_key, request.max_age_seconds, request.data_type)
+        if cached_data is not None:
+            return cached_data, False
+        
+        # stale-while-revalidate: ערך ישן מוחזר מיד והרענון מתבצע ברקע
+        routing_config = self._routing_config.get(request.data_type, {})
+        if routing_config.get("stale_while_revalidate"):
+            entry = self._global_cache.get_stale(cache_key)
+            if entry is not None and entry.data is not None:
+                self.logger.debug(f"Serving stale {cache_key} (age: {entry.age:.1f}s), refreshing in background")
+                return self._mark_stale(entry.data, entry.age), True
+        
+        return None, False
+    
+    def _on_provider_success(self, provider_name: str, request: DataRequest, cache_key: str, data: Any):
+        """שמירת תוצאה מוצלחת ב-cache ואיפוס מונה השגיאות של הספק"""
+        if request.use_cache:
+            routing_config = self._routing_config.get(request.data_type, {})
+            cache_ttl = routing_config.get("cache_ttl", self.default_cache_ttl)
+            stale_ttl = routing_config.get("max_stale_seconds", 0) if routing_config.get("stale_while_revalidate") else 0
+            self._set_cache(cache_key, data, ttl=max(cache_ttl, request.max_age_seconds), stale_ttl=stale_ttl,
+                            data_type=request.data_type)
+        
+        # איפוס מונה שגיאות
+        self._provider_errors[provider_name] = 0
+        
+        self.logger.info(f"Successfully got {request.data_type} from {provider_name}")
+    
     def get_data(self, request: DataRequest) -> Optional[Any]:
         """קבלת נתונים עם routing אוטומטי"""
+        cache_key = self._get_cache_key(request)
+        
         # בדיקת cache
         if request.use_cache:
-            cache_key = self._get_cache_key(request)
-            cached_data = self._get_from_cache(cache_key, request.max_age_seconds)
-            if cached_data:
+            cached_data, needs_refresh = self._lookup_cache(request, cache_key)
+            if cached_data is not None:
+                if needs_refresh:
+                    self._refresh_in_background(request, cache_key)
+                return cached_data
+        
+        # בקשות זהות שמגיעות במקביל חולקות קריאה אחת לספק
+        return self._single_flight.do(cache_key, lambda: self._fetch_from_providers(request, cache_key))
+    
+    def _fetch_from_providers(self, request: DataRequest, cache_key: str) -> Optional[Any]:
+        """מעבר על שרשרת הספקים עד לקבלת נתונים"""
+        # ייתכן שקריאה קודמת סיימה ומילאה את ה-cache בזמן שהמתנו
+        if request.use_cache:
+            cached_data = self._get_from_cache(cache_key, request.max_age_seconds, request.data_type)
+            if cached_data is not None:
                 return cached_data
         
         # קבלת ספקים זמינים
@@ -349,33 +670,245 @@ class DataRouter:
         
         # ניסיון לקבל נתונים מכל ספק
         routing_config = self._routing_config.get(request.data_type, {})
-        max_retries = routing_config.get("max_retries", 1)
+        deadline = self._request_deadline(routing_config)
+        policy = RetryPolicy(max_retries=routing_config.get("max_retries", 1))
+        
+        hedge_config = routing_config.get("hedge", {})
+        if hedge_config.get("enabled") and len(available_providers) > 1:
+            return self._fetch_hedged(request, cache_key, available_providers, hedge_config, deadline)
         
-        for provider_name in available_providers:
-            for attempt in range(max_retries + 1):
+        for index, provider_name in enumerate(available_providers):
+            if deadline.expired():
+                self.logger.warning(f"Deadline exceeded for {request.data_type} before trying {provider_name}")
+                break
+            # הזמן שנותר מתחלק בין הספקים שעוד לא נוסו; מה שספק לא ניצל עובר לבאים
+            budget = deadline.share(len(available_providers) - index)
+            for attempt in range(policy.max_retries + 1):
                 try:
                     self.logger.debug(f"Requesting {request.data_type} from {provider_name} (attempt {attempt + 1})")
                     
-                    data = self._execute_request(provider_name, request)
+                    data = self._execute_request(provider_name, request, budget)
                     
-                    if data:
-                        # הצלחה - שמירה ב-cache
-                        if request.use_cache:
-                            cache_ttl = routing_config.get("cache_ttl", self.default_cache_ttl)
-                            request.max_age_seconds = cache_ttl
-                            cache_key = self._get_cache_key(request)
-                            self._set_cache(cache_key, data)
-                        
-                        # איפוס מונה שגיאות
-                        self._provider_errors[provider_name] = 0
-                        
-                        self.logger.info(f"Successfully got {request.data_type} from {provider_name}")
+                    # רשימה ריקה (אין חדשות / אירועים) היא תשובה תקינה ונשמרת ב-cache; None - אין נתונים
+                    if data is not None:
+                        self._on_provider_success(provider_name, request, cache_key, data)
                         return data
+                    break  # אין נתונים - ניסיון חוזר לא ישנה זאת
                     
+                except CircuitOpenError as e:
+                    self.logger.debug(str(e))
+                    break  # עבור לספק הבא
                 except Exception as e:
                     self.logger.warning(f"Attempt {attempt + 1} failed for {provider_name}: {e}")
-                    if attempt == max_retries:
+                    delay = self._retry_delay(policy, attempt, e, budget)
+                    if delay is None:
                         break  # עבור לספק הבא
+                    time.sleep(delay)
+        
+        self.logger.error(f"Failed to get {request.data_type} from all available providers")
+        return None
+    
+    def _request_deadline(self, routing_config: Dict[str, Any]) -> Deadline:
+        """deadline חדש לבקשה לפי deadline_ms של סוג הנתונים"""
+        return Deadline(routing_config.get("deadline_ms", self.default_deadline_ms) / 1000.0)
+    
+    def _retry_delay(self, policy: RetryPolicy, attempt: int, error: Exception, budget: Deadline) -> Optional[float]:
+        """זמן ההמתנה לפני ניסיון חוזר, או None אם אין לנסות שוב את אותו ספק"""
+        if attempt >= policy.max_retries or not is_retryable(error):
+            return None
+        delay = policy.backoff(attempt)
+        if delay >= budget.remaining():
+            return None
+        return delay
+    
+    def _hedge_delay(self, provider_name: str, data_type: str, hedge_config: Dict[str, Any]) -> float:
+        """כמה שניות להמתין לספק לפני שליחת hedge (לפי אחוזון ה-latency שלו)"""
+        observed = self._metrics.latency_percentile(provider_name, data_type, hedge_config.get("percentile", 90))
+        if observed is None:
+            delay = hedge_config.get("default_delay_ms", 2000) / 1000.0
+        else:
+            delay = observed
+        return max(delay, hedge_config.get("min_delay_ms", 0) / 1000.0)
+    
+    def _fetch_hedged(self, request: DataRequest, cache_key: str, providers: List[str],
+                      hedge_config: Dict[str, Any], deadline: Deadline) -> Optional[Any]:
+        """
+        שרשרת ספקים עם hedging: אם הספק הנוכחי לא ענה בזמן, הספק הבא נקרא במקביל.
+        התשובה הטובה הראשונה מנצחת; תשובות מאוחרות מתעלמים מהן.
+        כשה-deadline נגמר מחזירים None בלי לחכות לבקשות שעדיין רצות.
+        """
+        max_hedges = hedge_config.get("max_hedges", 1)
+        pending: Dict[Any, str] = {}
+        next_index = 0
+        hedges = 0
+        
+        def launch(is_hedge: bool):
+            nonlocal next_index
+            provider_name = providers[next_index]
+            next_index += 1
+            if is_hedge:
+                self._metrics.record_hedge(provider_name, request.data_type)
+                self.logger.info(f"Hedging {request.data_type}: calling {provider_name} in parallel")
+            pending[self._executor.submit(provider_name, self._execute_request, provider_name, request, deadline)] = provider_name
+        
+        launch(is_hedge=False)
+        while pending and not deadline.expired():
+            can_hedge = next_index < len(providers) and hedges < max_hedges
+            timeout = deadline.remaining()
+            if can_hedge:
+                timeout = min(timeout, self._hedge_delay(providers[next_index - 1], request.data_type, hedge_config))
+            done, _ = wait(list(pending), timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                if can_hedge and not deadline.expired():
+                    hedges += 1
+                    launch(is_hedge=True)
+                continue
+            
+            for future in done:
+                provider_name = pending.pop(future)
+                try:
+                    data = future.result()
+                except Exception as e:
+                    self.logger.warning(f"Hedged request to {provider_name} failed: {e}")
+                    data = None
+                if data is not None:
+                    if provider_name != providers[0]:
+                        self._metrics.record_hedge_win(provider_name, request.data_type)
+                    for other in pending:
+                        other.cancel()
+                    self._on_provider_success(provider_name, request, cache_key, data)
+                    return data
+            
+            # כל מה שסיים נכשל - מעבר מיידי לספק הבא אם אין בקשה פעילה
+            if not pending and next_index < len(providers):
+                launch(is_hedge=False)
+        
+        self.logger.error(f"Failed to get {request.data_type} from all available providers")
+        return None
+    
+    async def _fetch_hedged_async(self, request: DataRequest, cache_key: str, providers: List[str],
+                                  hedge_config: Dict[str, Any], deadline: Deadline) -> Optional[Any]:
+        """גרסת asyncio של _fetch_hedged - ה-task המפסיד (וכל מה שרץ כשה-deadline נגמר) מבוטל"""
+        max_hedges = hedge_config.get("max_hedges", 1)
+        pending: Dict[asyncio.Task, str] = {}
+        next_index = 0
+        hedges = 0
+        
+        def launch(is_hedge: bool):
+            nonlocal next_index
+            provider_name = providers[next_index]
+            next_index += 1
+            if is_hedge:
+                self._metrics.record_hedge(provider_name, request.data_type)
+                self.logger.info(f"Hedging {request.data_type}: calling {provider_name} in parallel")
+            pending[asyncio.ensure_future(self._execute_request_async(provider_name, request, deadline))] = provider_name
+        
+        launch(is_hedge=False)
+        try:
+            while pending and not deadline.expired():
+                can_hedge = next_index < len(providers) and hedges < max_hedges
+                timeout = deadline.remaining()
+                if can_hedge:
+                    timeout = min(timeout, self._hedge_delay(providers[next_index - 1], request.data_type, hedge_config))
+                done, _ = await asyncio.wait(list(pending), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                
+                if not done:
+                    if can_hedge and not deadline.expired():
+                        hedges += 1
+                        launch(is_hedge=True)
+                    continue
+                
+                for task in done:
+                    provider_name = pending.pop(task)
+                    try:
+                        data = task.result()
+                    except Exception as e:
+                        self.logger.warning(f"Hedged request to {provider_name} failed: {e}")
+                        data = None
+                    if data is not None:
+                        if provider_name != providers[0]:
+                            self._metrics.record_hedge_win(provider_name, request.data_type)
+                        self._on_provider_success(provider_name, request, cache_key, data)
+                        return data
+                
+                if not pending and next_index < len(providers):
+                    launch(is_hedge=False)
+        finally:
+            for task in pending:
+                task.cancel()
+        
+        self.logger.error(f"Failed to get {request.data_type} from all available providers")
+        return None
+    
+    async def get_data_async(self, request: DataRequest) -> Optional[Any]:
+        """קבלת נתונים עם routing אוטומטי - גרסת asyncio"""
+        cache_key = self._get_cache_key(request)
+        
+        # בדיקת cache
+        if request.use_cache:
+            cached_data, needs_refresh = self._lookup_cache(request, cache_key)
+            if cached_data is not None:
+                if needs_refresh and not self._async_single_flight.in_flight(cache_key):
+                    task = asyncio.ensure_future(self._async_single_flight.do(
+                        cache_key, lambda: self._fetch_from_providers_async(request, cache_key)))
+                    self._background_tasks.add(task)
+                    task.add_done_callback(self._background_tasks.discard)
+                return cached_data
+        
+        return await self._async_single_flight.do(cache_key, lambda: self._fetch_from_providers_async(request, cache_key))
+    
+    async def _fetch_from_providers_async(self, request: DataRequest, cache_key: str) -> Optional[Any]:
+        """מעבר על שרשרת הספקים עד לקבלת נתונים - גרסת asyncio"""
+        if request.use_cache:
+            cached_data = self._get_from_cache(cache_key, request.max_age_seconds, request.data_type)
+            if cached_data is not None:
+                return cached_data
+        
+        available_providers = self._get_available_providers(request.data_type)
+        
+        if not available_providers:
+            self.logger.error(f"No available providers for {request.data_type}")
+            return None
+        
+        routing_config = self._routing_config.get(request.data_type, {})
+        deadline = self._request_deadline(routing_config)
+        policy = RetryPolicy(max_retries=routing_config.get("max_retries", 1))
+        
+        hedge_config = routing_config.get("hedge", {})
+        if hedge_config.get("enabled") and len(available_providers) > 1:
+            return await self._fetch_hedged_async(request, cache_key, available_providers, hedge_config, deadline)
+        
+        for index, provider_name in enumerate(available_providers):
+            if deadline.expired():
+                self.logger.warning(f"Deadline exceeded for {request.data_type} before trying {provider_name}")
+                break
+            budget = deadline.share(len(available_providers) - index)
+            for attempt in range(policy.max_retries + 1):
+                try:
+                    self.logger.debug(f"Requesting {request.data_type} from {provider_name} async (attempt {attempt + 1})")
+                    
+                    data = await asyncio.wait_for(
+                        self._execute_request_async(provider_name, request, budget), timeout=budget.remaining())
+                    
+                    # רשימה ריקה (אין חדשות / אירועים) היא תשובה תקינה ונשמרת ב-cache; None - אין נתונים
+                    if data is not None:
+                        self._on_provider_success(provider_name, request, cache_key, data)
+                        return data
+                    break  # אין נתונים - ניסיון חוזר לא ישנה זאת
+                    
+                except CircuitOpenError as e:
+                    self.logger.debug(str(e))
+                    break  # עבור לספק הבא
+                except asyncio.TimeoutError:
+                    self.logger.warning(f"Attempt {attempt + 1} for {provider_name} ran out of its time budget")
+                    break  # עבור לספק הבא
+                except Exception as e:
+                    self.logger.warning(f"Attempt {attempt + 1} failed for {provider_name}: {e}")
+                    delay = self._retry_delay(policy, attempt, e, budget)
+                    if delay is None:
+                        break  # עבור לספק הבא
+                    await asyncio.sleep(delay)
         
         self.logger.error(f"Failed to get {request.data_type} from all available providers")
         return None
@@ -391,15 +924,162 @@ class DataRouter:
         request = DataRequest(data_type="quote", symbol=symbol, max_age_seconds=30)
         return self.get_data(request)
     
+    def _split_cached_quotes(self, symbols: List[str], max_age_seconds: int) -> Tuple[Dict[str, QuoteData], List[str]]:
+        """חלוקת סימבולים לכאלה שנמצאים ב-cache ולכאלה שיש לשלוף"""
+        quotes: Dict[str, QuoteData] = {}
+        missing: List[str] = []
+        for symbol in symbols:
+            cache_key = self._get_cache_key(DataRequest(data_type="quote", symbol=symbol))
+            cached_data = self._get_from_cache(cache_key, max_age_seconds)
+            if cached_data:
+                quotes[symbol] = cached_data
+            else:
+                missing.append(symbol)
+        
+        if missing:
+            self.logger.debug(f"Batch quotes: {len(quotes)} cached, {len(missing)} to fetch")
+        return quotes, missing
+    
+    def _store_fetched_quotes(self, fetched: Dict[str, QuoteData], quotes: Dict[str, QuoteData],
+                              missing: List[str], max_age_seconds: int) -> List[str]:
+        """שמירת ציטוטים שהתקבלו מספק ב-cache. מחזיר את הסימבולים שעדיין חסרים"""
+        routing_config = self._routing_config.get("quote", {})
+        cache_ttl = max(routing_config.get("cache_ttl", self.default_cache_ttl), max_age_seconds)
+        for symbol, quote in fetched.items():
+            if quote and symbol in missing:
+                quotes[symbol] = quote
+                cache_key = self._get_cache_key(DataRequest(data_type="quote", symbol=symbol))
+                self._set_cache(cache_key, quote, ttl=cache_ttl)
+        return [s for s in missing if s not in quotes]
+    
+    def _batch_quote_result(self, symbols: List[str], quotes: Dict[str, QuoteData], missing: List[str]) -> BatchQuoteResult:
+        """בניית תוצאה לפי סדר הסימבולים המקורי"""
+        if missing:
+            self.logger.warning(f"Failed to get quotes for {len(missing)} symbols: {missing[:10]}")
+        return BatchQuoteResult(quotes={s: quotes[s] for s in symbols if s in quotes}, failed=missing)
+    
+    def get_quotes(self, symbols: List[str], max_age_seconds: int = 30) -> BatchQuoteResult:
+        """
+        קבלת ציטוטים לרשימת סימבולים
+        
+        סימבולים שנמצאים ב-cache לא נשלפים שוב. השאר נשלחים לספקים לפי סדר
+        ה-routing של "quote", וכל ספק מקבל רק את מה שהקודמים לא הצליחו להביא.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        quotes, missing = self._split_cached_quotes(symbols, max_age_seconds)
+        deadline_ms = self._routing_config.get("quote", {}).get("batch_deadline_ms", self.default_deadline_ms)
+        
+        for provider_name in (self._get_available_providers("quote") if missing else []):
+            provider = self._get_provider(provider_name)
+            if provider is None:
+                continue
+            if not self._breakers.allow_request(provider_name, "quote"):
+                continue
+            deadline = Deadline(deadline_ms / 1000.0)
+            started = time.monotonic()
+            try:
+                # ספק שכל ה-chunks שלו נכשלו זורק את השגיאה (ולא מחזיר תוצאה ריקה)
+                with request_scope(deadline):
+                    if getattr(provider, "supports_batch_quotes", False):
+                        fetched = self._executor.run(provider_name, provider.get_quotes, missing,
+                                                     timeout=deadline.remaining())
+                    else:
+                        # ה-fan-out של הספק כבר שולח כל get_quote ל-executor (ומחכה עד ה-deadline)
+                        fetched = provider.get_quotes(missing)
+            except Exception as e:
+                self._metrics.record(provider_name, "quote", time.monotonic() - started, success=False)
+                self._handle_provider_error(provider_name, e)
+                self._record_error(provider_name, "quote", e)
+                continue
+            self._metrics.record(provider_name, "quote", time.monotonic() - started, success=bool(fetched))
+            self._record_outcome(provider_name, "quote", True)
+            
+            missing = self._store_fetched_quotes(fetched, quotes, missing, max_age_seconds)
+            if not missing:
+                break
+        
+        return self._batch_quote_result(symbols, quotes, missing)
+    
     def get_market_data(self) -> Optional[Dict[str, QuoteData]]:
         """קבלת נתוני שוק"""
         request = DataRequest(data_type="market_data", max_age_seconds=300)
         return self.get_data(request)
     
+    # פונקציות נוחות - asyncio
+    async def get_vix_async(self) -> Optional[QuoteData]:
+        """קבלת נתוני VIX (אסינכרוני)"""
+        return await self.get_data_async(DataRequest(data_type="VIX", max_age_seconds=60))
+    
+    async def get_quote_async(self, symbol: str) -> Optional[QuoteData]:
+        """קבלת ציטוט (אסינכרוני)"""
+        return await self.get_data_async(DataRequest(data_type="quote", symbol=symbol, max_age_seconds=30))
+    
+    async def get_quotes_async(self, symbols: List[str], max_age_seconds: int = 30) -> BatchQuoteResult:
+        """ציטוטים מרובים (אסינכרוני) - אותה לוגיקה כמו get_quotes"""
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        quotes, missing = self._split_cached_quotes(symbols, max_age_seconds)
+        
+        deadline_ms = self._routing_config.get("quote", {}).get("batch_deadline_ms", self.default_deadline_ms)
+        
+        for provider_name in (self._get_available_providers("quote") if missing else []):
+            provider = self._providers.get(provider_name) or await self._executor.run_async(provider_name, self._get_provider, provider_name)
+            if provider is None:
+                continue
+            if not self._breakers.allow_request(provider_name, "quote"):
+                continue
+            started = time.monotonic()
+            try:
+                with request_scope(Deadline(deadline_ms / 1000.0)):
+                    fetched = await provider.get_quotes_async(missing)
+            except Exception as e:
+                self._metrics.record(provider_name, "quote", time.monotonic() - started, success=False)
+                self._handle_provider_error(provider_name, e)
+                self._record_error(provider_name, "quote", e)
+                continue
+            self._metrics.record(provider_name, "quote", time.monotonic() - started, success=bool(fetched))
+            self._record_outcome(provider_name, "quote", True)
+            
+            missing = self._store_fetched_quotes(fetched, quotes, missing, max_age_seconds)
+            if not missing:
+                break
+        
+        return self._batch_quote_result(symbols, quotes, missing)
+    
+    async def get_market_news_async(self):
+        """חדשות שוק (אסינכרוני)"""
+        return await self.get_data_async(DataRequest(data_type="market_news", max_age_seconds=900)) or []
+    
+    async def get_earnings_async(self):
+        """דוחות רבעוניים (אסינכרוני)"""
+        return await self.get_data_async(DataRequest(data_type="earnings", max_age_seconds=3600)) or []
+    
+    async def get_economic_events_async(self, days_ahead=30):
+        """אירועים כלכליים קרובים (אסינכרוני)"""
+        request = DataRequest(data_type="economic_events", parameters={"days_ahead": days_ahead}, max_age_seconds=3600)
+        return await self.get_data_async(request) or []
+    
+    async def get_market_data_async(self) -> Optional[Dict[str, QuoteData]]:
+        """קבלת נתוני שוק (אסינכרוני)"""
+        return await self.get_data_async(DataRequest(data_type="market_data", max_age_seconds=300))
+    
+    async def close_async(self):
+        """סגירת ה-sessions האסינכרוניים של כל הספקים"""
+        for provider in list(self._providers.values()):
+            await provider.close_async()
+    
+    def close(self):
+        """סגירת ה-sessions הסינכרוניים של כל הספקים"""
+        for provider in list(self._providers.values()):
+            provider.close()
+    
     def test_all_providers(self) -> Dict[str, bool]:
         """בדיקת כל הספקים"""
         results = {}
-        for name, provider in self._providers.items():
+        for name in self._provider_configs:
+            provider = self._get_provider(name)
+            if provider is None:
+                results[name] = False
+                continue
             try:
                 results[name] = provider.test_connection()
                 self.logger.info(f"Provider '{name}' test: {'PASS' if results[name] else 'FAIL'}")
@@ -412,20 +1092,40 @@ class DataRouter:
     def get_provider_status(self) -> Dict[str, Dict[str, Any]]:
         """קבלת סטטוס כל הספקים"""
         status = {}
+        decisions = dict(self._routing_decisions)
         
-        for name, provider in self._providers.items():
-            provider_status = provider.get_status()
-            config = self._provider_configs.get(name)
+        for name, config in self._provider_configs.items():
+            provider = self._providers.get(name)
+            provider_status = provider.get_status() if provider else None
+            circuits = self._breakers.get_provider_stats(name)
             
             status[name] = {
+                "initialized": provider is not None,
                 "available": self._is_provider_available(name),
-                "healthy": provider.is_healthy(),
-                "enabled": config.enabled if config else False,
+                "healthy": provider.is_healthy() if provider else name not in self._failed_providers,
+                "enabled": config.enabled,
                 "error_count": self._provider_errors.get(name, 0),
-                "request_count": provider_status.request_count,
-                "last_request": provider_status.last_request.isoformat() if provider_status.last_request else None,
-                "quota_usage": provider_status.quota_usage_percent,
-                "in_cooldown": name in self._provider_cooldowns and datetime.now() < self._provider_cooldowns[name]
+                "request_count": provider_status.request_count if provider_status else 0,
+                "last_request": provider_status.last_request.isoformat() if provider_status and provider_status.last_request else None,
+                "quota_usage": provider_status.quota_usage_percent if provider_status else 0.0,
+                "in_cooldown": any(c["state"] == "open" for c in circuits.values()),
+                "circuits": circuits,
+                "hedge_requests": self._metrics.total_hedge_requests(name),
+                "rate_limit": provider.get_rate_limiter().get_stats() if provider else None,
+                "http": provider.get_session_info() if provider else None,
+                "backoff_remaining": round(provider.backoff_remaining(), 1) if provider else 0.0,
+                "negative_cache_entries": provider.get_negative_cache_size() if provider else 0,
+                "executor": self._executor.get_stats(name),
+                "metrics": self._metrics.get_provider_metrics(name),
+                "routing": {
+                    data_type: {
+                        "rank": decision["order"].index(name) + 1,
+                        "score": decision["scores"].get(name),
+                        "pinned": decision["pinned"] == name,
+                        "decided_at": decision["timestamp"]
+                    }
+                    for data_type, decision in decisions.items() if name in decision["order"]
+                }
             }
         
         return status
@@ -434,56 +1134,47 @@ class DataRouter:
         """איפוס שגיאות ספק"""
         if provider_name:
             self._provider_errors[provider_name] = 0
-            if provider_name in self._provider_cooldowns:
-                del self._provider_cooldowns[provider_name]
+            self._breakers.reset(provider_name)
             self.logger.info(f"Reset errors for provider '{provider_name}'")
         else:
             self._provider_errors.clear()
-            self._provider_cooldowns.clear()
+            self._breakers.reset()
             self.logger.info("Reset errors for all providers")
     
     def clear_cache(self, pattern: str = None):
-        """ניקוי cache"""
+        """ניקוי cache (בזיכרון ובדיסק)"""
+        removed = self._global_cache.clear(pattern)
+        if self._disk_cache is not None:
+            self._disk_cache.clear(pattern)
         if pattern:
-            # ניקוי לפי pattern
-            keys_to_remove = [k for k in self._global_cache.keys() if pattern in k]
-            for key in keys_to_remove:
-                del self._global_cache[key]
-            self.logger.info(f"Cleared {len(keys_to_remove)} cache entries matching '{pattern}'")
+            self.logger.info(f"Cleared {removed} cache entries matching '{pattern}'")
         else:
-            # ניקוי מלא
-            cache_size = len(self._global_cache)
-            self._global_cache.clear()
-            self.logger.info(f"Cleared entire cache ({cache_size} entries)")
+            self.logger.info(f"Cleared entire cache ({removed} entries)")
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """סטטיסטיקות cache"""
-        now = datetime.now()
-        total_entries = len(self._global_cache)
-        expired_entries = 0
-        
-        for key, (data, timestamp) in self._global_cache.items():
-            age = (now - timestamp).total_seconds()
-            if age > self.default_cache_ttl:
-                expired_entries += 1
-        
-        try:
-            self.logger.info("Initializing FRED provider...")
-            fred_provider = FREDProvider(config)
-            self.register_provider("fred", fred_provider, is_primary=True)
-            self.logger.info("FRED provider registered successfully")
-            # בדיקת חיבור מיידית
-            connection_test = fred_provider.test_connection()
-            self.logger.info(f"FRED connection test: {'PASS' if connection_test else 'FAIL'}")
-        except Exception as e:
-            self.logger.error(f"Failed to initialize FRED provider: {e}")
-            import traceback
-            self.logger.error(f"Full traceback: {traceback.format_exc()}")
-        # Yahoo Finance כ-fallback (אם נצליח לתקן אותו בעתיד)
-        try:
-            self.logger.info("Initializing Yahoo Finance provider as fallback...")
-            yahoo_provider = YahooProvider(config)
-            self.register_provider("yahoo", yahoo_provider, is_primary=False)
-            self.logger.info("Yahoo Finance fallback registered")
-        except Exception as e:
-            self.logger.warning(f"Yahoo Finance fallback failed: {e}")
\ No newline at end of file
+        stats = self._global_cache.get_stats()
+        stats["default_ttl"] = self.default_cache_ttl
+        stats["single_flight"] = self._single_flight.get_stats()
+        stats["disk"] = self._disk_cache.get_stats() if self._disk_cache is not None else None
+        return stats
+
+
+# נתב משותף לכל התהליך
+_shared_router: Optional[DataRouter] = None
+_shared_router_lock = threading.Lock()
+
+
+def get_data_router() -> DataRouter:
+    """
+    קבלת ה-DataRouter המשותף לתהליך
+    
+    כל הרכיבים (חלון ראשי, widgets, אסטרטגיות) חולקים את אותו נתב,
+    כך שה-cache, ה-cooldowns ומוני השגיאות נשמרים בין קריאות.
+    """
+    global _shared_router
+    if _shared_router is None:
+        with _shared_router_lock:
+            if _shared_router is None:
+                _shared_router = DataRouter()
+    return _shared_router
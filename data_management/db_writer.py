@@ -0,0 +1,226 @@
+"""
+data_management/db_writer.py - thread כותב יחיד לקובץ SQLite
+כל הכתיבות לקובץ עוברות דרך תור אחד: ה-thread מאסף את כל מה שממתין (מכמה יצרנים)
+לטרנזקציה אחת גדולה, כך שמספר ה-commits (וה-fsync) לא גדל עם מספר הכותבים.
+כל עבודה רצה בתוך SAVEPOINT משלה - עבודה שנכשלה מבוטלת בלי להפיל את שאר ה-batch.
+"""
+
+import queue
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from core.logger import get_logger
+
+_STOP = object()
+
+
+@dataclass
+class _WriteJob:
+    """כתיבה אחת בתור"""
+    fn: Callable[[sqlite3.Connection], Any]
+    rows: int
+    on_commit: Optional[Callable[[], None]] = None
+    future: Future = field(default_factory=Future)
+    submitted: float = field(default_factory=time.monotonic)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """חיבור SQLite במצב autocommit (טרנזקציות מפורשות) עם WAL"""
+    conn = sqlite3.connect(db_path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA busy_timeout = 10000")
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("PRAGMA synchronous=NORMAL;")
+    return conn
+
+
+class DBWriter:
+    """thread כותב לקובץ SQLite אחד"""
+
+    max_batch_jobs = 512  # עבודות לכל היותר בטרנזקציה אחת
+
+    def __init__(self, db_path: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None):
+        self.db_path = db_path
+        self.logger = get_logger("DBWriter")
+        self._queue: "queue.Queue" = queue.Queue()
+        self._stats_lock = threading.Lock()
+        self._jobs = 0
+        self._failed = 0
+        self._transactions = 0
+        self._rows = 0
+        self._busy_seconds = 0.0
+        self._largest_batch = 0
+        self._commit_times: Deque[float] = deque(maxlen=500)
+        self._latencies: Deque[float] = deque(maxlen=500)  # מההכנסה לתור ועד ה-commit
+
+        self._ready = threading.Event()
+        self._setup_error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, args=(setup,), name=f"DBWriter-{db_path}", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._setup_error is not None:
+            raise self._setup_error
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any], rows: int = 0,
+               on_commit: Optional[Callable[[], None]] = None) -> Future:
+        """
+        הכנסת כתיבה לתור. fn מקבלת את החיבור של ה-writer ורצה בתוך טרנזקציה - אסור לה לבצע commit.
+        ה-Future מסתיים אחרי ה-commit של ה-batch שהיא חלק ממנו
+
+        Args:
+            rows: מספר השורות שנכתבות (למדדים בלבד)
+            on_commit: נקרא אחרי ה-commit ולפני סיום ה-Future (למשל ביטול cache של מה שנכתב)
+        """
+        if not self._thread.is_alive():
+            raise RuntimeError(f"DBWriter for {self.db_path} is closed")
+        job = _WriteJob(fn=fn, rows=rows, on_commit=on_commit)
+        self._queue.put(job)
+        return job.future
+
+    def execute(self, fn: Callable[[sqlite3.Connection], Any], rows: int = 0,
+                on_commit: Optional[Callable[[], None]] = None) -> Any:
+        """כתיבה והמתנה ל-commit שלה"""
+        return self.submit(fn, rows, on_commit).result()
+
+    def _run(self, setup):
+        try:
+            conn = connect(self.db_path)
+            if setup is not None:
+                setup(conn)
+        except BaseException as e:
+            self._setup_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            job = self._queue.get()
+            if job is _STOP:
+                break
+            batch = [job]
+            stop = False
+            while len(batch) < self.max_batch_jobs:
+                try:
+                    job = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if job is _STOP:
+                    stop = True
+                    break
+                batch.append(job)
+            self._write_batch(conn, batch)
+            if stop:
+                break
+        conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[_WriteJob]):
+        """batch אחד בטרנזקציה אחת"""
+        started = time.monotonic()
+        results = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for job in batch:
+                if not job.future.set_running_or_notify_cancel():
+                    results.append((False, None))
+                    continue
+                conn.execute("SAVEPOINT write_job")
+                try:
+                    results.append((True, job.fn(conn)))
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO write_job")
+                    results.append((False, e))
+                conn.execute("RELEASE write_job")
+            conn.execute("COMMIT")
+        except BaseException as e:
+            # ה-commit (או ה-BEGIN) נכשל - כל ה-batch לא נכתב
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            self.logger.error(f"Write batch of {len(batch)} jobs failed: {e}")
+            for job in batch:
+                if job.future.running():
+                    job.future.set_exception(e)
+            self._record(batch, started, failed=len(batch), committed=False)
+            return
+
+        failed = 0
+        for job, (ok, value) in zip(batch, results):
+            if not job.future.running():
+                continue
+            if ok and job.on_commit is not None:
+                try:
+                    job.on_commit()
+                except Exception as e:
+                    self.logger.error(f"on_commit callback failed: {e}")
+            if ok:
+                job.future.set_result(value)
+            else:
+                failed += 1
+                job.future.set_exception(value)
+        self._record(batch, started, failed=failed, committed=True)
+
+    def _record(self, batch: List[_WriteJob], started: float, failed: int, committed: bool):
+        finished = time.monotonic()
+        with self._stats_lock:
+            self._jobs += len(batch)
+            self._failed += failed
+            self._busy_seconds += finished - started
+            if committed:
+                self._transactions += 1
+                self._rows += sum(job.rows for job in batch)
+                self._largest_batch = max(self._largest_batch, len(batch))
+                self._commit_times.append(finished - started)
+                self._latencies.extend(finished - job.submitted for job in batch)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """מדדי קצב והשהיה של הכתיבות"""
+        with self._stats_lock:
+            commits = sorted(self._commit_times)
+            latencies = sorted(self._latencies)
+            return {
+                "queued": self._queue.qsize(),
+                "jobs": self._jobs,
+                "failed": self._failed,
+                "transactions": self._transactions,
+                "rows": self._rows,
+                "avg_jobs_per_transaction": round(self._jobs / self._transactions, 2) if self._transactions else 0.0,
+                "max_jobs_per_transaction": self._largest_batch,
+                "rows_per_second": round(self._rows / self._busy_seconds, 1) if self._busy_seconds else 0.0,
+                "avg_transaction_ms": _ms(sum(commits) / len(commits)) if commits else 0.0,
+                "p95_transaction_ms": _ms(_percentile(commits, 0.95)),
+                "avg_latency_ms": _ms(sum(latencies) / len(latencies)) if latencies else 0.0,
+                "p95_latency_ms": _ms(_percentile(latencies, 0.95)),
+            }
+
+    def close(self, timeout: Optional[float] = None):
+        """סיום אחרי שכל מה שבתור נכתב"""
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 2)
+
+
+_writers: Dict[str, DBWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(db_path: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None) -> DBWriter:
+    """ה-writer של הקובץ (אחד לכל קובץ בתהליך). setup רץ פעם אחת, ב-thread של ה-writer, לפני הכתיבה הראשונה"""
+    import os
+    key = os.path.abspath(db_path)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None or not writer._thread.is_alive():
+            writer = DBWriter(db_path, setup)
+            _writers[key] = writer
+        return writer
@@ -0,0 +1,197 @@
+"""
+data_management/disk_cache.py - מטמון L2 על הדיסק עבור DataRouter
+SQLite + pickle: הנתונים שורדים הפעלה מחדש של האפליקציה, כך שהמסך הראשון
+מוצג מיד מהערכים האחרונים והרענון מהרשת מתבצע ברקע.
+לכל סוג נתונים ניתן להגדיר כמה זמן רשומה נשמרת ומה מספר הרשומות המרבי.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from core.logger import get_logger
+
+DEFAULT_PATH = Path(__file__).parent / "router_cache.db"
+
+
+@dataclass
+class DiskEntry:
+    """רשומה שנקראה מהדיסק"""
+    key: str
+    data_type: str
+    data: Any
+    timestamp: float  # epoch seconds - מתי הנתונים נשלפו מהספק
+    ttl: float  # ה-TTL בזיכרון
+    expires_at: float  # epoch seconds - מתי הרשומה נמחקת מהדיסק
+
+    @property
+    def age(self) -> float:
+        """גיל הרשומה בשניות"""
+        return time.time() - self.timestamp
+
+
+class DiskCache:
+    """מטמון SQLite בטוח ל-threads (חיבור אחד מוגן במנעול)"""
+
+    def __init__(self, db_path: Path = DEFAULT_PATH, max_bytes: int = 64 * 1024 * 1024):
+        self.logger = get_logger("DiskCache")
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        # סטטיסטיקות
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                key TEXT PRIMARY KEY,
+                data_type TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                timestamp REAL NOT NULL,
+                ttl REAL NOT NULL,
+                expires_at REAL NOT NULL,
+                size INTEGER NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_type_ts ON cache_entries(data_type, timestamp)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries(expires_at)")
+        self._conn.commit()
+        self.purge_expired()
+
+    def get(self, key: str) -> Optional[DiskEntry]:
+        """קריאת רשומה שעדיין לא פג תוקפה"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT key, data_type, payload, timestamp, ttl, expires_at FROM cache_entries "
+                "WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        entry = self._load_row(row) if row else None
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    def set(self, key: str, data_type: str, data: Any, ttl: float, keep_seconds: float,
+            max_entries: Optional[int] = None, timestamp: Optional[float] = None):
+        """
+        שמירת רשומה
+
+        Args:
+            ttl: ה-TTL בזיכרון (נשמר כדי לשחזר את הרשומה כמו שהייתה)
+            keep_seconds: כמה זמן הרשומה נשמרת בדיסק
+            max_entries: מספר רשומות מרבי לסוג הנתונים (הישנות נמחקות)
+        """
+        try:
+            payload = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            self.logger.debug(f"Not persisting {key}: {e}")
+            return
+        timestamp = timestamp if timestamp is not None else time.time()
+
+        with self._lock:
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache_entries (key, data_type, payload, timestamp, ttl, expires_at, size) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, data_type, payload, timestamp, ttl, timestamp + keep_seconds, len(payload))
+                )
+                if max_entries:
+                    self._conn.execute(
+                        "DELETE FROM cache_entries WHERE data_type = ? AND key NOT IN ("
+                        "SELECT key FROM cache_entries WHERE data_type = ? ORDER BY timestamp DESC LIMIT ?)",
+                        (data_type, data_type, max_entries)
+                    )
+                self._enforce_size()
+                self._conn.commit()
+                self.writes += 1
+            except sqlite3.Error as e:
+                self.logger.warning(f"Disk cache write failed for {key}: {e}")
+
+    def _enforce_size(self):
+        """מחיקת הרשומות הישנות ביותר עד לעמידה בתקציב - בתוך המנעול"""
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache_entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        for key, size in self._conn.execute("SELECT key, size FROM cache_entries ORDER BY timestamp").fetchall():
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            excess -= size
+            if excess <= 0:
+                break
+
+    def iter_entries(self) -> Iterator[DiskEntry]:
+        """כל הרשומות בתוקף, מהישנה לחדשה (לחימום ה-cache בזיכרון)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key, data_type, payload, timestamp, ttl, expires_at FROM cache_entries "
+                "WHERE expires_at > ? ORDER BY timestamp", (time.time(),)
+            ).fetchall()
+        for row in rows:
+            entry = self._load_row(row)
+            if entry is not None:
+                yield entry
+
+    def _load_row(self, row) -> Optional[DiskEntry]:
+        """המרת שורה ל-DiskEntry (None אם ה-payload לא נטען, למשל אחרי שינוי מחלקה)"""
+        key, data_type, payload, timestamp, ttl, expires_at = row
+        try:
+            data = pickle.loads(payload)
+        except Exception as e:
+            self.logger.debug(f"Dropping unreadable disk cache entry {key}: {e}")
+            self.delete(key)
+            return None
+        return DiskEntry(key=key, data_type=data_type, data=data, timestamp=timestamp,
+                         ttl=ttl, expires_at=expires_at)
+
+    def delete(self, key: str):
+        """מחיקת רשומה"""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self, pattern: Optional[str] = None) -> int:
+        """מחיקת כל הרשומות, או רק אלה שמפתחן מכיל את pattern"""
+        with self._lock:
+            if pattern:
+                removed = self._conn.execute("DELETE FROM cache_entries WHERE instr(key, ?) > 0", (pattern,)).rowcount
+            else:
+                removed = self._conn.execute("DELETE FROM cache_entries").rowcount
+            self._conn.commit()
+        return removed
+
+    def purge_expired(self) -> int:
+        """מחיקת רשומות שפג תוקפן"""
+        with self._lock:
+            removed = self._conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),)).rowcount
+            self._conn.commit()
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """סטטיסטיקות מטמון הדיסק"""
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_entries").fetchone()
+        return {
+            "path": str(self.db_path),
+            "total_entries": count,
+            "total_bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes
+        }
+
+    def close(self):
+        """סגירת החיבור"""
+        with self._lock:
+            self._conn.close()
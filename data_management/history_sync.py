@@ -0,0 +1,166 @@
+"""
+data_management/history_sync.py - סנכרון מצטבר של היסטוריה יומית ל-StockDB
+לכל סימבול נבדק מה כבר קיים במסד עבור הספק, ורק הטווחים החסרים (בתחילה, בסוף
+או באמצע) מורדים ונשמרים. עדכון יומי של כל הרשימה מוריד כך נר אחד לסימבול.
+הטווח נחתך בסשן המסחר האחרון שהסתיים (נר של יום שעוד לא נסגר הוא חלקי), וטווח שהספק
+החזיר ריק לפני ההנפקה נשמר במסד (history_start) כדי שלא יתוכנן שוב בכל סנכרון.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.logger import get_logger
+from .stock_db import StockDB
+
+DateRange = Tuple[str, str]
+
+# הנר היומי סופי אחרי סגירת המסחר בניו יורק (16:00) ועוד מרווח לעדכון אצל הספק
+_SESSION_COMPLETE = time(16, 30)
+
+
+@dataclass
+class SyncResult:
+    """תוצאת סנכרון"""
+    bars: Dict[str, int] = field(default_factory=dict)  # symbol -> נרות שנשמרו
+    up_to_date: List[str] = field(default_factory=list)  # סימבולים שלא חסר להם דבר
+    failed: Dict[str, str] = field(default_factory=dict)  # symbol -> סיבת הכישלון
+    requested: Dict[str, List[DateRange]] = field(default_factory=dict)  # הטווחים שהתבקשו מהספק
+
+    @property
+    def total_bars(self) -> int:
+        return sum(self.bars.values())
+
+
+class HistorySync:
+    """הורדת החוסרים בלבד מספק היסטוריה ושמירתם במסד"""
+
+    def __init__(self, db: StockDB, provider: Any, provider_name: str = "yahoo", max_gap_days: int = 1):
+        self.logger = get_logger("HistorySync")
+        self.db = db
+        self.provider = provider
+        self.provider_name = provider_name
+        self.max_gap_days = max_gap_days
+
+    def plan(self, symbols: List[str], start_date: str, end_date: str) -> Dict[str, List[DateRange]]:
+        """הטווחים החסרים לכל סימבול (רשימה ריקה - הסימבול מעודכן), עד הסשן האחרון שהסתיים"""
+        end_date = min(end_date[:10], last_completed_session())
+        return {
+            symbol: self.db.find_missing_ranges(symbol, start_date, end_date, provider=self.provider_name,
+                                                max_gap_days=self.max_gap_days)
+            for symbol in dict.fromkeys(symbols)
+        }
+
+    def sync(self, symbols: List[str], start_date: str, end_date: str,
+             on_progress: Optional[Callable[[SyncResult], None]] = None) -> SyncResult:
+        """
+        סנכרון הסימבולים לטווח [start_date, end_date] (תאריכי ISO, כולל)
+
+        Args:
+            on_progress: נקרא אחרי כל chunk שנשמר, עם התוצאה המצטברת
+        """
+        result = SyncResult()
+        plan = self.plan(symbols, start_date, end_date)
+        for symbol, gaps in plan.items():
+            if gaps:
+                result.requested[symbol] = gaps
+            else:
+                result.up_to_date.append(symbol)
+        self.logger.info(f"Sync plan: {len(result.requested)} symbols with gaps, {len(result.up_to_date)} up to date")
+
+        for frames, failed in self._fetch(plan):
+            # כל הסימבולים של ה-chunk נכתבים יחד (ה-writer מאחד אותם לטרנזקציה אחת)
+            pending = []
+            for symbol, (frame, (first, last)) in frames.items():
+                dates = frame.index.strftime("%Y-%m-%d")
+                frame = frame[(dates >= first) & (dates <= last)]
+                if not frame.empty:
+                    pending.append(self.db.insert_frame(symbol, self.provider_name, frame, wait=False))
+                result.bars[symbol] = result.bars.get(symbol, 0) + len(frame)
+                result.failed.pop(symbol, None)
+                self._note_history_start(symbol, start_date, (first, last), frame)
+            for future in pending:
+                future.result()
+            for symbol, reason in failed.items():
+                if symbol in result.bars:
+                    continue
+                # דיווח ראשון על הסימבול הוא של הפער הראשון שלו; "no data" בפער שלפני הנרות במסד - לפני ההנפקה
+                if (symbol not in result.failed and "no data" in reason.lower()
+                        and self._note_history_start(symbol, start_date, result.requested[symbol][0])):
+                    result.bars[symbol] = 0  # אין נרות לפני ההנפקה - לא כישלון
+                    continue
+                result.failed[symbol] = reason
+            if on_progress is not None:
+                on_progress(result)
+        return result
+
+    def _note_history_start(self, symbol: str, start_date: str, gap: DateRange, frame: Any = None) -> bool:
+        """
+        שמירת תחילת ההיסטוריה אחרי הורדת הפער שבתחילת הטווח: הנר הראשון שהתקבל, או - אם לא
+        התקבל דבר והמסד מכיל נרות אחרי הפער - היום שאחרי הפער. מחזיר האם נשמר סימון
+        """
+        first, last = gap
+        if first != start_date[:10]:
+            return False
+        if frame is not None and len(frame):
+            first_date = frame.index[0].strftime("%Y-%m-%d")
+        elif self.db.get_dates(symbol, self.provider_name, start_date=_day_after(last)):
+            first_date = _day_after(last)
+        else:
+            first_date = None
+        if first_date is None or first_date <= first:
+            return False
+        self.db.set_history_start(symbol, self.provider_name, first, first_date)
+        return True
+
+    def _fetch(self, plan: Dict[str, List[DateRange]]) -> Iterator[Tuple[Dict[str, Tuple[Any, DateRange]], Dict[str, str]]]:
+        """
+        הורדת הטווחים החסרים. בסבב k מורד הפער ה-k של כל סימבול, כך שכל סבב הוא
+        בקשה מרובת-סימבולים אחת לכל טווח משותף (ה-end של yfinance אינו כולל - מוסיפים יום)
+        """
+        bulk = getattr(self.provider, "iter_historical_data_bulk", None)
+        rounds = max((len(gaps) for gaps in plan.values()), default=0)
+        for k in range(rounds):
+            gaps = {symbol: gaps[k] for symbol, gaps in plan.items() if len(gaps) > k}
+            if bulk is not None:
+                ranges = {symbol: (first, _day_after(last)) for symbol, (first, last) in gaps.items()}
+                for chunk in bulk(ranges):
+                    yield {s: (frame, gaps[s]) for s, frame in chunk.frames.items()}, chunk.failed
+                continue
+            for symbol, (first, last) in gaps.items():
+                try:
+                    frame = self.provider.get_historical_data(symbol, first, _day_after(last))
+                except Exception as e:
+                    yield {}, {symbol: str(e)}
+                    continue
+                if frame is None or frame.empty:
+                    yield {}, {symbol: "no data returned"}
+                else:
+                    yield {symbol: (frame, (first, last))}, {}
+
+
+def last_completed_session(now: Optional[datetime] = None) -> str:
+    """תאריך (ISO) של יום המסחר האחרון שנסגר בבורסה האמריקאית (ימי חול בלבד - בלי לוח חגים)"""
+    now = now.astimezone(_NEW_YORK) if now is not None else datetime.now(_NEW_YORK)
+    day = now.date()
+    if now.time() < _SESSION_COMPLETE:
+        day -= timedelta(days=1)
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return day.isoformat()
+
+
+def _new_york():
+    try:
+        from zoneinfo import ZoneInfo
+        return ZoneInfo("America/New_York")
+    except Exception:
+        # אין מסד אזורי זמן (Windows בלי tzdata) - שעון חורף קבוע
+        return timezone(timedelta(hours=-5))
+
+
+_NEW_YORK = _new_york()
+
+
+def _day_after(d: str) -> str:
+    return (date.fromisoformat(d) + timedelta(days=1)).isoformat()
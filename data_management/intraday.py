@@ -0,0 +1,177 @@
+"""
+data_management/intraday.py - נרות תוך-יומיים (1m / 5m / 15m)
+חלוקת בקשה לחלונות שנכנסים במגבלות הספק (אורך חלון ועומק היסטוריה), המרת DataFrame
+לשורות עם זמן epoch שלם, וסנכרון מצטבר לטבלת intraday_bars של StockDB.
+"""
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from core.logger import get_logger
+
+TimeLike = Union[str, datetime, int, float]
+Window = Tuple[datetime, datetime]
+
+
+@dataclass(frozen=True)
+class IntradayInterval:
+    """מרווח נרות ומגבלות הספק עבורו"""
+    name: str  # כפי שנשלח לספק ("1m")
+    minutes: int  # נשמר בעמודת interval של intraday_bars
+    max_window_days: int  # אורך מקסימלי של בקשה אחת
+    max_lookback_days: Optional[int] = None  # כמה אחורה הספק מחזיר נתונים (None - ללא הגבלה)
+
+    @property
+    def seconds(self) -> int:
+        return self.minutes * 60
+
+
+# המגבלות של Yahoo: 1m - עד 8 ימים לבקשה ו-30 יום אחורה, 5m/15m - 60 יום אחורה
+INTRADAY_INTERVALS: Dict[str, IntradayInterval] = {
+    "1m": IntradayInterval("1m", 1, max_window_days=7, max_lookback_days=29),
+    "5m": IntradayInterval("5m", 5, max_window_days=59, max_lookback_days=59),
+    "15m": IntradayInterval("15m", 15, max_window_days=59, max_lookback_days=59),
+}
+
+
+def get_interval(interval: Union[str, IntradayInterval]) -> IntradayInterval:
+    """המרווח לפי שם ("1m") - ValueError אם אינו נתמך"""
+    if isinstance(interval, IntradayInterval):
+        return interval
+    spec = INTRADAY_INTERVALS.get(interval)
+    if spec is None:
+        raise ValueError(f"Unsupported intraday interval: {interval} (supported: {', '.join(INTRADAY_INTERVALS)})")
+    return spec
+
+
+def to_utc(value: TimeLike) -> datetime:
+    """datetime ב-UTC מתאריך/זמן ISO, datetime או epoch בשניות (זמן ללא אזור נחשב UTC)"""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, tz=timezone.utc)
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def to_epoch(value: TimeLike) -> int:
+    """זמן epoch בשניות"""
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(to_utc(value).timestamp())
+
+
+def split_windows(interval: Union[str, IntradayInterval], start: TimeLike, end: TimeLike,
+                  now: Optional[datetime] = None) -> List[Window]:
+    """
+    חלוקת [start, end) לחלונות באורך max_window_days לכל היותר.
+    תחילת הטווח נחתכת לעומק ההיסטוריה של הספק (רשימה ריקה אם כל הטווח ישן מדי)
+    """
+    spec = get_interval(interval)
+    start, end = to_utc(start), to_utc(end)
+    now = to_utc(now) if now is not None else datetime.now(timezone.utc)
+    end = min(end, now)
+    if spec.max_lookback_days is not None:
+        start = max(start, now - timedelta(days=spec.max_lookback_days))
+
+    windows: List[Window] = []
+    step = timedelta(days=spec.max_window_days)
+    while start < end:
+        windows.append((start, min(start + step, end)))
+        start += step
+    return windows
+
+
+def frame_to_bars(frame) -> List[Tuple[int, Any, Any, Any, Any, Any]]:
+    """
+    DataFrame נרות (index של זמנים) -> שורות (ts, open, high, low, close, volume) עבור
+    StockDB.insert_intraday. זמן ללא אזור נחשב UTC
+    """
+    import numpy as np
+
+    if frame is None or frame.empty:
+        return []
+    index = frame.index
+    index = index.tz_localize("UTC") if index.tz is None else index.tz_convert("UTC")
+    ts = index.as_unit("s").asi8.tolist()
+
+    def column(name):
+        if name not in frame.columns:
+            return [None] * len(frame)
+        values = frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+        return [None if v != v else v for v in values.tolist()]
+
+    volume = [None if v is None else int(v) for v in column("Volume")]
+    return list(zip(ts, column("Open"), column("High"), column("Low"), column("Close"), volume))
+
+
+@dataclass
+class IntradaySyncResult:
+    """תוצאת סנכרון תוך-יומי"""
+    bars: Dict[str, int] = field(default_factory=dict)  # symbol -> נרות שנשמרו
+    failed: Dict[str, str] = field(default_factory=dict)  # symbol -> סיבת הכישלון
+    skipped: List[str] = field(default_factory=list)  # סימבולים ללא טווח להורדה (מעודכנים / מחוץ לעומק)
+
+    @property
+    def total_bars(self) -> int:
+        return sum(self.bars.values())
+
+
+class IntradaySync:
+    """הורדת נרות תוך-יומיים מהנר האחרון שבמסד ואילך ושמירתם ב-intraday_bars"""
+
+    def __init__(self, db, provider: Any, interval: Union[str, IntradayInterval] = "1m"):
+        self.logger = get_logger("IntradaySync")
+        self.db = db
+        self.provider = provider
+        self.interval = get_interval(interval)
+
+    def plan(self, symbols: List[str], start: TimeLike, end: TimeLike) -> Dict[str, List[Tuple[int, int]]]:
+        """
+        symbol -> טווחי epoch [start, end) להורדה: מה שאחרי הנר האחרון שכבר שמור, ומה שלפני
+        הנר הראשון אם חסר יותר מיום (תחילת הטווח נחתכת קודם לעומק ההיסטוריה של הספק)
+        """
+        start_ts, end_ts = to_epoch(start), to_epoch(end)
+        if self.interval.max_lookback_days is not None:
+            start_ts = max(start_ts, to_epoch(datetime.now(timezone.utc) - timedelta(days=self.interval.max_lookback_days)))
+        plan = {}
+        for symbol in dict.fromkeys(symbols):
+            bounds = self.db.get_intraday_bounds(symbol, self.interval.minutes)
+            if bounds is None:
+                spans = [(start_ts, end_ts)]
+            else:
+                spans = []
+                if bounds[0] - start_ts > 86400:
+                    spans.append((start_ts, min(bounds[0], end_ts)))
+                spans.append((max(start_ts, bounds[1] + self.interval.seconds), end_ts))
+            spans = [(first, last) for first, last in spans if first < last]
+            if spans:
+                plan[symbol] = spans
+        return plan
+
+    def sync(self, symbols: List[str], start: TimeLike, end: TimeLike,
+             on_progress: Optional[Callable[[IntradaySyncResult], None]] = None) -> IntradaySyncResult:
+        """
+        סנכרון הסימבולים לטווח [start, end)
+
+        Args:
+            on_progress: נקרא אחרי כל חלון שנשמר, עם התוצאה המצטברת
+        """
+        result = IntradaySyncResult()
+        plan = self.plan(symbols, start, end)
+        result.skipped = [s for s in dict.fromkeys(symbols) if s not in plan]
+        self.logger.info(f"Intraday {self.interval.name} sync: {len(plan)} symbols to fetch, {len(result.skipped)} up to date")
+
+        for symbol, frame, error in self.provider.iter_intraday_data(plan, self.interval.name):
+            if error is not None:
+                if symbol not in result.bars:
+                    result.failed[symbol] = error
+                continue
+            count = self.db.insert_intraday(symbol, self.interval.minutes, frame_to_bars(frame))
+            result.bars[symbol] = result.bars.get(symbol, 0) + count
+            result.failed.pop(symbol, None)
+            if on_progress is not None:
+                on_progress(result)
+        return result
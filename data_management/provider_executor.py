@@ -0,0 +1,343 @@
+"""
+data_management/provider_executor.py - executor משותף לקריאות חוסמות לספקים
+מספר threads חסום לכל התהליך, ומגבלת מקביליות לכל ספק (קריאות עודפות ממתינות בתור של הספק).
+תור מלא מפעיל backpressure: submit ממתין עד queue_timeout ואז נזרקת ExecutorBusy.
+אי אפשר להרוג thread ב-Python, ולכן ביטול עובד כך: קריאה שעוד בתור מוסרת ממנו,
+וקריאה שכבר רצה מקבלת סימן ביטול (check_cancelled) וממשיכה להחזיק את המקום של הספק
+עד שהיא מסתיימת - ה-deadline של הבקשה מועבר אליה, כך שה-timeout של ה-HTTP תוחם אותה.
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from core.logger import get_logger
+
+
+class ExecutorBusy(Exception):
+    """התור של הספק מלא (backpressure)"""
+
+
+class CallCancelled(Exception):
+    """הקריאה בוטלה על ידי הקורא (timeout או hedge שהפסיד)"""
+
+
+class CallTimeout(TimeoutError):
+    """הקריאה לא הסתיימה בזמן"""
+
+
+# סימן הביטול של הקריאה הנוכחית, והאם הקוד רץ בתוך worker של ה-executor
+_cancel_event: contextvars.ContextVar[Optional[threading.Event]] = contextvars.ContextVar(
+    "provider_call_cancel", default=None)
+_in_worker: contextvars.ContextVar[bool] = contextvars.ContextVar("provider_executor_worker", default=False)
+
+
+def is_cancelled() -> bool:
+    """האם הקריאה הנוכחית בוטלה"""
+    event = _cancel_event.get()
+    return event is not None and event.is_set()
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """סימן הביטול של הקריאה הנוכחית (None מחוץ ל-executor) - להמתנה שמתעוררת בביטול"""
+    return _cancel_event.get()
+
+
+def is_worker_thread() -> bool:
+    """האם הקוד רץ בתוך worker של ה-executor"""
+    return _in_worker.get()
+
+
+def check_cancelled():
+    """זריקת CallCancelled אם הקריאה הנוכחית בוטלה - לשימוש בין שלבים של עבודה ארוכה"""
+    if is_cancelled():
+        raise CallCancelled("Provider call cancelled")
+
+
+@dataclass
+class _Task:
+    """קריאה אחת בתור"""
+    key: str
+    fn: Callable[..., Any]
+    args: tuple
+    kwargs: dict
+    future: "ProviderFuture"
+    context: contextvars.Context
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+    submitted: float = field(default_factory=time.monotonic)
+    abandoned: bool = False  # בוטלה אחרי שכבר יצאה מהתור
+
+
+class ProviderFuture(Future):
+    """Future שביטול שלו מסיר את הקריאה מהתור, או מסמן לקריאה שרצה שהיא בוטלה"""
+
+    def __init__(self, executor: "ProviderExecutor"):
+        super().__init__()
+        self._executor = executor
+        self._task: Optional[_Task] = None
+
+    def cancel(self) -> bool:
+        if self._task is not None:
+            self._executor._abandon(self._task)
+        return super().cancel()
+
+
+class _KeyState:
+    """תור ומונים של ספק אחד"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.queue: Deque[_Task] = deque()
+        self.active = 0
+        self.abandoned = 0  # קריאות שרצות אחרי שהקורא ויתר עליהן
+        self.max_queued = 0
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timed_out = 0
+        self.rejected = 0
+        self.waits: Deque[float] = deque(maxlen=200)  # זמן המתנה בתור (שניות)
+
+
+class ProviderExecutor:
+    """pool של threads עם מגבלת מקביליות ותור חסום לכל ספק"""
+
+    def __init__(self, max_workers: int = 32, default_limit: int = 4, max_queue: int = 64,
+                 idle_timeout: float = 30.0):
+        self.logger = get_logger("ProviderExecutor")
+        self.max_workers = max_workers
+        self.default_limit = default_limit
+        self.max_queue = max_queue
+        self.idle_timeout = idle_timeout
+
+        self._cond = threading.Condition()
+        self._keys: "OrderedDict[str, _KeyState]" = OrderedDict()
+        self._workers = 0
+        self._idle = 0
+        self._shutdown = False
+
+    def set_limit(self, key: str, limit: int):
+        """מגבלת הקריאות המקבילות לספק"""
+        with self._cond:
+            self._state(key).limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def ensure_limit(self, key: str, limit: int):
+        """הגדרת המגבלה אם הספק עדיין לא מוכר או שהמגבלה השתנתה"""
+        state = self._keys.get(key)
+        if state is None or state.limit != limit:
+            self.set_limit(key, limit)
+
+    def _state(self, key: str) -> _KeyState:
+        """המצב של ספק - בתוך המנעול"""
+        state = self._keys.get(key)
+        if state is None:
+            state = _KeyState(self.default_limit)
+            self._keys[key] = state
+        return state
+
+    def submit(self, key: str, fn: Callable[..., Any], *args, queue_timeout: float = 0.0, **kwargs) -> ProviderFuture:
+        """
+        הכנסת קריאה לתור של הספק
+
+        Args:
+            queue_timeout: כמה שניות להמתין למקום בתור כשהוא מלא לפני ExecutorBusy
+        """
+        future = ProviderFuture(self)
+        task = _Task(key=key, fn=fn, args=args, kwargs=kwargs, future=future, context=contextvars.copy_context())
+        future._task = task
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("ProviderExecutor is shut down")
+            state = self._state(key)
+            wait_until = time.monotonic() + queue_timeout
+            while len(state.queue) >= self.max_queue:
+                remaining = wait_until - time.monotonic()
+                if remaining <= 0:
+                    state.rejected += 1
+                    raise ExecutorBusy(f"Queue for {key} is full ({self.max_queue} pending calls)")
+                self._cond.wait(remaining)
+            state.queue.append(task)
+            state.submitted += 1
+            state.max_queued = max(state.max_queued, len(state.queue))
+            if self._idle == 0 and self._workers < self.max_workers:
+                self._workers += 1
+                threading.Thread(target=self._worker, name=f"ProviderExecutor-{self._workers}", daemon=True).start()
+            self._cond.notify()
+        return future
+
+    def run(self, key: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        הרצת קריאה והמתנה לתוצאה. אחרי timeout הקריאה מבוטלת ונזרקת CallTimeout.
+        קריאה מתוך worker (קריאה מקוננת) רצה במקום, כדי שלא תמתין למקום שהיא עצמה תופסת.
+        """
+        if _in_worker.get():
+            return fn(*args, **kwargs)
+        future = self.submit(key, fn, *args, **kwargs)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._note_timeout(key)
+            future.cancel()
+            raise CallTimeout(f"{key}: call did not finish within {timeout:.1f}s")
+
+    async def run_async(self, key: str, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """כמו run, בלי לחסום את ה-event loop. ביטול ה-coroutine מבטל גם את הקריאה"""
+        future = self.submit(key, fn, *args, **kwargs)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            # wait_for כבר ביטל את ה-future (ודרכו את הקריאה)
+            self._note_timeout(key)
+            future.cancel()
+            raise CallTimeout(f"{key}: call did not finish within {timeout:.1f}s")
+
+    def _note_timeout(self, key: str):
+        with self._cond:
+            self._state(key).timed_out += 1
+
+    def _abandon(self, task: Optional[_Task]):
+        """הקורא ויתר על הקריאה: הסרה מהתור אם עוד לא התחילה, אחרת סימון ביטול"""
+        if task is None or task.cancel_event.is_set():
+            return
+        with self._cond:
+            if task.cancel_event.is_set() or task.future.done():
+                return
+            task.cancel_event.set()
+            state = self._state(task.key)
+            try:
+                state.queue.remove(task)
+                state.cancelled += 1
+            except ValueError:
+                # כבר רצה - ממשיכה להחזיק את המקום עד שתסתיים
+                task.abandoned = True
+                state.abandoned += 1
+            self._cond.notify_all()
+
+    def _next_task(self) -> Optional[_Task]:
+        """הקריאה הבאה מספק שיש לו מקום פנוי (round robin בין ספקים) - בתוך המנעול"""
+        for key, state in self._keys.items():
+            if state.queue and state.active < state.limit:
+                task = state.queue.popleft()
+                state.active += 1
+                state.waits.append(time.monotonic() - task.submitted)
+                self._keys.move_to_end(key)
+                self._cond.notify_all()  # מקום התפנה בתור
+                return task
+        return None
+
+    def _worker(self):
+        """לולאת worker - יוצא אחרי idle_timeout ללא עבודה"""
+        while True:
+            with self._cond:
+                task = self._next_task()
+                idle_since = time.monotonic()
+                while task is None:
+                    if self._shutdown or time.monotonic() - idle_since >= self.idle_timeout:
+                        self._workers -= 1
+                        return
+                    self._idle += 1
+                    self._cond.wait(self.idle_timeout)
+                    self._idle -= 1
+                    task = self._next_task()
+
+            if not task.future.set_running_or_notify_cancel():
+                self._finish(task, cancelled=True)
+                continue
+            try:
+                result = task.context.run(self._invoke, task)
+            except BaseException as e:
+                task.future.set_exception(e)
+                self._finish(task, failed=True, cancelled=isinstance(e, CallCancelled))
+            else:
+                task.future.set_result(result)
+                self._finish(task)
+
+    @staticmethod
+    def _invoke(task: _Task) -> Any:
+        """הרצת הקריאה בתוך ה-context של מי ששלח אותה (deadline וכו')"""
+        _in_worker.set(True)
+        _cancel_event.set(task.cancel_event)
+        check_cancelled()
+        return task.fn(*task.args, **task.kwargs)
+
+    def _finish(self, task: _Task, failed: bool = False, cancelled: bool = False):
+        """שחרור המקום של הספק ועדכון מונים"""
+        with self._cond:
+            state = self._state(task.key)
+            state.active -= 1
+            if task.abandoned:
+                state.abandoned -= 1
+            if cancelled:
+                state.cancelled += 1
+            elif failed:
+                state.failed += 1
+            else:
+                state.completed += 1
+            self._cond.notify_all()
+
+    def get_stats(self, key: Optional[str] = None) -> Dict[str, Any]:
+        """מדדי תור ומקביליות לכל ספק (או לספק אחד)"""
+        with self._cond:
+            keys = [key] if key is not None else list(self._keys)
+            providers = {}
+            for name in keys:
+                state = self._keys.get(name)
+                if state is None:
+                    continue
+                waits = sorted(state.waits)
+                providers[name] = {
+                    "limit": state.limit,
+                    "active": state.active,
+                    "queued": len(state.queue),
+                    "max_queued": state.max_queued,
+                    "abandoned_running": state.abandoned,
+                    "submitted": state.submitted,
+                    "completed": state.completed,
+                    "failed": state.failed,
+                    "cancelled": state.cancelled,
+                    "timed_out": state.timed_out,
+                    "rejected": state.rejected,
+                    "avg_wait_ms": round(sum(waits) / len(waits) * 1000, 2) if waits else 0.0,
+                    "p95_wait_ms": round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 2) if waits else 0.0,
+                    "max_wait_ms": round(waits[-1] * 1000, 2) if waits else 0.0,
+                }
+            if key is not None:
+                return providers.get(key, {})
+            return {"workers": self._workers, "idle_workers": self._idle, "max_workers": self.max_workers,
+                    "providers": providers}
+
+    def shutdown(self):
+        """ביטול כל מה שבתור ועצירת ה-workers (קריאות שרצות מסתיימות בעצמן)"""
+        with self._cond:
+            self._shutdown = True
+            pending: List[_Task] = [task for state in self._keys.values() for task in state.queue]
+        for task in pending:
+            task.future.cancel()
+        with self._cond:
+            self._cond.notify_all()
+
+
+_executor: Optional[ProviderExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_provider_executor() -> ProviderExecutor:
+    """ה-executor המשותף של התהליך (נוצר בשימוש הראשון לפי config.data)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                from core.config import config
+                _executor = ProviderExecutor(
+                    max_workers=config.data.provider_max_workers,
+                    default_limit=config.data.provider_max_concurrency,
+                    max_queue=config.data.provider_queue_size
+                )
+    return _executor
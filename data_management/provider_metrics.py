@@ -0,0 +1,114 @@
+"""
+data_management/provider_metrics.py - מדדי ביצועים לכל ספק וסוג נתונים
+זמני תגובה אחרונים (לחישוב אחוזונים), EWMA של latency ושל שיעור הצלחה,
+הצלחות/כישלונות ובקשות hedge
+"""
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Tuple
+
+
+@dataclass
+class _ProviderTypeMetrics:
+    """מדדים לזוג (ספק, סוג נתונים)"""
+    latencies: Deque[float] = field(default_factory=lambda: deque(maxlen=100))
+    successes: int = 0
+    failures: int = 0
+    hedge_requests: int = 0
+    hedge_wins: int = 0
+    ewma_latency: Optional[float] = None  # שניות
+    ewma_success: Optional[float] = None  # 0..1
+
+
+class ProviderMetrics:
+    """איסוף מדדי latency והצלחה - בטוח לשימוש מכמה threads"""
+
+    def __init__(self, window_size: int = 100, ewma_alpha: float = 0.2):
+        self.window_size = window_size
+        self.ewma_alpha = ewma_alpha
+        self._lock = threading.Lock()
+        self._metrics: Dict[Tuple[str, str], _ProviderTypeMetrics] = {}
+
+    def _get(self, provider: str, data_type: str) -> _ProviderTypeMetrics:
+        """קבלת (או יצירת) רשומת מדדים - בתוך המנעול"""
+        key = (provider, data_type)
+        metrics = self._metrics.get(key)
+        if metrics is None:
+            metrics = _ProviderTypeMetrics(latencies=deque(maxlen=self.window_size))
+            self._metrics[key] = metrics
+        return metrics
+
+    def record(self, provider: str, data_type: str, latency: float, success: bool):
+        """רישום תוצאת בקשה"""
+        with self._lock:
+            metrics = self._get(provider, data_type)
+            metrics.latencies.append(latency)
+            if success:
+                metrics.successes += 1
+            else:
+                metrics.failures += 1
+            
+            alpha = self.ewma_alpha
+            outcome = 1.0 if success else 0.0
+            if metrics.ewma_latency is None:
+                metrics.ewma_latency = latency
+                metrics.ewma_success = outcome
+            else:
+                metrics.ewma_latency = alpha * latency + (1 - alpha) * metrics.ewma_latency
+                metrics.ewma_success = alpha * outcome + (1 - alpha) * metrics.ewma_success
+
+    def get_ewma(self, provider: str, data_type: str) -> Tuple[Optional[float], Optional[float]]:
+        """(EWMA latency בשניות, EWMA שיעור הצלחה) - None אם אין עדיין דגימות"""
+        with self._lock:
+            metrics = self._metrics.get((provider, data_type))
+            if metrics is None:
+                return None, None
+            return metrics.ewma_latency, metrics.ewma_success
+
+    def record_hedge(self, provider: str, data_type: str):
+        """רישום בקשת hedge שנשלחה לספק"""
+        with self._lock:
+            self._get(provider, data_type).hedge_requests += 1
+
+    def record_hedge_win(self, provider: str, data_type: str):
+        """רישום בקשת hedge שניצחה את הספק הראשי"""
+        with self._lock:
+            self._get(provider, data_type).hedge_wins += 1
+
+    def latency_percentile(self, provider: str, data_type: str, percentile: float,
+                           min_samples: int = 5) -> Optional[float]:
+        """אחוזון זמן התגובה בשניות (None אם אין מספיק דגימות)"""
+        with self._lock:
+            metrics = self._metrics.get((provider, data_type))
+            if metrics is None or len(metrics.latencies) < min_samples:
+                return None
+            samples = sorted(metrics.latencies)
+        index = min(len(samples) - 1, max(0, int(round(percentile / 100.0 * (len(samples) - 1)))))
+        return samples[index]
+
+    def get_provider_metrics(self, provider: str) -> Dict[str, Dict[str, Any]]:
+        """מדדים לספק לפי סוג נתונים"""
+        with self._lock:
+            items = [(data_type, m) for (name, data_type), m in self._metrics.items() if name == provider]
+            result = {}
+            for data_type, m in items:
+                total = m.successes + m.failures
+                result[data_type] = {
+                    "requests": total,
+                    "success_rate": (m.successes / total) if total else None,
+                    "ewma_latency_ms": round(m.ewma_latency * 1000, 1) if m.ewma_latency is not None else None,
+                    "ewma_success_rate": round(m.ewma_success, 3) if m.ewma_success is not None else None,
+                    "hedge_requests": m.hedge_requests,
+                    "hedge_wins": m.hedge_wins
+                }
+        for data_type in result:
+            p90 = self.latency_percentile(provider, data_type, 90, min_samples=1)
+            result[data_type]["p90_latency_ms"] = round(p90 * 1000, 1) if p90 is not None else None
+        return result
+
+    def total_hedge_requests(self, provider: str) -> int:
+        """סה"כ בקשות hedge שנשלחו לספק"""
+        with self._lock:
+            return sum(m.hedge_requests for (name, _), m in self._metrics.items() if name == provider)
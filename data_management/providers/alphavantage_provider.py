@@ -2,6 +2,8 @@ from .base_provider import BaseProvider
 
 class AlphavantageProvider(BaseProvider):
 
+	base_url = "https://www.alphavantage.co"
+
 	def __init__(self, config=None):
 		api_key = None
 		if config is not None:
@@ -22,54 +24,52 @@ class AlphavantageProvider(BaseProvider):
 		self.logger.info(f"Alphavantage get_quote called for {symbol}")
 		return None
 
-
-	def get_vix(self):
-		"""קבלת נתוני VIX או סימבול רנדומלי מ-Alphavantage"""
-		import requests
+	def _vix_request(self):
+		"""כתובת, פרמטרים וסימבול הבדיקה לבקשת quote"""
 		import random
-		self.logger.info("Alphavantage get_vix called")
-		cache_key = "vix_alphavantage"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
-		if not self.api_key:
-			self.logger.error("Alphavantage API key missing")
-			return None
-
 		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
 		test_symbol = random.choice(test_symbols)
-		url = "https://www.alphavantage.co/query"
+		url = f"{self.base_url}/query"
 		params = {
 			"function": "GLOBAL_QUOTE",
 			"symbol": test_symbol,
 			"apikey": self.api_key
 		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			quote_data = data.get("Global Quote", {})
-			price = quote_data.get("05. price")
-			if price is None:
-				self.logger.error("No quote data from Alphavantage")
-				return None
-			from datetime import datetime
-			from .base_provider import QuoteData
-			quote = QuoteData(
-				symbol=test_symbol,
-				price=float(price),
-				timestamp=datetime.now(),
-				volume=None,
-				change=None,
-				change_percent=None
-			)
-			self._set_cache(cache_key, quote)
-			self._update_status(success=True)
-			self.logger.info(f"Alphavantage {test_symbol}: {price}")
-			return quote
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"Alphavantage quote fetch failed: {e}")
+		return url, params, test_symbol
+
+	def _parse_vix(self, data, test_symbol):
+		"""המרת תשובת GLOBAL_QUOTE ל-QuoteData"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		quote_data = data.get("Global Quote", {})
+		price = quote_data.get("05. price")
+		if price is None:
+			self.logger.error("No quote data from Alphavantage")
+			return None
+		quote = QuoteData(
+			symbol=test_symbol,
+			price=float(price),
+			timestamp=datetime.now(),
+			volume=None,
+			change=None,
+			change_percent=None
+		)
+		self.logger.info(f"Alphavantage {test_symbol}: {price}")
+		return quote
+
+	def get_vix(self):
+		"""קבלת נתוני VIX או סימבול רנדומלי מ-Alphavantage"""
+		self.logger.info("Alphavantage get_vix called")
+		if not self.api_key:
+			self.logger.error("Alphavantage API key missing")
+			return None
+		url, params, test_symbol = self._vix_request()
+		return self._fetch_json("vix_alphavantage", url, params, lambda data: self._parse_vix(data, test_symbol))
+
+	async def get_vix_async(self):
+		"""קבלת נתוני VIX או סימבול רנדומלי מ-Alphavantage (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("Alphavantage API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return await self._fetch_json_async("vix_alphavantage", url, params, lambda data: self._parse_vix(data, test_symbol))
@@ -4,22 +4,39 @@ data_management/providers/base_provider.py - מחלקת בסיס לכל ספקי
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Awaitable, Callable
 from datetime import datetime, timedelta
+import asyncio
+import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import wait
+from dataclasses import MISSING, dataclass, field, fields
 from core.logger import get_logger
+from ..single_flight import SingleFlight, AsyncSingleFlight, WaitTimeout
+from ..provider_executor import (CallCancelled, check_cancelled, current_cancel_event, get_provider_executor,
+                                 is_cancelled, is_worker_thread)
+from ..retry_policy import DeadlineExceeded, current_deadline, http_status, is_retryable, should_propagate_errors
 
 
-@dataclass
+class ProviderUnavailable(Exception):
+    """הספק ב-backoff (429) או שהבקשה נכשלה לאחרונה - בשונה מתשובה ריקה ("אין נתונים")"""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(slots=True)
 class QuoteData:
-    """נתוני ציטוט בסיסיים"""
+    """נתוני ציטוט בסיסיים (slots - ללא __dict__ לכל מופע)"""
     symbol: str
     price: float
     timestamp: datetime
     volume: Optional[int] = None
     change: Optional[float] = None
     change_percent: Optional[float] = None
+    is_stale: bool = False  # הוגש מ-cache אחרי שפג תוקפו
+    age_seconds: Optional[float] = None  # גיל הנתון כשהוגש כ-stale
     
     def to_dict(self) -> Dict[str, Any]:
         """המרה ל-dictionary"""
@@ -31,6 +48,33 @@ class QuoteData:
             'change': self.change,
             'change_percent': self.change_percent
         }
+    
+    def __getstate__(self):
+        return tuple(getattr(self, f) for f in self.__slots__)
+    
+    def __setstate__(self, state):
+        """טעינה מ-pickle - כולל רשומות ישנות (מלפני slots) שנשמרו כ-dict במטמון הדיסק"""
+        if isinstance(state, tuple) and len(state) == 2 and isinstance(state[1], dict):
+            state = state[1]  # (None, slots_state) - פורמט ברירת המחדל של pickle ל-slots
+        if isinstance(state, dict):
+            for f in fields(self):
+                default = None if f.default is MISSING else f.default
+                object.__setattr__(self, f.name, state.get(f.name, default))
+        else:
+            for name, value in zip(self.__slots__, state):
+                object.__setattr__(self, name, value)
+
+
+@dataclass
+class HistoryBatchResult:
+    """תוצאת הורדת היסטוריה למספר סימבולים (או ל-chunk אחד מתוכם)"""
+    frames: Dict[str, Any] = field(default_factory=dict)  # symbol -> DataFrame
+    failed: Dict[str, str] = field(default_factory=dict)  # symbol -> סיבת הכישלון
+    
+    def update(self, other: "HistoryBatchResult"):
+        """הוספת התוצאות של chunk נוסף"""
+        self.frames.update(other.frames)
+        self.failed.update(other.failed)
 
 
 @dataclass
@@ -56,21 +100,67 @@ class ProviderStatus:
 class BaseProvider(ABC):
     """מחלקת בסיס לכל ספקי הנתונים"""
     
+    # ציטוטים מרובים: ספק עם endpoint מרובה-סימבולים מגדיר supports_batch_quotes
+    # ומממש _fetch_quotes_batch. אחרת get_quotes מבצע fan-out מוגבל על get_quote
+    supports_batch_quotes = False
+    max_batch_size = 50
+    
+    # קריאות חוסמות רצות ב-executor המשותף (provider_executor.py) - עד כמה במקביל לספק
+    max_concurrent_calls = 4
+    
+    # כתובת בסיס ל-REST API (ניתנת להחלפה, למשל לשרת בדיקות מקומי)
+    base_url: str = ""
+    request_timeout = 10  # שניות
+    max_async_connections = 100
+    
+    # session סינכרוני (requests) עם pool של חיבורי keep-alive
+    http_pool_connections = 4  # מספר hosts שנשמרים להם pools
+    http_pool_maxsize = 16  # חיבורים פתוחים לכל host
+    http_keep_alive = True
+    
+    # negative cache: תוצאה ריקה/שגיאה נשמרת לזמן קצר כדי לא לפנות שוב לספק מיד
+    negative_cache_ttl = 60  # שניות - תוצאה ריקה או שגיאה
+    not_found_cache_ttl = 900  # שניות - HTTP 404 (סימבול שלא קיים / נמחק)
+    default_retry_after = 60  # שניות - 429 ללא Retry-After
+    
     def __init__(self, name: str, api_key: Optional[str] = None):
         self.name = name
         self.api_key = api_key
         self.logger = get_logger(f"Data.{name}")
         self.status = ProviderStatus()
+        # המפתח של הספק ב-executor המשותף (ה-DataRouter מחליף לשם ה-routing)
+        self.executor_key = name
         
-        # הגדרות rate limiting
+        # הגדרות rate limiting (token bucket משותף לכל המופעים של הספק - ראו rate_limiter.py)
+        self.requests_per_second: Optional[float] = None  # ברירת מחדל: 1 / min_request_interval
         self.requests_per_minute = 60  # ברירת מחדל
+        self.requests_per_day: Optional[float] = None
         self.min_request_interval = 1.0  # שנייה
-        self.last_request_time = 0.0
+        self._rate_limiter = None
+        
+        # session סינכרוני - נוצר בבקשה הראשונה ונסגר ב-close()
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._session_created: Optional[datetime] = None
+        self._session_requests = 0
+        
+        # session אסינכרוני (aiohttp) - אחד לכל event loop
+        self._async_session = None
+        self._async_session_loop = None
         
         # Cache פשוט
         self._cache = {}
         self.cache_ttl = 300  # 5 דקות
         
+        # negative cache: key -> (time.monotonic() של תפוגה, סיבה)
+        self._negative_cache: Dict[str, tuple] = {}
+        # 429: אין לפנות לספק כלל עד הזמן הזה (time.monotonic)
+        self._backoff_until = 0.0
+        
+        # בקשות זהות שרצות במקביל בתוך הספק חולקות קריאה אחת
+        self._single_flight = SingleFlight()
+        self._async_single_flight = AsyncSingleFlight()
+        
     def _update_status(self, success: bool, error_msg: str = None):
         """עדכון סטטוס הספק"""
         self.status.last_request = datetime.now()
@@ -84,17 +174,153 @@ class BaseProvider(ABC):
             self.status.is_available = False
             self.logger.error(f"Provider error: {error_msg}")
     
+    def get_rate_limiter(self):
+        """מגביל הקצב של הספק (נוצר בשימוש הראשון, אחרי שהספק הגדיר את המגבלות שלו)"""
+        if self._rate_limiter is None:
+            from ..rate_limiter import get_rate_limiter
+            per_second = self.requests_per_second
+            if per_second is None and self.min_request_interval:
+                per_second = 1.0 / self.min_request_interval
+            self._rate_limiter = get_rate_limiter(
+                self.name,
+                per_second=per_second,
+                per_minute=self.requests_per_minute,
+                per_day=self.requests_per_day
+            )
+        return self._rate_limiter
+    
+    def _update_quota(self):
+        """עדכון המכסה היומית בסטטוס (משמש לדירוג ספקים ב-DataRouter)"""
+        if self.requests_per_day:
+            self.status.quota_limit = int(self.requests_per_day)
+            self.status.quota_remaining = int(self._rate_limiter.remaining().get("day", 0))
+    
+    def _run_blocking(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """הרצת קריאה חוסמת ב-executor המשותף תחת מגבלת המקביליות של הספק"""
+        executor = get_provider_executor()
+        executor.ensure_limit(self.executor_key, self.max_concurrent_calls)
+        return executor.run(self.executor_key, fn, *args, timeout=timeout, **kwargs)
+    
+    async def _run_blocking_async(self, fn: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> Any:
+        """כמו _run_blocking, בלי לחסום את ה-event loop"""
+        executor = get_provider_executor()
+        executor.ensure_limit(self.executor_key, self.max_concurrent_calls)
+        return await executor.run_async(self.executor_key, fn, *args, timeout=timeout, **kwargs)
+    
     def _rate_limit_check(self):
-        """בדיקת rate limiting"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        
-        if time_since_last < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last
-            self.logger.debug(f"Rate limiting: sleeping {sleep_time:.2f}s")
-            time.sleep(sleep_time)
-        
-        self.last_request_time = time.time()
+        """בדיקת rate limiting - המתנה עד שיש token פנוי (לא יותר מה-deadline של הבקשה)"""
+        check_cancelled()
+        deadline = current_deadline()
+        if not self.get_rate_limiter().acquire(timeout=deadline.remaining() if deadline else None,
+                                               cancel=current_cancel_event()):
+            check_cancelled()
+            raise DeadlineExceeded(f"{self.name}: rate limit wait exceeds request deadline")
+        self._update_quota()
+    
+    async def _rate_limit_check_async(self):
+        """בדיקת rate limiting ללא חסימת ה-event loop"""
+        deadline = current_deadline()
+        if not await self.get_rate_limiter().acquire_async(timeout=deadline.remaining() if deadline else None):
+            raise DeadlineExceeded(f"{self.name}: rate limit wait exceeds request deadline")
+        self._update_quota()
+    
+    def _effective_timeout(self) -> float:
+        """timeout לבקשת HTTP - request_timeout, מוגבל לזמן שנותר ב-deadline של הבקשה"""
+        deadline = current_deadline()
+        if deadline is None:
+            return self.request_timeout
+        remaining = deadline.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"{self.name}: request deadline exceeded")
+        return min(self.request_timeout, remaining)
+    
+    def _is_negative_cached(self, key: Optional[str]) -> bool:
+        """האם למפתח יש תוצאה שלילית בתוקף (ואז אין לפנות לספק)"""
+        if not key:
+            return False
+        entry = self._negative_cache.get(key)
+        if entry is None:
+            return False
+        if time.monotonic() >= entry[0]:
+            self._negative_cache.pop(key, None)
+            return False
+        self.logger.debug(f"Negative cache hit for {key} ({entry[1]})")
+        return True
+    
+    def _set_negative(self, key: Optional[str], reason: str, ttl: Optional[float] = None):
+        """שמירת תוצאה שלילית למפתח"""
+        if key:
+            ttl = self.negative_cache_ttl if ttl is None else ttl
+            now = time.monotonic()
+            if len(self._negative_cache) > 10000:
+                self._negative_cache = {k: v for k, v in self._negative_cache.items() if v[0] > now}
+            self._negative_cache[key] = (now + ttl, reason)
+    
+    def _in_backoff(self) -> bool:
+        """האם הספק בהשהיה אחרי 429"""
+        return time.monotonic() < self._backoff_until
+    
+    def backoff_remaining(self) -> float:
+        """שניות עד סוף ההשהיה אחרי 429 (0 אם אין)"""
+        return max(self._backoff_until - time.monotonic(), 0.0)
+    
+    def _start_backoff(self, seconds: float):
+        """השהיית כל הבקשות לספק (בעקבות 429)"""
+        until = time.monotonic() + seconds
+        if until > self._backoff_until:
+            self._backoff_until = until
+            self.logger.warning(f"Rate limited by {self.name}: backing off for {seconds:.0f}s")
+    
+    def _parse_retry_after(self, value: Optional[str]) -> float:
+        """פענוח כותרת Retry-After (שניות או תאריך HTTP)"""
+        if value:
+            try:
+                return max(float(value), 0.0)
+            except ValueError:
+                pass
+            try:
+                from email.utils import parsedate_to_datetime
+                retry_at = parsedate_to_datetime(value)
+                return max((retry_at - datetime.now(retry_at.tzinfo)).total_seconds(), 0.0)
+            except (TypeError, ValueError):
+                pass
+        return float(self.default_retry_after)
+    
+    def _note_failure(self, key: Optional[str], error: Exception):
+        """
+        סיווג שגיאה: 404 נשמר לזמן ארוך, 429 משהה את כל הספק, השאר - negative_cache_ttl.
+        שגיאה זמנית שה-DataRouter עומד לנסות שוב לא נשמרת, כדי שהניסיון החוזר יגיע לספק.
+        """
+        status = http_status(error)
+        if status == 404:
+            self._set_negative(key, "not found", self.not_found_cache_ttl)
+        elif status == 429 or "RateLimit" in type(error).__name__:
+            if not self._in_backoff():
+                self._start_backoff(self.default_retry_after)
+            self._set_negative(key, "rate limited", self.backoff_remaining())
+        elif isinstance(error, (DeadlineExceeded, CallCancelled)) or (should_propagate_errors() and is_retryable(error)):
+            # ביטול או זמן שנגמר אינם תשובה של הספק
+            pass
+        else:
+            self._set_negative(key, f"error: {error}")
+    
+    def _raise_if_unavailable(self, key: Optional[str]):
+        """
+        בתוך DataRouter: backoff או שגיאה שמורה ב-negative cache נזרקים, כדי שלא ייראו כתשובה
+        ריקה תקינה (שנשמרת ב-cache). "empty" ו-"not found" הם תשובה - מוחזר ערך ברירת המחדל
+        """
+        if not should_propagate_errors():
+            return
+        if self._in_backoff():
+            raise ProviderUnavailable(f"{self.name}: rate limited for {self.backoff_remaining():.0f}s", status=429)
+        entry = self._negative_cache.get(key) if key else None
+        if entry is not None and entry[1] not in ("empty", "not found"):
+            raise ProviderUnavailable(f"{self.name}: {entry[1]}")
+    
+    def get_negative_cache_size(self) -> int:
+        """מספר המפתחות עם תוצאה שלילית בתוקף"""
+        now = time.monotonic()
+        return sum(1 for expires, _ in list(self._negative_cache.values()) if expires > now)
     
     def _get_from_cache(self, key: str) -> Optional[Any]:
         """קבלת נתונים מ-cache"""
@@ -119,6 +345,8 @@ class BaseProvider(ABC):
             cached_data = self._get_from_cache(cache_key)
             if cached_data is not None:
                 return cached_data
+        if self._is_negative_cached(cache_key) or self._in_backoff():
+            return None
         
         # בדיקת rate limiting
         self._rate_limit_check()
@@ -130,14 +358,214 @@ class BaseProvider(ABC):
             # עדכון cache
             if cache_key and data:
                 self._set_cache(cache_key, data)
+            elif not data:
+                self._set_negative(cache_key, "empty")
             
             self._update_status(success=True)
             return data
             
         except Exception as e:
+            self._note_failure(cache_key, e)
             self._update_status(success=False, error_msg=str(e))
             raise
     
+    def _get_session(self):
+        """requests.Session של הספק (pool חיבורים משותף לכל ה-threads)"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=self.http_pool_connections,
+                                          pool_maxsize=self.http_pool_maxsize)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "Accept-Encoding": "gzip, deflate",
+                        "Connection": "keep-alive" if self.http_keep_alive else "close"
+                    })
+                    self._session = session
+                    self._session_created = datetime.now()
+                    self._session_requests = 0
+                    self.logger.debug(f"HTTP session opened (pool {self.http_pool_maxsize}/host)")
+        return self._session
+    
+    def _http_get_json(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """בקשת GET סינכרונית שמחזירה JSON (דרך ה-session של הספק)"""
+        response = self._get_session().get(url, params=params, timeout=self._effective_timeout())
+        self._session_requests += 1
+        if response.status_code == 429:
+            self._start_backoff(self._parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        return response.json()
+    
+    def get_session_info(self) -> Dict[str, Any]:
+        """מצב ה-session: האם פתוח, מתי נפתח, ושימוש חוזר בחיבורים לכל host"""
+        session = self._session
+        hosts = {}
+        if session is not None:
+            for prefix in ("https://", "http://"):
+                pools = session.adapters[prefix].poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    hosts[f"{key.key_scheme}://{key.key_host}:{key.key_port}"] = {
+                        "connections": pool.num_connections,
+                        "requests": pool.num_requests,
+                        "reused": max(pool.num_requests - pool.num_connections, 0)
+                    }
+        return {
+            "open": session is not None,
+            "created_at": self._session_created.isoformat() if session is not None and self._session_created else None,
+            "requests": self._session_requests,
+            "hosts": hosts
+        }
+    
+    def close(self):
+        """סגירת ה-session הסינכרוני ושחרור החיבורים"""
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+                self.logger.debug(f"HTTP session closed after {self._session_requests} requests")
+    
+    async def _get_async_session(self):
+        """session של aiohttp עבור ה-event loop הנוכחי (None אם aiohttp לא מותקן)"""
+        try:
+            import aiohttp
+        except ImportError:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._async_session is None or self._async_session.closed or self._async_session_loop is not loop:
+            connector = aiohttp.TCPConnector(limit=self.max_async_connections)
+            self._async_session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+            self._async_session_loop = loop
+        return self._async_session
+    
+    async def _http_get_json_async(self, url: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """בקשת GET אסינכרונית שמחזירה JSON (fallback ל-thread אם אין aiohttp)"""
+        session = await self._get_async_session()
+        if session is None:
+            return await self._run_blocking_async(self._http_get_json, url, params)
+        import aiohttp
+        timeout = aiohttp.ClientTimeout(total=self._effective_timeout())
+        async with session.get(url, params=params, timeout=timeout) as response:
+            if response.status == 429:
+                self._start_backoff(self._parse_retry_after(response.headers.get("Retry-After")))
+            response.raise_for_status()
+            return await response.json(content_type=None)
+    
+    async def close_async(self):
+        """סגירת ה-session האסינכרוני"""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
+        self._async_session_loop = None
+    
+    def _fetch_json(self, cache_key: Optional[str], url: str, params: Dict[str, Any],
+                    parse: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        template לבקשת REST: cache -> negative cache/backoff -> rate limit -> GET -> parse -> cache
+        
+        בקשות מקבילות עם אותו cache_key חולקות קריאה אחת לספק.
+        
+        Args:
+            parse: פונקציה שממירה את ה-JSON לתוצאה (None/ריק = אין נתונים)
+            default: ערך מוחזר במקרה של שגיאה או היעדר נתונים
+        """
+        if cache_key:
+            cached_data = self._get_from_cache(cache_key)
+            if cached_data:
+                return cached_data
+        if self._is_negative_cached(cache_key) or self._in_backoff():
+            self._raise_if_unavailable(cache_key)
+            return default
+        
+        def fetch():
+            try:
+                self._rate_limit_check()
+                result = parse(self._http_get_json(url, params))
+            except Exception as e:
+                self._note_failure(cache_key, e)
+                self._update_status(success=False, error_msg=str(e))
+                raise
+            return self._store_result(cache_key, result, default)
+        
+        # הקריאה המשותפת תמיד זורקת; כל קורא מחליט לפי ה-scope שלו (ולא של מי שהוביל את הקריאה)
+        try:
+            return self._shared_fetch(cache_key, fetch) if cache_key else fetch()
+        except Exception:
+            if should_propagate_errors():
+                raise
+            return default
+    
+    async def _fetch_json_async(self, cache_key: Optional[str], url: str, params: Dict[str, Any],
+                                parse: Callable[[Any], Any], default: Any = None) -> Any:
+        """גרסה אסינכרונית של _fetch_json"""
+        if cache_key:
+            cached_data = self._get_from_cache(cache_key)
+            if cached_data:
+                return cached_data
+        if self._is_negative_cached(cache_key) or self._in_backoff():
+            self._raise_if_unavailable(cache_key)
+            return default
+        
+        async def fetch():
+            try:
+                await self._rate_limit_check_async()
+                result = parse(await self._http_get_json_async(url, params))
+            except Exception as e:
+                self._note_failure(cache_key, e)
+                self._update_status(success=False, error_msg=str(e))
+                raise
+            return self._store_result(cache_key, result, default)
+        
+        try:
+            return await self._shared_fetch_async(cache_key, fetch) if cache_key else await fetch()
+        except Exception:
+            if should_propagate_errors():
+                raise
+            return default
+    
+    def _shared_fetch(self, cache_key: str, fetch: Callable[[], Any]) -> Any:
+        """
+        fetch דרך single-flight: ממתין לא מחכה יותר מה-deadline שלו, וקריאה משותפת
+        שבוטלה (hedge שהפסיד) מבוצעת מחדש עבור ממתין שלא בוטל
+        """
+        deadline = current_deadline()
+        try:
+            return self._single_flight.do(cache_key, fetch, timeout=deadline.remaining() if deadline else None)
+        except WaitTimeout as e:
+            raise DeadlineExceeded(f"{self.name}: {e}") from e
+        except CallCancelled:
+            if is_cancelled():
+                raise
+            return fetch()
+    
+    async def _shared_fetch_async(self, cache_key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """כמו _shared_fetch, דרך AsyncSingleFlight (ביטול של ממתין לא מבטל את ה-task המשותף)"""
+        deadline = current_deadline()
+        try:
+            return await self._async_single_flight.do(cache_key, fetch,
+                                                      timeout=deadline.remaining() if deadline else None)
+        except WaitTimeout as e:
+            raise DeadlineExceeded(f"{self.name}: {e}") from e
+    
+    def _store_result(self, cache_key: Optional[str], result: Any, default: Any) -> Any:
+        """שמירת תוצאה מוצלחת ב-cache ועדכון סטטוס (תוצאה ריקה נשמרת ב-negative cache)"""
+        if not result:
+            self._set_negative(cache_key, "empty")
+            return default
+        if cache_key:
+            self._set_cache(cache_key, result)
+        self._update_status(success=True)
+        return result
+    
     @abstractmethod
     def _fetch_data(self) -> Any:
         """קריאת נתונים בפועל - מומשת בכל ספק"""
@@ -153,6 +581,148 @@ class BaseProvider(ABC):
         """קבלת נתוני VIX"""
         pass
     
+    def get_quotes(self, symbols: List[str]) -> Dict[str, QuoteData]:
+        """
+        קבלת ציטוטים לרשימת סימבולים
+        
+        Returns:
+            dict של symbol -> QuoteData עבור הסימבולים שהצליחו בלבד
+        """
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return {}
+        
+        quotes: Dict[str, QuoteData] = {}
+        
+        if self.supports_batch_quotes:
+            for fetched in self._fetch_in_chunks(symbols, self._fetch_quotes_batch):
+                quotes.update(fetched)
+            return quotes
+        
+        # fan-out מקבילי על get_quote דרך ה-executor המשותף (מוגבל ל-max_concurrent_calls של הספק).
+        # מתוך worker של ה-executor הקריאות רצות ברצף, כדי לא להמתין למקומות שהקורא עצמו תופס
+        errors: List[Exception] = []
+        if is_worker_thread():
+            results = [self._get_quote_safe(symbol, errors) for symbol in symbols]
+        else:
+            executor = get_provider_executor()
+            executor.ensure_limit(self.executor_key, self.max_concurrent_calls)
+            deadline = current_deadline()
+            futures = []
+            try:
+                for symbol in symbols:
+                    futures.append(executor.submit(self.executor_key, self._get_quote_safe, symbol, errors,
+                                                   queue_timeout=self.request_timeout))
+                wait(futures, timeout=deadline.remaining() if deadline else None)
+            finally:
+                # ExecutorBusy באמצע או deadline שנגמר - מה שלא הסתיים מבוטל ונחשב חסר
+                for future in futures:
+                    future.cancel()
+            results = [future.result() if future.done() and not future.cancelled() and future.exception() is None
+                       else None for future in futures]
+        for symbol, quote in zip(symbols, results):
+            if quote is not None:
+                quotes[symbol] = quote
+        self._raise_if_all_failed(bool(quotes), errors)
+        return quotes
+    
+    def get_quote_batch(self, symbols: List[str]) -> "QuoteBatch":
+        """
+        ציטוטים מרובים בייצוג עמודות (QuoteBatch)
+        ספקים עם batch בונים את העמודות ישירות מהתשובה, השאר - מ-get_quotes
+        """
+        from .quote_batch import QuoteBatch
+        symbols = list(dict.fromkeys(symbols))
+        if not symbols:
+            return QuoteBatch.empty()
+        if self.supports_batch_quotes:
+            return QuoteBatch.concat(self._fetch_in_chunks(symbols, self._fetch_quote_batch))
+        return QuoteBatch.from_quotes(self.get_quotes(symbols).values())
+    
+    async def get_quote_batch_async(self, symbols: List[str]) -> "QuoteBatch":
+        """get_quote_batch אסינכרונית"""
+        if self.supports_batch_quotes:
+            return await self._run_blocking_async(self.get_quote_batch, symbols)
+        from .quote_batch import QuoteBatch
+        return QuoteBatch.from_quotes((await self.get_quotes_async(symbols)).values())
+    
+    def _fetch_in_chunks(self, symbols: List[str], fetch: Callable[[List[str]], Any]) -> List[Any]:
+        """
+        הרצת fetch על chunks בגודל max_batch_size עם rate limit, negative cache ו-backoff
+        
+        Returns:
+            רשימת התוצאות של ה-chunks שהצליחו (dict או QuoteBatch)
+        """
+        # סימבולים שלא החזירו נתונים לאחרונה לא נשלחים שוב
+        symbols = [s for s in symbols if not self._is_negative_cached(f"quote_{s}")]
+        results = []
+        errors: List[Exception] = []
+        # קריאה אחת לכל chunk
+        for i in range(0, len(symbols), self.max_batch_size):
+            if self._in_backoff():
+                break
+            chunk = symbols[i:i + self.max_batch_size]
+            try:
+                self._rate_limit_check()
+                deadline = current_deadline()
+                fetched = self._run_blocking(fetch, chunk, timeout=deadline.remaining() if deadline else None)
+                results.append(fetched)
+                for symbol in chunk:
+                    if symbol not in fetched:
+                        self._set_negative(f"quote_{symbol}", "empty")
+                self._update_status(success=True)
+            except Exception as e:
+                errors.append(e)
+                self._note_failure(None, e)
+                self._update_status(success=False, error_msg=f"Batch quote failed for {len(chunk)} symbols: {e}")
+        self._raise_if_all_failed(bool(results), errors)
+        return results
+    
+    def _raise_if_all_failed(self, succeeded: bool, errors: List[Exception]):
+        """
+        אף חלק של בקשה מרובה לא הצליח - השגיאה האחרונה נזרקת ל-DataRouter, כדי שתקלה
+        מלאה תיספר במפסק ולא תיראה כתשובה ריקה (מחוץ ל-DataRouter מוחזרת תוצאה חלקית כרגיל)
+        """
+        if not succeeded and errors and should_propagate_errors():
+            raise errors[-1]
+    
+    async def get_quote_async(self, symbol: str) -> Optional[QuoteData]:
+        """קבלת ציטוט אסינכרונית (ברירת מחדל: get_quote ב-thread)"""
+        return await self._run_blocking_async(self.get_quote, symbol)
+    
+    async def get_vix_async(self) -> Optional[QuoteData]:
+        """קבלת VIX אסינכרונית (ברירת מחדל: get_vix ב-thread)"""
+        return await self._run_blocking_async(self.get_vix)
+    
+    async def get_quotes_async(self, symbols: List[str]) -> Dict[str, QuoteData]:
+        """ציטוטים מרובים אסינכרונית"""
+        symbols = list(dict.fromkeys(symbols))
+        if self.supports_batch_quotes:
+            return await self._run_blocking_async(self.get_quotes, symbols)
+        results = await asyncio.gather(*(self.get_quote_async(s) for s in symbols), return_exceptions=True)
+        quotes = {s: q for s, q in zip(symbols, results) if isinstance(q, QuoteData)}
+        self._raise_if_all_failed(bool(quotes), [r for r in results if isinstance(r, Exception)])
+        return quotes
+    
+    def _get_quote_safe(self, symbol: str, errors: Optional[List[Exception]] = None) -> Optional[QuoteData]:
+        """get_quote שלא זורק שגיאות (לשימוש ב-fan-out) - השגיאה נוספת ל-errors"""
+        try:
+            return self.get_quote(symbol)
+        except Exception as e:
+            self.logger.warning(f"Quote failed for {symbol}: {e}")
+            if errors is not None:
+                errors.append(e)
+            return None
+    
+    def _fetch_quotes_batch(self, symbols: List[str]) -> Dict[str, QuoteData]:
+        """קריאת ציטוטים לרשימת סימבולים בקריאה אחת - לספקים שתומכים בכך"""
+        raise NotImplementedError(f"{self.name} does not support batch quotes")
+    
+    def _fetch_quote_batch(self, symbols: List[str]) -> "QuoteBatch":
+        """כמו _fetch_quotes_batch אבל מחזיר QuoteBatch - ספקים יכולים לממש ישירות בעמודות"""
+        from .quote_batch import QuoteBatch
+        return QuoteBatch.from_quotes(self._fetch_quotes_batch(symbols).values())
+    
     def test_connection(self) -> bool:
         """בדיקת חיבור לספק"""
         try:
@@ -173,12 +743,8 @@ class BaseProvider(ABC):
         self.logger.info(f"Status reset for {self.name}")
     
     def is_healthy(self) -> bool:
-        """בדיקה אם הספק תקין"""
-        return (
-            self.status.is_available and 
-            self.status.error_count < 5 and  # פחות מ-5 שגיאות
-            self.status.quota_usage_percent < 95  # פחות מ-95% מכסה
-        )
+        """בדיקה אם הספק תקין (שגיאות מטופלות במפסקים של ה-DataRouter)"""
+        return self.status.quota_usage_percent < 95  # פחות מ-95% מכסה
     
     def __str__(self) -> str:
         """יצוג טקסטואלי"""
@@ -2,43 +2,44 @@ from .base_provider import BaseProvider
 
 class FinnhubProvider(BaseProvider):
 
+	base_url = "https://finnhub.io/api/v1"
+
+	def _news_request(self):
+		"""כתובת ופרמטרים לחדשות שוק"""
+		url = f"{self.base_url}/news"
+		params = {
+			"category": "general",
+			"token": self.api_key
+		}
+		return url, params
+
+	def _parse_news(self, data):
+		"""המרת תשובת Finnhub לרשימת חדשות"""
+		news_items = []
+		for item in data:
+			news_items.append({
+				"headline": item.get("headline", ""),
+				"date": item.get("datetime", ""),
+				"summary": item.get("summary", "")
+			})
+		return news_items
+
 	def get_market_news(self):
 		"""שליפת חדשות שוק מ-Finnhub API"""
-		import requests
 		self.logger.info("Finnhub get_market_news called")
-		cache_key = "market_news_finnhub"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
 		if not self.api_key:
 			self.logger.error("Finnhub API key missing")
 			return []
+		url, params = self._news_request()
+		return self._fetch_json("market_news_finnhub", url, params, self._parse_news, default=[])
 
-		url = "https://finnhub.io/api/v1/news"
-		params = {
-			"category": "general",
-			"token": self.api_key
-		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			news_items = []
-			for item in data:
-				news_items.append({
-					"headline": item.get("headline", ""),
-					"date": item.get("datetime", ""),
-					"summary": item.get("summary", "")
-				})
-			self._set_cache(cache_key, news_items)
-			self._update_status(success=True)
-			return news_items
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"Finnhub market news fetch failed: {e}")
+	async def get_market_news_async(self):
+		"""שליפת חדשות שוק מ-Finnhub API (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("Finnhub API key missing")
 			return []
+		url, params = self._news_request()
+		return await self._fetch_json_async("market_news_finnhub", url, params, self._parse_news, default=[])
 
 	def __init__(self, config=None):
 		api_key = None
@@ -61,52 +62,50 @@ class FinnhubProvider(BaseProvider):
 		self.logger.info(f"Finnhub get_quote called for {symbol}")
 		return None
 
+	def _vix_request(self):
+		"""כתובת, פרמטרים וסימבול הבדיקה לבקשת quote"""
+		import random
+		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
+		test_symbol = random.choice(test_symbols)
+		url = f"{self.base_url}/quote"
+		params = {
+			"symbol": test_symbol,
+			"token": self.api_key
+		}
+		return url, params, test_symbol
+
+	def _parse_quote(self, data, test_symbol):
+		"""המרת תשובת /quote ל-QuoteData"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		current_price = data.get("c")
+		if current_price is None:
+			self.logger.error("No VIX data from Finnhub")
+			return None
+		quote = QuoteData(
+			symbol=test_symbol,
+			price=float(current_price),
+			timestamp=datetime.now(),
+			volume=None,
+			change=None,
+			change_percent=None
+		)
+		self.logger.info(f"Finnhub {test_symbol}: {current_price}")
+		return quote
 
 	def get_vix(self):
 		"""קבלת נתוני VIX מ-Finnhub"""
-		import requests
-		import random
 		self.logger.info("Finnhub get_vix called")
-		cache_key = "vix_finnhub"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
 		if not self.api_key:
 			self.logger.error("Finnhub API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return self._fetch_json("vix_finnhub", url, params, lambda data: self._parse_quote(data, test_symbol))
 
-		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
-		test_symbol = random.choice(test_symbols)
-		url = f"https://finnhub.io/api/v1/quote"
-		params = {
-			"symbol": test_symbol,
-			"token": self.api_key
-		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			current_price = data.get("c")
-			if current_price is None:
-				self.logger.error("No VIX data from Finnhub")
-				return None
-			from datetime import datetime
-			from .base_provider import QuoteData
-			quote = QuoteData(
-				symbol=test_symbol,
-				price=float(current_price),
-				timestamp=datetime.now(),
-				volume=None,
-				change=None,
-				change_percent=None
-			)
-			self._set_cache(cache_key, quote)
-			self._update_status(success=True)
-			self.logger.info(f"Finnhub {test_symbol}: {current_price}")
-			return quote
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"Finnhub quote fetch failed: {e}")
+	async def get_vix_async(self):
+		"""קבלת נתוני VIX מ-Finnhub (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("Finnhub API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return await self._fetch_json_async("vix_finnhub", url, params, lambda data: self._parse_quote(data, test_symbol))
@@ -2,43 +2,48 @@ from .base_provider import BaseProvider
 
 class FMPProvider(BaseProvider):
 
+	base_url = "https://financialmodelingprep.com/api/v3"
+
+	# endpoint ה-quote של FMP מקבל רשימת סימבולים מופרדת בפסיקים
+	supports_batch_quotes = True
+	max_batch_size = 50
+
+	def _earnings_request(self):
+		"""כתובת ופרמטרים ללוח דוחות"""
+		url = f"{self.base_url}/earning_calendar"
+		params = {
+			"apikey": self.api_key,
+			"limit": 10
+		}
+		return url, params
+
+	def _parse_earnings(self, data):
+		"""המרת תשובת FMP לרשימת דוחות"""
+		earnings_items = []
+		for item in data:
+			earnings_items.append({
+				"company": item.get("symbol", ""),
+				"date": item.get("date", ""),
+				"result": item.get("epsActual", "")
+			})
+		return earnings_items
+
 	def get_earnings(self):
 		"""שליפת דוחות רבעוניים מ-FMP API"""
-		import requests
 		self.logger.info("FMP get_earnings called")
-		cache_key = "earnings_fmp"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
 		if not self.api_key:
 			self.logger.error("FMP API key missing")
 			return []
+		url, params = self._earnings_request()
+		return self._fetch_json("earnings_fmp", url, params, self._parse_earnings, default=[])
 
-		url = "https://financialmodelingprep.com/api/v3/earning_calendar"
-		params = {
-			"apikey": self.api_key,
-			"limit": 10
-		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			earnings_items = []
-			for item in data:
-				earnings_items.append({
-					"company": item.get("symbol", ""),
-					"date": item.get("date", ""),
-					"result": item.get("epsActual", "")
-				})
-			self._set_cache(cache_key, earnings_items)
-			self._update_status(success=True)
-			return earnings_items
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"FMP earnings fetch failed: {e}")
+	async def get_earnings_async(self):
+		"""שליפת דוחות רבעוניים מ-FMP API (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("FMP API key missing")
 			return []
+		url, params = self._earnings_request()
+		return await self._fetch_json_async("earnings_fmp", url, params, self._parse_earnings, default=[])
 
 	def __init__(self, config=None):
 		api_key = None
@@ -58,57 +63,119 @@ class FMPProvider(BaseProvider):
 	def get_quote(self, symbol: str):
 		"""קבלת ציטוט לסימבול כלשהו"""
 		self.logger.info(f"FMP get_quote called for {symbol}")
-		return None
+		return self.get_quotes([symbol]).get(symbol)
 
+	async def get_quote_async(self, symbol: str):
+		"""קבלת ציטוט לסימבול כלשהו (אסינכרוני)"""
+		return (await self.get_quotes_async([symbol])).get(symbol)
 
-	def get_vix(self):
-		"""קבלת נתוני VIX או סימבול רנדומלי מ-FMP"""
-		import requests
-		import random
-		self.logger.info("FMP get_vix called")
-		cache_key = "vix_fmp"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
+	def _quotes_request(self, symbols):
+		"""כתובת ופרמטרים ל-/quote/A,B,C"""
+		url = f"{self.base_url}/quote/{','.join(symbols)}"
+		params = {
+			"apikey": self.api_key
+		}
+		return url, params
 
-		self._rate_limit_check()
+	def _parse_quotes(self, data):
+		"""המרת תשובת /quote ל-dict של QuoteData"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		quotes = {}
+		if not isinstance(data, list):
+			return quotes
+		for item in data:
+			symbol = item.get("symbol")
+			price = item.get("price")
+			if not symbol or price is None:
+				continue
+			timestamp = item.get("timestamp")
+			quotes[symbol] = QuoteData(
+				symbol=symbol,
+				price=float(price),
+				timestamp=datetime.fromtimestamp(timestamp) if timestamp else datetime.now(),
+				volume=item.get("volume"),
+				change=item.get("change"),
+				change_percent=item.get("changesPercentage")
+			)
+		return quotes
+
+	def _fetch_quotes_batch(self, symbols):
+		"""ציטוטים לכל ה-chunk בקריאה אחת ל-/quote/A,B,C"""
 		if not self.api_key:
 			self.logger.error("FMP API key missing")
-			return None
+			return {}
+		url, params = self._quotes_request(symbols)
+		return self._parse_quotes(self._http_get_json(url, params))
+
+	async def get_quotes_async(self, symbols):
+		"""ציטוטים מרובים - כל ה-chunks במקביל"""
+		import asyncio
+		symbols = list(dict.fromkeys(symbols))
+		if not self.api_key:
+			self.logger.error("FMP API key missing")
+			return {}
+
+		async def fetch(chunk):
+			url, params = self._quotes_request(chunk)
+			return await self._fetch_json_async(None, url, params, self._parse_quotes, default={})
 
+		chunks = [symbols[i:i + self.max_batch_size] for i in range(0, len(symbols), self.max_batch_size)]
+		quotes = {}
+		results = await asyncio.gather(*(fetch(c) for c in chunks), return_exceptions=True)
+		for result in results:
+			if isinstance(result, dict):
+				quotes.update(result)
+		self._raise_if_all_failed(any(isinstance(r, dict) for r in results), [r for r in results if isinstance(r, Exception)])
+		return quotes
+
+	def _vix_request(self):
+		"""כתובת, פרמטרים וסימבול הבדיקה לבקשת quote"""
+		import random
 		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
 		test_symbol = random.choice(test_symbols)
-		url = f"https://financialmodelingprep.com/api/v3/quote/{test_symbol}"
+		url = f"{self.base_url}/quote/{test_symbol}"
 		params = {
 			"apikey": self.api_key
 		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			if not data or not isinstance(data, list):
-				self.logger.error("No quote data from FMP")
-				return None
-			quote_data = data[0]
-			price = quote_data.get("price")
-			if price is None:
-				self.logger.error("No price in FMP data")
-				return None
-			from datetime import datetime
-			from .base_provider import QuoteData
-			quote = QuoteData(
-				symbol=test_symbol,
-				price=float(price),
-				timestamp=datetime.now(),
-				volume=None,
-				change=None,
-				change_percent=None
-			)
-			self._set_cache(cache_key, quote)
-			self._update_status(success=True)
-			self.logger.info(f"FMP {test_symbol}: {price}")
-			return quote
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"FMP quote fetch failed: {e}")
+		return url, params, test_symbol
+
+	def _parse_vix(self, data, test_symbol):
+		"""המרת תשובת /quote ל-QuoteData עבור סימבול הבדיקה"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		if not data or not isinstance(data, list):
+			self.logger.error("No quote data from FMP")
+			return None
+		quote_data = data[0]
+		price = quote_data.get("price")
+		if price is None:
+			self.logger.error("No price in FMP data")
+			return None
+		quote = QuoteData(
+			symbol=test_symbol,
+			price=float(price),
+			timestamp=datetime.now(),
+			volume=None,
+			change=None,
+			change_percent=None
+		)
+		self.logger.info(f"FMP {test_symbol}: {price}")
+		return quote
+
+	def get_vix(self):
+		"""קבלת נתוני VIX או סימבול רנדומלי מ-FMP"""
+		self.logger.info("FMP get_vix called")
+		if not self.api_key:
+			self.logger.error("FMP API key missing")
+			return None
+		url, params, test_symbol = self._vix_request()
+		return self._fetch_json("vix_fmp", url, params, lambda data: self._parse_vix(data, test_symbol))
+
+	async def get_vix_async(self):
+		"""קבלת נתוני VIX או סימבול רנדומלי מ-FMP (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("FMP API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return await self._fetch_json_async("vix_fmp", url, params, lambda data: self._parse_vix(data, test_symbol))
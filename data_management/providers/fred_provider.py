@@ -1,52 +1,108 @@
 from .base_provider import BaseProvider
+from ..retry_policy import should_propagate_errors
 
 class FREDProvider(BaseProvider):
+
+	base_url = "https://api.stlouisfed.org/fred"
+
+	# דוגמה: החלטות ריבית, CPI, אבטלה
+	economic_series = [
+		("FEDFUNDS", "Fed Rate Decision"),
+		("CPIAUCSL", "CPI Release"),
+		("UNRATE", "Unemployment Data")
+	]
+
+	def _observations_request(self, series_id, limit):
+		"""כתובת ופרמטרים לשליפת תצפיות אחרונות של סדרה"""
+		url = f"{self.base_url}/series/observations"
+		params = {
+			"series_id": series_id,
+			"api_key": self.api_key,
+			"file_type": "json",
+			"sort_order": "desc",
+			"limit": limit
+		}
+		return url, params
+
+	def _parse_event(self, data, event_name, today, end_date):
+		"""המרת תצפית FRED לאירוע כלכלי (או None אם מחוץ לטווח)"""
+		from datetime import datetime
+		obs = data.get("observations", [])
+		if obs:
+			latest = obs[-1]
+			date = latest.get("date")
+			value = latest.get("value")
+			if date and value and value != ".":
+				event_date = datetime.strptime(date, "%Y-%m-%d").date()
+				if today <= event_date <= end_date:
+					return {
+						"name": event_name,
+						"date": date,
+						"value": value
+					}
+		return None
+
 	def get_economic_events(self, days_ahead=30):
 		"""שליפת אירועים כלכליים קרובים (החלטות ריבית, CPI, אבטלה וכו') מ-FRED API"""
-		import requests
 		from datetime import datetime, timedelta
 		if not self.api_key:
 			self.logger.error("FRED API key missing")
 			return []
 		today = datetime.today().date()
 		end_date = today + timedelta(days=days_ahead)
-		# דוגמה: החלטות ריבית, CPI, אבטלה
-		series_ids = [
-			("FEDFUNDS", "Fed Rate Decision"),
-			("CPIAUCSL", "CPI Release"),
-			("UNRATE", "Unemployment Data")
-		]
 		events = []
-		for series_id, event_name in series_ids:
-			url = "https://api.stlouisfed.org/fred/series/observations"
-			params = {
-				"series_id": series_id,
-				"api_key": self.api_key,
-				"file_type": "json",
-				"sort_order": "desc",
-				"limit": 2
-			}
+		errors = []
+		for series_id, event_name in self.economic_series:
+			if self._in_backoff():
+				self._raise_if_unavailable(None)
+				break
+			url, params = self._observations_request(series_id, limit=2)
 			try:
-				response = requests.get(url, params=params, timeout=10)
-				response.raise_for_status()
-				data = response.json()
-				obs = data.get("observations", [])
-				if obs:
-					latest = obs[-1]
-					date = latest.get("date")
-					value = latest.get("value")
-					if date and value and value != ".":
-						event_date = datetime.strptime(date, "%Y-%m-%d").date()
-						if today <= event_date <= end_date:
-							events.append({
-								"name": event_name,
-								"date": date,
-								"value": value
-							})
+				event = self._fetch_json(None, url, params, lambda data: self._parse_event(data, event_name, today, end_date))
+				if event:
+					events.append(event)
 			except Exception as e:
 				self.logger.error(f"FRED event fetch failed for {series_id}: {e}")
+				errors.append(e)
+		self._raise_if_incomplete(errors)
 		return events
 
+	async def get_economic_events_async(self, days_ahead=30):
+		"""שליפת אירועים כלכליים - כל הסדרות במקביל"""
+		import asyncio
+		from datetime import datetime, timedelta
+		if not self.api_key:
+			self.logger.error("FRED API key missing")
+			return []
+		if self._in_backoff():
+			self._raise_if_unavailable(None)
+			return []
+		today = datetime.today().date()
+		end_date = today + timedelta(days=days_ahead)
+		errors = []
+
+		async def fetch(series_id, event_name):
+			url, params = self._observations_request(series_id, limit=2)
+			try:
+				return await self._fetch_json_async(
+					None, url, params, lambda data: self._parse_event(data, event_name, today, end_date))
+			except Exception as e:
+				self.logger.error(f"FRED event fetch failed for {series_id}: {e}")
+				errors.append(e)
+				return None
+
+		results = await asyncio.gather(*(fetch(s, n) for s, n in self.economic_series))
+		self._raise_if_incomplete(errors)
+		return [event for event in results if event]
+
+	def _raise_if_incomplete(self, errors):
+		"""
+		בתוך DataRouter לוח אירועים חסר לא נשמר ב-cache לשעה: סדרה שנכשלה נזרקת
+		(ה-router מגיש את הערך הקודם דרך stale-while-revalidate). מחוץ ל-router מוחזרת רשימה חלקית
+		"""
+		if errors and should_propagate_errors():
+			raise errors[-1]
+
 	def __init__(self, config=None):
 		api_key = None
 		if config is not None:
@@ -67,59 +123,45 @@ class FREDProvider(BaseProvider):
 		self.logger.info(f"FRED get_quote called for {symbol}")
 		return None
 
+	def _parse_vix(self, data):
+		"""המרת תשובת FRED (סדרת VIXCLS) ל-QuoteData"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		observations = data.get("observations", [])
+		if not observations:
+			self.logger.error("No VIX data from FRED")
+			return None
+		latest = observations[-1]
+		value = latest.get("value")
+		date = latest.get("date")
+		if value is None or value == ".":
+			self.logger.error("Invalid VIX value from FRED")
+			return None
+		quote = QuoteData(
+			symbol="^VIX",
+			price=float(value),
+			timestamp=datetime.strptime(date, "%Y-%m-%d"),
+			volume=None,
+			change=None,
+			change_percent=None
+		)
+		self.logger.info(f"FRED VIX: {value} on {date}")
+		return quote
 
 	def get_vix(self):
 		"""קבלת נתוני VIX מ-FRED"""
-		import requests
 		self.logger.info("FRED get_vix called")
-		cache_key = "vix_fred"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
 		if not self.api_key:
 			self.logger.error("FRED API key missing")
 			return None
-
 		# סדרת VIX ב-FRED: VIXCLS
-		url = f"https://api.stlouisfed.org/fred/series/observations"
-		params = {
-			"series_id": "VIXCLS",
-			"api_key": self.api_key,
-			"file_type": "json",
-			"limit": 1,
-			"sort_order": "desc"
-		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			observations = data.get("observations", [])
-			if not observations:
-				self.logger.error("No VIX data from FRED")
-				return None
-			latest = observations[-1]
-			value = latest.get("value")
-			date = latest.get("date")
-			if value is None or value == ".":
-				self.logger.error("Invalid VIX value from FRED")
-				return None
-			from datetime import datetime
-			from .base_provider import QuoteData
-			quote = QuoteData(
-				symbol="^VIX",
-				price=float(value),
-				timestamp=datetime.strptime(date, "%Y-%m-%d"),
-				volume=None,
-				change=None,
-				change_percent=None
-			)
-			self._set_cache(cache_key, quote)
-			self._update_status(success=True)
-			self.logger.info(f"FRED VIX: {value} on {date}")
-			return quote
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"FRED VIX fetch failed: {e}")
+		url, params = self._observations_request("VIXCLS", limit=1)
+		return self._fetch_json("vix_fred", url, params, self._parse_vix)
+
+	async def get_vix_async(self):
+		"""קבלת נתוני VIX מ-FRED (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("FRED API key missing")
 			return None
+		url, params = self._observations_request("VIXCLS", limit=1)
+		return await self._fetch_json_async("vix_fred", url, params, self._parse_vix)
@@ -2,6 +2,8 @@ from .base_provider import BaseProvider
 
 class PolygonProvider(BaseProvider):
 
+	base_url = "https://api.polygon.io"
+
 	def __init__(self, config=None):
 		api_key = None
 		if config is not None:
@@ -22,52 +24,50 @@ class PolygonProvider(BaseProvider):
 		self.logger.info(f"Polygon get_quote called for {symbol}")
 		return None
 
+	def _vix_request(self):
+		"""כתובת, פרמטרים וסימבול הבדיקה לבקשת quote"""
+		import random
+		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
+		test_symbol = random.choice(test_symbols)
+		url = f"{self.base_url}/v2/last/trade/{test_symbol}"
+		params = {
+			"apiKey": self.api_key
+		}
+		return url, params, test_symbol
+
+	def _parse_vix(self, data, test_symbol):
+		"""המרת תשובת last trade ל-QuoteData"""
+		from datetime import datetime
+		from .base_provider import QuoteData
+		last = data.get("results", {})
+		price = last.get("price")
+		if price is None:
+			self.logger.error("No quote data from Polygon")
+			return None
+		quote = QuoteData(
+			symbol=test_symbol,
+			price=float(price),
+			timestamp=datetime.now(),
+			volume=None,
+			change=None,
+			change_percent=None
+		)
+		self.logger.info(f"Polygon {test_symbol}: {price}")
+		return quote
 
 	def get_vix(self):
 		"""קבלת נתוני VIX או סימבול רנדומלי מ-Polygon"""
-		import requests
-		import random
 		self.logger.info("Polygon get_vix called")
-		cache_key = "vix_polygon"
-		cached_data = self._get_from_cache(cache_key)
-		if cached_data:
-			return cached_data
-
-		self._rate_limit_check()
 		if not self.api_key:
 			self.logger.error("Polygon API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return self._fetch_json("vix_polygon", url, params, lambda data: self._parse_vix(data, test_symbol))
 
-		test_symbols = ["AAPL", "MSFT", "GOOGL", "TSLA", "AMZN", "NVDA", "META", "NFLX", "INTC", "AMD"]
-		test_symbol = random.choice(test_symbols)
-		url = f"https://api.polygon.io/v2/last/trade/{test_symbol}"
-		params = {
-			"apiKey": self.api_key
-		}
-		try:
-			response = requests.get(url, params=params, timeout=10)
-			response.raise_for_status()
-			data = response.json()
-			last = data.get("results", {})
-			price = last.get("price")
-			if price is None:
-				self.logger.error("No quote data from Polygon")
-				return None
-			from datetime import datetime
-			from .base_provider import QuoteData
-			quote = QuoteData(
-				symbol=test_symbol,
-				price=float(price),
-				timestamp=datetime.now(),
-				volume=None,
-				change=None,
-				change_percent=None
-			)
-			self._set_cache(cache_key, quote)
-			self._update_status(success=True)
-			self.logger.info(f"Polygon {test_symbol}: {price}")
-			return quote
-		except Exception as e:
-			self._update_status(success=False, error_msg=str(e))
-			self.logger.error(f"Polygon quote fetch failed: {e}")
+	async def get_vix_async(self):
+		"""קבלת נתוני VIX או סימבול רנדומלי מ-Polygon (אסינכרוני)"""
+		if not self.api_key:
+			self.logger.error("Polygon API key missing")
 			return None
+		url, params, test_symbol = self._vix_request()
+		return await self._fetch_json_async("vix_polygon", url, params, lambda data: self._parse_vix(data, test_symbol))
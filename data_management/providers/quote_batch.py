@@ -0,0 +1,152 @@
+"""
+data_management/providers/quote_batch.py - ציטוטים מרובים בייצוג עמודות (NumPy)
+עבור watchlists וסורקים שמטפלים באלפי ציטוטים בכל רענון: מערך לכל שדה
+במקום אובייקט QuoteData לכל סימבול, והמרה ל-pandas בלי העתקת הנתונים
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from .base_provider import QuoteData
+
+_NAT = np.iinfo(np.int64).min  # ערך חסר בעמודת הזמן (NaT)
+
+
+class QuoteBatch:
+    """
+    ציטוטים בעמודות: symbols + price/volume/change/change_percent (float64, NaN = חסר)
+    ו-timestamp_ns (int64, epoch בננו-שניות)
+    """
+
+    __slots__ = ("symbols", "price", "volume", "change", "change_percent", "timestamp_ns", "_index")
+
+    def __init__(self, symbols: Sequence[str], price, volume=None, change=None, change_percent=None,
+                 timestamp_ns=None):
+        n = len(symbols)
+        self.symbols = np.asarray(symbols, dtype=object)
+        self.price = np.asarray(price, dtype=np.float64)
+        self.volume = self._column(volume, n)
+        self.change = self._column(change, n)
+        self.change_percent = self._column(change_percent, n)
+        if timestamp_ns is None:
+            self.timestamp_ns = np.full(n, _NAT, dtype=np.int64)
+        else:
+            self.timestamp_ns = np.asarray(timestamp_ns, dtype=np.int64)
+        self._index: Optional[Dict[str, int]] = None
+
+        for name in ("price", "volume", "change", "change_percent", "timestamp_ns"):
+            if len(getattr(self, name)) != n:
+                raise ValueError(f"QuoteBatch column '{name}' has {len(getattr(self, name))} rows, expected {n}")
+
+    @staticmethod
+    def _column(values, n: int) -> np.ndarray:
+        """עמודה אופציונלית - None הופך לעמודת NaN"""
+        if values is None:
+            return np.full(n, np.nan)
+        return np.asarray(values, dtype=np.float64)
+
+    @classmethod
+    def from_quotes(cls, quotes: Iterable[QuoteData]) -> "QuoteBatch":
+        """בנייה מרשימת QuoteData"""
+        quotes = [q for q in quotes if q is not None]
+        nan = float("nan")
+        return cls(
+            symbols=[q.symbol for q in quotes],
+            price=[q.price for q in quotes],
+            volume=[nan if q.volume is None else q.volume for q in quotes],
+            change=[nan if q.change is None else q.change for q in quotes],
+            change_percent=[nan if q.change_percent is None else q.change_percent for q in quotes],
+            timestamp_ns=[int(q.timestamp.timestamp() * 1e9) if q.timestamp else _NAT for q in quotes]
+        )
+
+    @classmethod
+    def concat(cls, batches: Iterable["QuoteBatch"]) -> "QuoteBatch":
+        """איחוד כמה batches (למשל chunks של אותה בקשה)"""
+        batches = [b for b in batches if b is not None and len(b)]
+        if not batches:
+            return cls.empty()
+        if len(batches) == 1:
+            return batches[0]
+        return cls(
+            symbols=np.concatenate([b.symbols for b in batches]),
+            price=np.concatenate([b.price for b in batches]),
+            volume=np.concatenate([b.volume for b in batches]),
+            change=np.concatenate([b.change for b in batches]),
+            change_percent=np.concatenate([b.change_percent for b in batches]),
+            timestamp_ns=np.concatenate([b.timestamp_ns for b in batches])
+        )
+
+    @classmethod
+    def empty(cls) -> "QuoteBatch":
+        return cls(symbols=[], price=[])
+
+    @property
+    def nbytes(self) -> int:
+        """גודל העמודות בבתים (להערכת הזיכרון ב-RouterCache)"""
+        numeric = self.price.nbytes + self.volume.nbytes + self.change.nbytes
+        numeric += self.change_percent.nbytes + self.timestamp_ns.nbytes
+        return numeric + sum(len(s) for s in self.symbols) + self.symbols.nbytes
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.symbols)
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self.index
+
+    @property
+    def index(self) -> Dict[str, int]:
+        """symbol -> מספר שורה (נבנה בשימוש הראשון)"""
+        if self._index is None:
+            self._index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        return self._index
+
+    def _optional(self, value: float):
+        return None if np.isnan(value) else float(value)
+
+    def quote_at(self, row: int) -> QuoteData:
+        """QuoteData עבור שורה"""
+        ts = int(self.timestamp_ns[row])
+        volume = self.volume[row]
+        return QuoteData(
+            symbol=self.symbols[row],
+            price=float(self.price[row]),
+            timestamp=datetime.fromtimestamp(ts / 1e9) if ts != _NAT else None,
+            volume=None if np.isnan(volume) else int(volume),
+            change=self._optional(self.change[row]),
+            change_percent=self._optional(self.change_percent[row])
+        )
+
+    def get(self, symbol: str) -> Optional[QuoteData]:
+        """QuoteData לסימבול (None אם אינו ב-batch)"""
+        row = self.index.get(symbol)
+        return None if row is None else self.quote_at(row)
+
+    def to_quotes(self) -> Dict[str, QuoteData]:
+        """המרה ל-dict של symbol -> QuoteData (הפורמט של get_quotes)"""
+        return {symbol: self.quote_at(row) for row, symbol in enumerate(self.symbols)}
+
+    def select(self, symbols: List[str]) -> "QuoteBatch":
+        """תת-batch לפי רשימת סימבולים (סימבולים חסרים מושמטים)"""
+        rows = np.array([self.index[s] for s in symbols if s in self.index], dtype=np.intp)
+        return QuoteBatch(self.symbols[rows], self.price[rows], self.volume[rows], self.change[rows],
+                          self.change_percent[rows], self.timestamp_ns[rows])
+
+    def to_frame(self):
+        """DataFrame עם index לפי symbol - העמודות הן views על המערכים (ללא העתקה)"""
+        import pandas as pd
+        return pd.DataFrame(
+            {
+                "price": self.price,
+                "volume": self.volume,
+                "change": self.change,
+                "change_percent": self.change_percent,
+                "timestamp": self.timestamp_ns.view("datetime64[ns]")
+            },
+            index=pd.Index(self.symbols, name="symbol"),
+            copy=False
+        )
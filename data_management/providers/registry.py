@@ -0,0 +1,81 @@
+"""
+data_management/providers/registry.py - רישום ספקי הנתונים לפי שם
+כל ספק מתואר במודול ובשם המחלקה שלו בלבד; המודול מיובא רק כשהספק נדרש בפעם הראשונה,
+כך שייבוא ה-DataRouter לא מושך ספריות כבדות (yfinance, pandas) של ספקים שלא בשימוש.
+"""
+
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+
+
+@dataclass(frozen=True)
+class ProviderSpec:
+    """תיאור ספק: איפה המחלקה נמצאת ואיך ה-DataRouter מתייחס אליו"""
+    name: str
+    module: str  # נתיב מלא של המודול
+    class_name: str
+    is_primary: bool = False
+    health_check: bool = False  # בדיקת חיבור ביצירה
+
+
+_specs: Dict[str, ProviderSpec] = {}
+_classes: Dict[str, Type[Any]] = {}
+_lock = threading.Lock()
+
+
+def register_provider(spec: ProviderSpec):
+    """רישום (או החלפה) של ספק"""
+    with _lock:
+        _specs[spec.name] = spec
+        _classes.pop(spec.name, None)
+
+
+def provider_names() -> List[str]:
+    """שמות כל הספקים הרשומים, לפי סדר הרישום"""
+    return list(_specs)
+
+
+def get_spec(name: str) -> Optional[ProviderSpec]:
+    """התיאור של ספק (None אם אינו רשום)"""
+    return _specs.get(name)
+
+
+def is_loaded(name: str) -> bool:
+    """האם המודול של הספק כבר יובא"""
+    return name in _classes
+
+
+def load_provider_class(name: str) -> Type[Any]:
+    """ייבוא המודול של הספק (בפעם הראשונה בלבד) והחזרת המחלקה"""
+    provider_class = _classes.get(name)
+    if provider_class is not None:
+        return provider_class
+    spec = _specs.get(name)
+    if spec is None:
+        raise KeyError(f"Unknown provider: {name}")
+    with _lock:
+        provider_class = _classes.get(name)
+        if provider_class is None:
+            module = importlib.import_module(spec.module)
+            provider_class = getattr(module, spec.class_name)
+            _classes[name] = provider_class
+    return provider_class
+
+
+def create_provider(name: str, *args, **kwargs):
+    """יצירת מופע של ספק לפי שם"""
+    return load_provider_class(name)(*args, **kwargs)
+
+
+for _spec in (
+    ProviderSpec("fred", "data_management.providers.fred_provider", "FREDProvider", is_primary=True, health_check=True),
+    ProviderSpec("yahoo", "data_management.providers.yahoo_provider", "YahooProvider"),
+    ProviderSpec("finnhub", "data_management.providers.finnhub_provider", "FinnhubProvider"),
+    ProviderSpec("alphavantage", "data_management.providers.alphavantage_provider", "AlphavantageProvider"),
+    ProviderSpec("polygon", "data_management.providers.polygon_provider", "PolygonProvider"),
+    ProviderSpec("twelvedata", "data_management.providers.twelvedata_provider", "TwelvedataProvider"),
+    ProviderSpec("fmp", "data_management.providers.fmp_provider", "FMPProvider"),
+):
+    register_provider(_spec)
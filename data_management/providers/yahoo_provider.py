@@ -4,11 +4,19 @@ data_management/providers/yahoo_provider.py - ספק Yahoo Finance
 """
 
 import yfinance as yf
-from typing import Optional, Dict, Any
-from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, Iterator, List
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from functools import partial
+import time
+import numpy as np
 import pandas as pd
 
-from .base_provider import BaseProvider, QuoteData
+from .base_provider import BaseProvider, HistoryBatchResult, QuoteData
+from .quote_batch import QuoteBatch
+from ..intraday import get_interval, split_windows
+from ..provider_executor import CallCancelled, CallTimeout, get_provider_executor, is_worker_thread
+from ..retry_policy import should_propagate_errors
 
 class YahooProvider(BaseProvider):
     def get_historical_data(self, symbol: str, start_date: str, end_date: str, period: str = None) -> Optional[pd.DataFrame]:
@@ -16,34 +24,27 @@ class YahooProvider(BaseProvider):
         שליפת נתונים היסטוריים לפי טווח תאריכים או period, כולל כל הפרמטרים
         """
         import logging
-        import threading
         logger = logging.getLogger("YahooProvider.get_historical_data")
         try:
             self._rate_limit_check()
             logger.info(f"[YahooProvider] מתחיל קריאת yfinance.Ticker({symbol})")
             ticker = yf.Ticker(symbol)
-            result = {}
-            def fetch_history():
-                try:
-                    kwargs = dict(interval="1d", auto_adjust=True, actions=True)
-                    if period:
-                        logger.info(f"[YahooProvider] קריאה עם period={period}, interval=1d, auto_adjust=True, actions=True")
-                        result['history'] = ticker.history(period=period, **kwargs)
-                    else:
-                        logger.info(f"[YahooProvider] קריאה עם start={start_date}, end={end_date}, interval=1d, auto_adjust=True, actions=True")
-                        result['history'] = ticker.history(start=start_date, end=end_date, **kwargs)
-                except Exception as e:
-                    result['error'] = e
-            t = threading.Thread(target=fetch_history)
-            t.start()
-            t.join(timeout=15)
-            if t.is_alive():
+            kwargs = dict(interval="1d", auto_adjust=True, actions=True, timeout=self._effective_timeout())
+            if period:
+                logger.info(f"[YahooProvider] קריאה עם period={period}, interval=1d, auto_adjust=True, actions=True")
+                kwargs["period"] = period
+            else:
+                logger.info(f"[YahooProvider] קריאה עם start={start_date}, end={end_date}, interval=1d, auto_adjust=True, actions=True")
+                kwargs.update(start=start_date, end=end_date)
+            # ב-executor המשותף: מקביליות חסומה לספק, ו-timeout שמבטל את הקריאה במקום לנטוש thread
+            try:
+                history = self._run_blocking(partial(ticker.history, **kwargs), timeout=self.history_timeout)
+            except CallTimeout:
                 logger.error(f"[YahooProvider] קריאת ticker.history נתקעה (timeout)")
                 return None
-            if 'error' in result:
-                logger.error(f"[YahooProvider] שגיאה בקריאת ticker.history: {result['error']}")
+            except Exception as e:
+                logger.error(f"[YahooProvider] שגיאה בקריאת ticker.history: {e}")
                 return None
-            history = result.get('history')
             if history is None or history.empty:
                 logger.warning(f"No historical data for {symbol} (period={period}, start={start_date}, end={end_date})")
                 return None
@@ -54,8 +55,194 @@ class YahooProvider(BaseProvider):
         except Exception as e:
             logger.error(f"Failed to get historical data for {symbol}: {e}")
             return None
+    
+    def get_historical_data_bulk(self, symbols, start_date: str = None, end_date: str = None,
+                                 period: str = None, chunk_size: int = None) -> HistoryBatchResult:
+        """
+        היסטוריה יומית לרשימת סימבולים - קריאת yf.download אחת לכל chunk
+        
+        Args:
+            symbols: רשימת סימבולים (עם start_date/end_date/period משותפים),
+                     או dict של symbol -> (start_date, end_date) לטווחים שונים
+        
+        Returns:
+            HistoryBatchResult עם DataFrame לכל סימבול שהצליח וסיבת כישלון לכל השאר
+        """
+        result = HistoryBatchResult()
+        for chunk_result in self.iter_historical_data_bulk(symbols, start_date, end_date, period, chunk_size):
+            result.update(chunk_result)
+        return result
+    
+    def iter_historical_data_bulk(self, symbols, start_date: str = None, end_date: str = None,
+                                  period: str = None, chunk_size: int = None) -> Iterator[HistoryBatchResult]:
+        """כמו get_historical_data_bulk, אבל מחזיר את התוצאה של כל chunk ברגע שהוא מסתיים"""
+        chunk_size = chunk_size or self.max_history_batch_size
+        
+        # סימבולים עם אותו טווח נשלחים יחד
+        if isinstance(symbols, dict):
+            ranges = {symbol: tuple(rng) for symbol, rng in symbols.items()}
+        else:
+            ranges = {symbol: (start_date, end_date) for symbol in dict.fromkeys(symbols)}
+        groups: Dict[tuple, List[str]] = {}
+        for symbol, rng in ranges.items():
+            groups.setdefault(rng, []).append(symbol)
+        
+        for (start, end), group in groups.items():
+            for i in range(0, len(group), chunk_size):
+                chunk = group[i:i + chunk_size]
+                if self._in_backoff():
+                    yield HistoryBatchResult(failed={s: "provider in rate-limit backoff" for s in chunk})
+                    continue
+                yield self._fetch_history_chunk(chunk, start, end, period)
+    
+    def _fetch_history_chunk(self, symbols: List[str], start_date: str, end_date: str,
+                             period: str = None) -> HistoryBatchResult:
+        """הורדת chunk אחד ופיצול ה-DataFrame המשותף לסימבולים"""
+        result = HistoryBatchResult()
+        pending = []
+        for symbol in symbols:
+            if self._is_negative_cached(f"history_{symbol}_{start_date}_{end_date}_{period}"):
+                result.failed[symbol] = "no data on recent attempt (negative cache)"
+            else:
+                pending.append(symbol)
+        if not pending:
+            return result
+        
+        kwargs = dict(interval="1d", auto_adjust=True, actions=True, group_by="ticker", progress=False,
+                      threads=min(self.history_download_threads, len(pending)))
+        if period or not (start_date or end_date):
+            kwargs["period"] = period or "1y"
+        else:
+            kwargs.update(start=start_date, end=end_date)
+        
+        try:
+            self._rate_limit_check()
+            kwargs["timeout"] = self._effective_timeout()
+            data = self._run_blocking(partial(yf.download, tickers=pending, **kwargs), timeout=self.history_chunk_timeout)
+            self._update_status(success=True)
+        except Exception as e:
+            self._note_failure(None, e)
+            self._update_status(success=False, error_msg=f"Bulk history failed for {len(pending)} symbols: {e}")
+            result.failed.update({symbol: str(e) for symbol in pending})
+            return result
+        
+        errors = getattr(getattr(yf, "shared", None), "_ERRORS", {}) or {}
+        multi = data is not None and isinstance(data.columns, pd.MultiIndex)
+        available = set(data.columns.get_level_values(0)) if multi else set()
+        for symbol in pending:
+            frame = None
+            if data is not None and not data.empty:
+                if multi and symbol in available:
+                    frame = data[symbol]
+                elif not multi and len(pending) == 1:
+                    frame = data
+            if frame is not None:
+                frame = frame.dropna(how="all")
+            if frame is None or frame.empty:
+                reason = str(errors.get(symbol) or "no data returned")
+                result.failed[symbol] = reason
+                self._set_negative(f"history_{symbol}_{start_date}_{end_date}_{period}", reason)
+                continue
+            result.frames[symbol] = frame
+        
+        self.logger.info(f"Bulk history: {len(result.frames)} ok, {len(result.failed)} failed of {len(symbols)} symbols")
+        return result
+    
+    def get_intraday_data(self, symbol: str, interval: str = "1m", start=None, end=None) -> Optional[pd.DataFrame]:
+        """
+        נרות תוך-יומיים (1m / 5m / 15m) לטווח [start, end) - ברירת מחדל: כל עומק ההיסטוריה של Yahoo.
+        הטווח מחולק לחלונות במגבלות של Yahoo שמורדים במקביל
+        """
+        frames = [frame for _, frame, _ in self.iter_intraday_data({symbol: (start, end)}, interval) if frame is not None]
+        if not frames:
+            return None
+        data = pd.concat(frames) if len(frames) > 1 else frames[0]
+        return data[~data.index.duplicated(keep="last")].sort_index()
+    
+    def iter_intraday_data(self, ranges: Dict[str, tuple], interval: str = "1m") -> Iterator[tuple]:
+        """
+        הורדת נרות תוך-יומיים לכמה סימבולים, חלון אחרי חלון
+        
+        Args:
+            ranges: symbol -> (start, end) או רשימת טווחים; None בקצה = עד גבול ההיסטוריה / עד עכשיו
+        
+        Yields:
+            (symbol, DataFrame, None) לכל חלון שהצליח, או (symbol, None, סיבה) לכל חלון שנכשל.
+            החלונות רצים במקביל ב-executor המשותף (עד max_concurrent_calls, תחת ה-rate limiter)
+            ומוחזרים לפי סדר הסיום
+        """
+        spec = get_interval(interval)
+        now = datetime.now(timezone.utc)
+        jobs = []
+        for symbol, spans in ranges.items():
+            for start, end in (spans if isinstance(spans, list) else [spans]):
+                if start is None:
+                    start = now - timedelta(days=spec.max_lookback_days or 30)
+                windows = split_windows(spec, start, end if end is not None else now, now=now)
+                jobs.extend((symbol, window) for window in windows)
+        if not jobs:
+            return
+        
+        if is_worker_thread():
+            for symbol, window in jobs:
+                yield self._fetch_intraday_window(symbol, spec.name, window)
+            return
+        
+        # מספר החלונות בתור חסום, כדי שרשימה ארוכה לא תמלא את התור המשותף
+        executor = get_provider_executor()
+        executor.ensure_limit(self.executor_key, self.max_concurrent_calls)
+        in_flight_limit = self.max_concurrent_calls * 2
+        pending = iter(jobs)
+        in_flight = set()
+        try:
+            while True:
+                for symbol, window in pending:
+                    in_flight.add(executor.submit(self.executor_key, self._fetch_intraday_window, symbol, spec.name,
+                                                  window, queue_timeout=self.history_chunk_timeout))
+                    if len(in_flight) >= in_flight_limit:
+                        break
+                if not in_flight:
+                    return
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
+    
+    def _fetch_intraday_window(self, symbol: str, interval: str, window: tuple) -> tuple:
+        """חלון אחד של נרות תוך-יומיים -> (symbol, DataFrame או None, סיבת כישלון או None)"""
+        start, end = window
+        key = f"intraday_{symbol}_{interval}_{int(start.timestamp())}_{int(end.timestamp())}"
+        if self._is_negative_cached(key):
+            return symbol, None, "no data on recent attempt (negative cache)"
+        if self._in_backoff():
+            return symbol, None, "provider in rate-limit backoff"
+        try:
+            self._rate_limit_check()
+            data = yf.Ticker(symbol).history(interval=interval, start=start, end=end, auto_adjust=True,
+                                             actions=False, timeout=self._effective_timeout())
+            self._update_status(success=True)
+        except CallCancelled:
+            return symbol, None, "cancelled"
+        except Exception as e:
+            self._note_failure(None, e)
+            self._update_status(success=False, error_msg=f"Intraday {interval} failed for {symbol}: {e}")
+            return symbol, None, str(e)
+        if data is None or data.empty:
+            self._set_negative(key, "no data returned")
+            return symbol, None, "no data returned"
+        return symbol, data, None
     """ספק נתונים Yahoo Finance - חינמי ללא הגבלות API"""
     
+    # yf.download מחזיר מספר סימבולים בקריאה אחת
+    supports_batch_quotes = True
+    max_batch_size = 100
+    max_history_batch_size = 50  # סימבולים בכל הורדת היסטוריה
+    history_download_threads = 8  # threads פנימיים של yf.download בכל chunk
+    history_timeout = 15  # שניות לסימבול בודד
+    history_chunk_timeout = 120  # שניות ל-chunk בהורדה מרובה
+    
     def __init__(self, config=None):
         api_key = None
         if config is not None:
@@ -81,6 +268,8 @@ class YahooProvider(BaseProvider):
             cached_data = self._get_from_cache(cache_key)
             if cached_data:
                 return cached_data
+            if self._is_negative_cached(cache_key) or self._in_backoff():
+                return None
             
             # rate limiting
             self._rate_limit_check()
@@ -150,8 +339,11 @@ class YahooProvider(BaseProvider):
             
         except Exception as e:
             error_msg = f"Failed to get quote for {symbol}: {str(e)}"
+            self._note_failure(cache_key, e)
             self._update_status(success=False, error_msg=error_msg)
             self.logger.error(error_msg)
+            if should_propagate_errors():
+                raise
             return None
     
     def get_vix(self) -> Optional[QuoteData]:
@@ -167,12 +359,13 @@ class YahooProvider(BaseProvider):
             "IWM": "IWM"
         }
         
-        market_data = {}
+        # קריאה אחת לכל הסימבולים
+        quotes = self.get_quotes(list(symbols.values()))
         
+        market_data = {}
         for name, symbol in symbols.items():
-            quote = self.get_quote(symbol)
-            if quote:
-                market_data[name] = quote
+            if symbol in quotes:
+                market_data[name] = quotes[symbol]
         
         return market_data
     
@@ -215,48 +408,68 @@ class YahooProvider(BaseProvider):
     
     def get_multiple_quotes(self, symbols: list) -> Dict[str, QuoteData]:
         """קבלת ציטוטים מרובים ביעילות"""
-        quotes = {}
+        return self.get_quotes(symbols)
+    
+    def _fetch_quotes_batch(self, symbols: List[str]) -> Dict[str, QuoteData]:
+        """ציטוטים לכל ה-chunk בקריאת yf.download אחת"""
+        return self._fetch_quote_batch(symbols).to_quotes()
+    
+    def _fetch_quote_batch(self, symbols: List[str]) -> QuoteBatch:
+        """ציטוטים לכל ה-chunk בקריאת yf.download אחת - העמודות נבנות ישירות מה-DataFrame"""
+        data = yf.download(
+            tickers=symbols,
+            period="5d",
+            interval="1d",
+            group_by="ticker",
+            auto_adjust=False,
+            progress=False,
+            threads=False
+        )
         
-        # Yahoo Finance יכול לטפל במספר סימבולים בבת אחת
-        try:
-            # rate limiting
-            self._rate_limit_check()
-            
-            # הורדת נתונים לכל הסימבולים
-            tickers = yf.Tickers(' '.join(symbols))
-            
-            for symbol in symbols:
-                try:
-                    ticker = getattr(tickers.tickers, symbol)
-                    history = ticker.history(period="1d", interval="1m")
-                    
-                    if not history.empty:
-                        latest = history.iloc[-1]
-                        current_price = float(latest['Close'])
-                        volume = int(latest['Volume']) if not pd.isna(latest['Volume']) else None
-                        
-                        quote = QuoteData(
-                            symbol=symbol,
-                            price=current_price,
-                            timestamp=datetime.now(),
-                            volume=volume
-                        )
-                        
-                        quotes[symbol] = quote
-                        
-                except Exception as e:
-                    self.logger.warning(f"Failed to get data for {symbol}: {e}")
-                    continue
-            
-            self._update_status(success=True)
-            self.logger.debug(f"Retrieved {len(quotes)} quotes from {len(symbols)} symbols")
-            
-        except Exception as e:
-            error_msg = f"Failed to get multiple quotes: {str(e)}"
-            self._update_status(success=False, error_msg=error_msg)
-            self.logger.error(error_msg)
+        if data is None or data.empty:
+            return QuoteBatch.empty()
+        
+        # מטריצות (ימים x סימבולים) של מחירי סגירה ונפח
+        if isinstance(data.columns, pd.MultiIndex):
+            available = set(data.columns.get_level_values(0))
+            tickers = [s for s in symbols if s in available]
+            closes = data.reindex(columns=pd.MultiIndex.from_product([tickers, ["Close"]]))
+            volumes = data.reindex(columns=pd.MultiIndex.from_product([tickers, ["Volume"]]))
+        else:
+            tickers = symbols[:1]
+            closes = data[["Close"]]
+            volumes = data[["Volume"]] if "Volume" in data else pd.DataFrame(np.nan, index=data.index, columns=["Volume"])
+        closes = closes.to_numpy(dtype=np.float64, na_value=np.nan)
+        volumes = volumes.to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        # מחיר אחרון וקודם (הערכים הלא-חסרים האחרונים בכל עמודה)
+        rows = np.arange(closes.shape[0])[:, None]
+        valid = ~np.isnan(closes)
+        last_row = np.where(valid, rows, -1).max(axis=0)
+        prev_row = np.where(valid & (rows < last_row), rows, -1).max(axis=0)
+        cols = np.arange(closes.shape[1])
+        price = np.where(last_row >= 0, closes[last_row, cols], np.nan)
+        previous = np.where(prev_row >= 0, closes[prev_row, cols], np.nan)
+        # הנפח מאותה שורה של המחיר (לסימבול בלי נר בשורה האחרונה - לא מהשורה האחרונה של הטבלה)
+        volume = np.where(last_row >= 0, volumes[last_row, cols], np.nan)
+        
+        change = price - previous
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change_percent = np.where(previous != 0, change / previous * 100, np.nan)
+        
+        keep = price > 0
+        now_ns = time.time_ns()
+        batch = QuoteBatch(
+            symbols=np.asarray(tickers, dtype=object)[keep],
+            price=price[keep],
+            volume=volume[keep],
+            change=change[keep],
+            change_percent=change_percent[keep],
+            timestamp_ns=np.full(int(keep.sum()), now_ns, dtype=np.int64)
+        )
         
-        return quotes
+        self.logger.debug(f"Retrieved {len(batch)} quotes from {len(symbols)} symbols")
+        return batch
     
     def test_connection(self) -> bool:
         """בדיקת חיבור ספציפית ל-Yahoo Finance"""
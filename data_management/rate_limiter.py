@@ -0,0 +1,292 @@
+"""
+data_management/rate_limiter.py - הגבלת קצב בשיטת token bucket
+לכל ספק מגבלה אחת או יותר (לשנייה / לדקה / ליום); בקשה עוברת רק כשיש token בכל הדליים.
+acquire חוסם עד שמתפנה מקום (הזמן משוריין מראש, כך ש-threads מקבילים לא מתחרים;
+המתנה שבוטלה מחזירה את ה-tokens לדלי),
+try_acquire לא חוסם, ו-acquire_async ממתין בלי לחסום את ה-event loop.
+אפשר לשתף את מצב הדליים בין תהליכים דרך קובץ SQLite קטן (state_path).
+מגבילים עם מכסה יומית נשמרים בקובץ כברירת מחדל, כדי שהמכסה לא תתאפס בהפעלה מחדש.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.logger import get_logger
+
+
+@dataclass
+class RateLimit:
+    """מגבלה אחת: limit בקשות לכל period שניות"""
+    limit: float
+    period: float
+    burst: Optional[float] = None  # גודל הדלי (ברירת מחדל: limit, ולפחות 1)
+
+    @property
+    def capacity(self) -> float:
+        return max(self.burst if self.burst is not None else self.limit, 1.0)
+
+    @property
+    def rate(self) -> float:
+        """tokens לשנייה"""
+        return self.limit / self.period
+
+
+class TokenBucketLimiter:
+    """מגביל קצב בטוח ל-threads (ובין תהליכים אם ניתן state_path)"""
+
+    def __init__(self, name: str, per_second: Optional[float] = None, per_minute: Optional[float] = None,
+                 per_day: Optional[float] = None, state_path: Optional[Path] = None):
+        self.name = name
+        self.logger = get_logger(f"RateLimiter.{name}")
+        self.limits: List[RateLimit] = []
+        if per_second:
+            self.limits.append(RateLimit(per_second, 1.0))
+        if per_minute:
+            self.limits.append(RateLimit(per_minute, 60.0))
+        if per_day:
+            self.limits.append(RateLimit(per_day, 86400.0))
+
+        self._lock = threading.Lock()
+        now = time.time()
+        self._tokens = [limit.capacity for limit in self.limits]
+        self._updated = now
+
+        # מצב משותף בין תהליכים
+        self.state_path = Path(state_path) if state_path else None
+        self._conn: Optional[sqlite3.Connection] = None
+        if self.state_path is not None:
+            self._open_shared_state()
+
+        # סטטיסטיקות
+        self.acquired = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.total_wait = 0.0
+
+    def _open_shared_state(self):
+        """פתיחת קובץ המצב המשותף"""
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.state_path), timeout=30, isolation_level=None,
+                                     check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT NOT NULL,
+                period REAL NOT NULL,
+                tokens REAL NOT NULL,
+                updated REAL NOT NULL,
+                PRIMARY KEY (name, period)
+            )
+        """)
+        # המצב השמור (למשל מכסה יומית שנוצלה לפני הפעלה מחדש) נטען מיד, כדי ש-remaining יהיה נכון
+        now = time.time()
+        self._tokens = self._read_shared_tokens(now)
+        self._updated = now
+
+    def _read_shared_tokens(self, now: float) -> List[float]:
+        """מצב הדליים בקובץ המשותף, ממולא לפי הזמן שעבר מהעדכון האחרון"""
+        rows = dict((period, (tokens, updated)) for period, tokens, updated in self._conn.execute(
+            "SELECT period, tokens, updated FROM rate_buckets WHERE name = ?", (self.name,)))
+        tokens = []
+        for limit in self.limits:
+            stored, updated = rows.get(limit.period, (limit.capacity, now))
+            tokens.append(min(limit.capacity, stored + max(now - updated, 0.0) * limit.rate))
+        return tokens
+
+    def _refill(self, tokens: List[float], updated: float, now: float) -> List[float]:
+        """מילוי הדליים לפי הזמן שעבר"""
+        elapsed = max(now - updated, 0.0)
+        return [min(limit.capacity, t + elapsed * limit.rate) for limit, t in zip(self.limits, tokens)]
+
+    def _reserve_tokens(self, tokens: List[float], count: float, max_wait: Optional[float]):
+        """
+        חישוב זמן ההמתנה ושריון ה-tokens (דלי יכול לרדת מתחת לאפס - זה השריון)
+
+        Returns:
+            (tokens מעודכנים, זמן המתנה) או (None, זמן המתנה) אם ההמתנה ארוכה מ-max_wait
+        """
+        wait = 0.0
+        for limit, t in zip(self.limits, tokens):
+            if t < count:
+                wait = max(wait, (count - t) / limit.rate)
+        if max_wait is not None and wait > max_wait:
+            return None, wait
+        return [t - count for t in tokens], wait
+
+    def _reserve(self, count: float, max_wait: Optional[float]) -> Optional[float]:
+        """שריון count tokens. מחזיר כמה שניות להמתין, או None אם נדרשת המתנה ארוכה מ-max_wait"""
+        if not self.limits:
+            return 0.0
+        with self._lock:
+            now = time.time()
+            if self._conn is not None:
+                new_tokens, wait = self._reserve_shared(count, max_wait, now)
+            else:
+                self._tokens = self._refill(self._tokens, self._updated, now)
+                self._updated = now
+                new_tokens, wait = self._reserve_tokens(self._tokens, count, max_wait)
+                if new_tokens is not None:
+                    self._tokens = new_tokens
+            if new_tokens is None:
+                self.rejected += 1
+                return None
+            self.acquired += 1
+            self.total_wait += wait
+            return wait
+
+    def _reserve_shared(self, count: float, max_wait: Optional[float], now: float):
+        """שריון בתוך טרנזקציה על קובץ המצב המשותף (BEGIN IMMEDIATE נועל בין תהליכים)"""
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            new_tokens, wait = self._reserve_tokens(self._read_shared_tokens(now), count, max_wait)
+            if new_tokens is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (name, period, tokens, updated) VALUES (?, ?, ?, ?)",
+                    [(self.name, limit.period, t, now) for limit, t in zip(self.limits, new_tokens)]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if new_tokens is not None:
+            self._tokens = new_tokens
+            self._updated = now
+        return new_tokens, wait
+
+    def _refund(self, count: float, wait: float):
+        """החזרת tokens ששוריינו להמתנה שבוטלה (הם לא נוצלו - בקשות אחרות יכולות להשתמש בהם)"""
+        if not self.limits:
+            return
+        with self._lock:
+            self.acquired -= 1
+            self.cancelled += 1
+            self.total_wait -= wait
+            now = time.time()
+            if self._conn is None:
+                tokens = self._refill(self._tokens, self._updated, now)
+                self._tokens = [min(limit.capacity, t + count) for limit, t in zip(self.limits, tokens)]
+                self._updated = now
+                return
+            conn = self._conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                tokens = [min(limit.capacity, t + count)
+                          for limit, t in zip(self.limits, self._read_shared_tokens(now))]
+                conn.executemany(
+                    "INSERT OR REPLACE INTO rate_buckets (name, period, tokens, updated) VALUES (?, ?, ?, ?)",
+                    [(self.name, limit.period, t, now) for limit, t in zip(self.limits, tokens)]
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._tokens = tokens
+            self._updated = now
+
+    def try_acquire(self, count: float = 1) -> bool:
+        """ניסיון לקבל tokens בלי להמתין"""
+        return self._reserve(count, max_wait=0.0) is not None
+
+    def acquire(self, count: float = 1, timeout: Optional[float] = None,
+                cancel: Optional[threading.Event] = None) -> bool:
+        """
+        המתנה (חוסמת) עד שיש tokens. מחזיר False אם ההמתנה הנדרשת ארוכה מ-timeout,
+        או אם cancel נקבע בזמן ההמתנה (ה-tokens שנשמרו מוחזרים לדלי)
+        """
+        wait = self._reserve(count, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            self.logger.debug(f"Rate limiting: sleeping {wait:.2f}s")
+            if cancel is None:
+                time.sleep(wait)
+            elif cancel.wait(wait):
+                self._refund(count, wait)
+                return False
+        return True
+
+    async def acquire_async(self, count: float = 1, timeout: Optional[float] = None) -> bool:
+        """כמו acquire, אבל ממתין בלי לחסום את ה-event loop"""
+        wait = self._reserve(count, max_wait=timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            self.logger.debug(f"Rate limiting: awaiting {wait:.2f}s")
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self._refund(count, wait)
+                raise
+        return True
+
+    def remaining(self) -> Dict[str, float]:
+        """tokens זמינים כרגע בכל דלי (לפי התקופה)"""
+        with self._lock:
+            tokens = self._refill(self._tokens, self._updated, time.time())
+        return {self._period_name(limit.period): max(t, 0.0) for limit, t in zip(self.limits, tokens)}
+
+    @staticmethod
+    def _period_name(period: float) -> str:
+        return {1.0: "second", 60.0: "minute", 86400.0: "day"}.get(period, f"{period:g}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """סטטיסטיקות המגביל"""
+        return {
+            "limits": {self._period_name(limit.period): limit.limit for limit in self.limits},
+            "remaining": {k: round(v, 2) for k, v in self.remaining().items()},
+            "shared": self._conn is not None,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "total_wait_seconds": round(self.total_wait, 3)
+        }
+
+    def close(self):
+        """סגירת קובץ המצב המשותף"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# מגבילים משותפים - כל המופעים של אותו ספק בתהליך חולקים דלי אחד
+_limiters: Dict[str, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+_shared_state_path: Optional[Path] = None
+
+# קובץ המצב של מגבילים עם מכסה יומית (None - בזיכרון בלבד, והמכסה מתאפסת בהפעלה מחדש)
+DEFAULT_STATE_PATH = Path(__file__).parent / "rate_limits.db"
+_daily_state_path: Optional[Path] = DEFAULT_STATE_PATH
+
+
+def configure_shared_state(path: Optional[Path]):
+    """הגדרת קובץ מצב משותף בין תהליכים למגבילים שייווצרו מעכשיו (None - ללא שיתוף)"""
+    global _shared_state_path
+    _shared_state_path = Path(path) if path else None
+
+
+def configure_daily_state(path: Optional[Path]):
+    """הגדרת הקובץ שבו נשמרות מכסות יומיות של מגבילים שייווצרו מעכשיו (None - בזיכרון בלבד)"""
+    global _daily_state_path
+    _daily_state_path = Path(path) if path else None
+
+
+def get_rate_limiter(name: str, per_second: Optional[float] = None, per_minute: Optional[float] = None,
+                     per_day: Optional[float] = None) -> TokenBucketLimiter:
+    """המגביל המשותף לשם נתון (נוצר בקריאה הראשונה עם המגבלות שהועברו)"""
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                state_path = _shared_state_path or (_daily_state_path if per_day else None)
+                limiter = TokenBucketLimiter(name, per_second=per_second, per_minute=per_minute,
+                                             per_day=per_day, state_path=state_path)
+                _limiters[name] = limiter
+    return limiter
@@ -0,0 +1,113 @@
+"""
+data_management/retry_policy.py - ניסיונות חוזרים עם תקציב זמן (deadline)
+לכל בקשה ב-DataRouter יש deadline כולל; הוא מתחלק בין הספקים בשרשרת ה-fallback
+ומועבר לספקים דרך ContextVar כדי שגם ה-timeout של ה-HTTP וההמתנה ל-rate limit יכובדו.
+ניסיון חוזר מתבצע רק על שגיאות זמניות (timeout, ניתוק, 5xx), עם exponential backoff ו-jitter.
+"""
+
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    """תקציב הזמן של הבקשה נגמר"""
+
+
+class Deadline:
+    """נקודת זמן (time.monotonic) שאחריה אין טעם להמשיך"""
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + max(seconds, 0.0)
+
+    def remaining(self) -> float:
+        """שניות שנותרו (0 אם עבר)"""
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def share(self, parts: int) -> "Deadline":
+        """deadline חדש עם חלק 1/parts מהזמן שנותר (לא מאוחר מה-deadline הזה)"""
+        return Deadline(self.remaining() / max(parts, 1))
+
+
+@dataclass
+class RetryPolicy:
+    """מדיניות ניסיונות חוזרים"""
+    max_retries: int = 1
+    base_delay: float = 0.2  # שניות
+    max_delay: float = 2.0
+    multiplier: float = 2.0
+
+    def backoff(self, attempt: int) -> float:
+        """זמן המתנה לפני ניסיון attempt+1 - full jitter"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (self.multiplier ** attempt)))
+
+
+# ה-deadline של הבקשה הנוכחית, והאם ספקים צריכים לזרוק שגיאות במקום להחזיר ערך ברירת מחדל
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("data_request_deadline", default=None)
+_propagate_errors: ContextVar[bool] = ContextVar("data_propagate_errors", default=False)
+
+
+def current_deadline() -> Optional[Deadline]:
+    """ה-deadline של הבקשה הנוכחית (None מחוץ ל-DataRouter)"""
+    return _current_deadline.get()
+
+
+def should_propagate_errors() -> bool:
+    """האם הקורא (DataRouter) רוצה לקבל את השגיאה עצמה כדי להחליט על ניסיון חוזר"""
+    return _propagate_errors.get()
+
+
+@contextmanager
+def request_scope(deadline: Optional[Deadline], propagate_errors: bool = True) -> Iterator[None]:
+    """הגדרת deadline ומצב העברת שגיאות עבור הקוד שרץ בתוך הבלוק"""
+    deadline_token = _current_deadline.set(deadline)
+    propagate_token = _propagate_errors.set(propagate_errors)
+    try:
+        yield
+    finally:
+        _propagate_errors.reset(propagate_token)
+        _current_deadline.reset(deadline_token)
+
+
+def http_status(error: BaseException) -> Optional[int]:
+    """קוד HTTP של שגיאה (requests או aiohttp), אם יש"""
+    status = getattr(error, "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+# שמות מחלקות שגיאה זמניות בספריות HTTP (בלי לייבא את הספריות עצמן)
+_TRANSIENT_ERROR_NAMES = {
+    "ConnectionError", "Timeout", "ConnectTimeout", "ReadTimeout", "ChunkedEncodingError",
+    "ClientConnectionError", "ServerDisconnectedError", "ClientPayloadError", "TimeoutError"
+}
+_RETRYABLE_STATUS = {408, 425, 500, 502, 503, 504}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """האם שווה לנסות שוב: timeout, ניתוק או 5xx. 4xx (כולל 429) ושגיאות לוגיות - לא"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    status = http_status(error)
+    if status is not None:
+        return status in _RETRYABLE_STATUS
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _TRANSIENT_ERROR_NAMES for cls in type(error).__mro__)
+
+
+def is_provider_failure(error: BaseException) -> bool:
+    """
+    האם השגיאה מעידה על תקלה בספק (נספרת במפסק): timeout, ניתוק, 5xx או 429.
+    סימבול לא מוכר / 404 ושגיאות לוגיות אינם כישלון של הספק
+    """
+    if http_status(error) == 429 or "RateLimit" in type(error).__name__:
+        return True
+    return is_retryable(error)
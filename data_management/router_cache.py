@@ -0,0 +1,273 @@
+"""
+data_management/router_cache.py - מטמון חסום ובטוח ל-threads עבור DataRouter
+TTL לכל רשומה + פינוי LRU לפי מספר רשומות ותקציב זיכרון + ניקוי רקע
+רשומה יכולה להישמר גם אחרי ה-TTL (stale_ttl) לצורך stale-while-revalidate
+"""
+
+import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from core.logger import get_logger
+
+
+@dataclass
+class CacheEntry:
+    """רשומת cache בודדת"""
+    data: Any
+    timestamp: float  # epoch seconds
+    ttl: float
+    size: int
+    stale_ttl: float = 0.0  # כמה זמן אחרי ה-TTL מותר עדיין להגיש את הרשומה כ-stale
+
+    @property
+    def age(self) -> float:
+        """גיל הרשומה בשניות"""
+        return time.time() - self.timestamp
+
+    @property
+    def expires_after(self) -> float:
+        """גיל שבו הרשומה נמחקת לגמרי"""
+        return self.ttl + self.stale_ttl
+
+
+def estimate_size(obj: Any, _depth: int = 0) -> int:
+    """הערכת גודל אובייקט בזיכרון (bytes) - מהירה ולא מדויקת"""
+    # DataFrame / Series
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage) and hasattr(obj, "shape"):
+        try:
+            usage = memory_usage(deep=True)
+            return int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        except Exception:
+            pass
+    # numpy arrays
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes + sys.getsizeof(obj)
+
+    size = sys.getsizeof(obj)
+    if _depth >= 3:
+        return size
+
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            size += estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, _depth + 1)
+    else:
+        # אובייקט עם __slots__ (למשל QuoteData) אין לו __dict__ - הערכים נספרים לפי השדות
+        for value in _slot_values(obj):
+            size += estimate_size(value, _depth + 1)
+        if hasattr(obj, "__dict__"):
+            size += estimate_size(vars(obj), _depth + 1)
+    return size
+
+
+def _slot_values(obj: Any) -> List[Any]:
+    """ערכי השדות שמוגדרים ב-__slots__ לאורך ה-MRO"""
+    values = []
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in (slots,) if isinstance(slots, str) else slots:
+            if name not in ("__dict__", "__weakref__") and hasattr(obj, name):
+                values.append(getattr(obj, name))
+    return values
+
+
+class RouterCache:
+    """מטמון TTL+LRU עם תקציב רשומות וזיכרון"""
+
+    def __init__(self, max_entries: int = 5000, max_bytes: int = 256 * 1024 * 1024,
+                 default_ttl: float = 60, cleanup_interval: float = 30.0):
+        self.logger = get_logger("RouterCache")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._total_bytes = 0
+
+        # מונים - מתעדכנים בכל פעולה כך שהסטטיסטיקה היא O(1)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.stale_hits = 0
+
+        # thread רקע לניקוי רשומות שפג תוקפן
+        self._stop_event = threading.Event()
+        self._cleanup_thread = None
+        if cleanup_interval and cleanup_interval > 0:
+            self._cleanup_thread = threading.Thread(
+                target=RouterCache._cleanup_loop,
+                args=(weakref.ref(self), self._stop_event, cleanup_interval),
+                name="RouterCacheCleanup",
+                daemon=True
+            )
+            self._cleanup_thread.start()
+
+    @staticmethod
+    def _cleanup_loop(cache_ref, stop_event: threading.Event, interval: float):
+        """לולאת ניקוי רקע - מחזיקה weakref כדי לא למנוע שחרור ה-cache"""
+        while not stop_event.wait(interval):
+            cache = cache_ref()
+            if cache is None:
+                return
+            try:
+                cache.purge_expired()
+            except Exception as e:
+                cache.logger.error(f"Cache cleanup failed: {e}")
+            del cache
+
+    def _remove(self, key: str) -> Optional[CacheEntry]:
+        """הסרת רשומה ועדכון תקציב הזיכרון (בתוך המנעול)"""
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+        return entry
+
+    def get(self, key: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        קבלת נתונים מה-cache
+
+        Args:
+            key: מפתח
+            max_age: גיל מקסימלי מבוקש (שניות). רשומה ישנה יותר נחשבת miss
+                     אבל נשארת ב-cache עד שה-TTL שלה פג.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            age = entry.age
+            if age > entry.expires_after:
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return None
+            if age > entry.ttl or (max_age is not None and age > max_age):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry.data
+
+    def get_stale(self, key: str) -> Optional[CacheEntry]:
+        """
+        קבלת רשומה גם אם עבר ה-TTL שלה, כל עוד היא בתוך חלון ה-stale
+
+        Returns:
+            CacheEntry (כולל גיל) או None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry.age > entry.expires_after:
+                self._remove(key)
+                self.expirations += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stale_hits += 1
+            return entry
+
+    def set(self, key: str, data: Any, ttl: Optional[float] = None, stale_ttl: float = 0.0,
+            timestamp: Optional[float] = None):
+        """שמירה ב-cache עם פינוי LRU לפי הצורך (timestamp - לשחזור רשומה ישנה, למשל מהדיסק)"""
+        size = estimate_size(data)
+        if size > self.max_bytes:
+            self.logger.warning(f"Not caching {key}: {size} bytes exceeds cache budget")
+            return
+
+        entry = CacheEntry(
+            data=data,
+            timestamp=timestamp if timestamp is not None else time.time(),
+            ttl=ttl if ttl is not None else self.default_ttl,
+            size=size,
+            stale_ttl=stale_ttl
+        )
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = entry
+            self._total_bytes += size
+            self._evict()
+
+    def _evict(self):
+        """פינוי הרשומות הישנות ביותר (LRU) עד לעמידה בתקציב"""
+        while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+            key, entry = self._entries.popitem(last=False)
+            self._total_bytes -= entry.size
+            self.evictions += 1
+            self.logger.debug(f"Evicted {key} ({entry.size} bytes)")
+
+    def delete(self, key: str) -> bool:
+        """מחיקת רשומה"""
+        with self._lock:
+            return self._remove(key) is not None
+
+    def clear(self, pattern: Optional[str] = None) -> int:
+        """ניקוי ה-cache (או רק מפתחות שמכילים pattern). מחזיר מספר רשומות שנמחקו"""
+        with self._lock:
+            if pattern is None:
+                count = len(self._entries)
+                self._entries.clear()
+                self._total_bytes = 0
+                return count
+            keys = [k for k in self._entries if pattern in k]
+            for key in keys:
+                self._remove(key)
+            return len(keys)
+
+    def purge_expired(self) -> int:
+        """הסרת כל הרשומות שה-TTL (כולל חלון ה-stale) שלהן פג"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, e in self._entries.items() if now - e.timestamp > e.expires_after]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+        if expired:
+            self.logger.debug(f"Purged {len(expired)} expired cache entries")
+        return len(expired)
+
+    def keys(self) -> List[str]:
+        """רשימת המפתחות הנוכחיים"""
+        with self._lock:
+            return list(self._entries.keys())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def get_stats(self) -> Dict[str, Any]:
+        """סטטיסטיקות cache - O(1)"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "total_entries": len(self._entries),
+                "total_bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "stale_hits": self.stale_hits
+            }
+
+    def close(self):
+        """עצירת thread הניקוי"""
+        self._stop_event.set()
@@ -0,0 +1,149 @@
+"""
+data_management/single_flight.py - איחוד בקשות זהות בזמן ריצה
+כאשר כמה threads מבקשים את אותו מפתח במקביל, רק אחד מבצע את הקריאה בפועל
+והשאר ממתינים ומקבלים את אותה תוצאה (או את אותה שגיאה). ממתין עם timeout מוותר
+(WaitTimeout) בלי להשפיע על הקריאה המשותפת
+SingleFlight משמש קוראים סינכרוניים (threads), AsyncSingleFlight משמש coroutines
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class WaitTimeout(TimeoutError):
+    """ההמתנה לקריאה המשותפת חרגה מה-timeout של הממתין"""
+
+
+class _InflightCall:
+    """קריאה פעילה אחת ומי שממתין לה"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """מנגנון single-flight: קריאה אחת לכל מפתח בכל רגע נתון"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InflightCall] = {}
+
+        # סטטיסטיקות
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        ביצוע fn עבור key, או המתנה לקריאה שכבר רצה עבור אותו key
+
+        Args:
+            timeout: זמן ההמתנה המרבי לקריאה של קורא אחר (לא מגביל קריאה שהקורא מבצע בעצמו)
+
+        Returns:
+            תוצאת הקריאה המשותפת. שגיאה של הקריאה נזרקת לכל הממתינים.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _InflightCall()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            if not call.done.wait(timeout):
+                raise WaitTimeout(f"Shared call for {key} still running after {timeout:.2f}s")
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def in_flight(self, key: str) -> bool:
+        """האם יש קריאה פעילה עבור key"""
+        with self._lock:
+            return key in self._calls
+
+    def get_stats(self) -> Dict[str, int]:
+        """סטטיסטיקות איחוד בקשות"""
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "coalesced": self.coalesced
+            }
+
+
+class AsyncSingleFlight:
+    """גרסת asyncio של SingleFlight - coroutine אחת לכל מפתח בכל event loop"""
+
+    def __init__(self):
+        self._tasks: Dict[tuple, "asyncio.Task"] = {}
+
+        # סטטיסטיקות
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]], timeout: Optional[float] = None) -> Any:
+        """
+        הרצת fn() עבור key, או המתנה ל-task שכבר רץ עבור אותו key
+
+        ביטול של ממתין בודד לא מבטל את ה-task המשותף. timeout מגביל רק המתנה ל-task של קורא אחר.
+        """
+        loop = asyncio.get_running_loop()
+        task_key = (id(loop), key)
+        task = self._tasks.get(task_key)
+        if task is None or task.done():
+            task = loop.create_task(fn())
+            self._tasks[task_key] = task
+            self.executed += 1
+
+            def _forget(t, task_key=task_key):
+                if self._tasks.get(task_key) is t:
+                    del self._tasks[task_key]
+
+            task.add_done_callback(_forget)
+        else:
+            self.coalesced += 1
+            if timeout is not None:
+                try:
+                    return await asyncio.wait_for(asyncio.shield(task), timeout)
+                except asyncio.TimeoutError:
+                    if task.done():
+                        raise  # השגיאה של ה-task עצמו
+                    raise WaitTimeout(f"Shared call for {key} still running after {timeout:.2f}s") from None
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: str) -> bool:
+        """האם יש task פעיל עבור key ב-event loop הנוכחי"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        task = self._tasks.get((id(loop), key))
+        return task is not None and not task.done()
+
+    def get_stats(self) -> Dict[str, int]:
+        """סטטיסטיקות איחוד בקשות"""
+        return {
+            "in_flight": len(self._tasks),
+            "executed": self.executed,
+            "coalesced": self.coalesced
+        }
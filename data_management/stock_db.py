@@ -1,9 +1,33 @@
+import json
 import sqlite3
-from typing import List, Dict, Any, Optional
+import threading
+import zlib
+from datetime import date, timedelta
+from functools import partial
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 DB_PATH = Path(__file__).parent / "stocks.db"
 
+# מחירי intraday_bars נשמרים כמספר שלם ביחידות של 0.0001 (3-4 בתים במקום REAL של 8)
+INTRADAY_PRICE_SCALE = 10_000
+
+# עמודות DataFrame היסטוריה (yfinance) -> עמודות בטבלת stocks
+_FRAME_COLUMNS = {
+    "Open": "open",
+    "High": "high",
+    "Low": "low",
+    "Close": "close",
+    "Volume": "volume",
+    "Adj Close": "adj_close",
+}
+
+# שורות לכל executemany בכתיבה גדולה
+_WRITE_CHUNK_ROWS = 5000
+
+# עמודות ה-OHLCV של stocks (raw_data נשמר בנפרד ב-stock_raw)
+STOCK_COLUMNS = ("symbol", "date", "provider", "open", "high", "low", "close", "volume", "adj_close")
+
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS stocks (
     symbol TEXT NOT NULL,
@@ -15,81 +39,213 @@ CREATE TABLE IF NOT EXISTS stocks (
     close REAL,
     volume INTEGER,
     adj_close REAL,
-    raw_data TEXT,
     PRIMARY KEY (symbol, date, provider)
 );
 CREATE INDEX IF NOT EXISTS idx_symbol_date ON stocks(symbol, date);
+CREATE TABLE IF NOT EXISTS stock_raw (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    provider TEXT,
+    data BLOB NOT NULL,
+    PRIMARY KEY (symbol, date, provider)
+) WITHOUT ROWID;
+-- נרות תוך-יומיים: מפתח (symbol, interval בדקות, ts ב-epoch שניות), ללא rowid -
+-- השורות מאוחסנות ישירות בעץ המפתח, כך שאין אינדקס נוסף ושליפת טווח היא סריקה רציפה.
+-- המחירים ביחידות של 1/INTRADAY_PRICE_SCALE
+CREATE TABLE IF NOT EXISTS intraday_bars (
+    symbol TEXT NOT NULL,
+    interval INTEGER NOT NULL,
+    ts INTEGER NOT NULL,
+    open INTEGER,
+    high INTEGER,
+    low INTEGER,
+    close INTEGER,
+    volume INTEGER,
+    PRIMARY KEY (symbol, interval, ts)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS provider_priority (
+    provider TEXT PRIMARY KEY,
+    rank INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS golden_bars (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    provider TEXT,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    adj_close REAL,
+    sources TEXT,
+    PRIMARY KEY (symbol, date)
+) WITHOUT ROWID;
+-- תחילת ההיסטוריה אצל ספק: בטווח [checked_from, first_date) אין לספק נרות (לפני ההנפקה),
+-- כך שתכנון ההורדה לא מבקש אותו שוב
+CREATE TABLE IF NOT EXISTS history_start (
+    symbol TEXT NOT NULL,
+    provider TEXT NOT NULL,
+    checked_from TEXT NOT NULL,
+    first_date TEXT NOT NULL,
+    PRIMARY KEY (symbol, provider)
+) WITHOUT ROWID;
+"""
+
+# גרסת הסכמה (PRAGMA user_version): 1 - raw_data הועבר מ-stocks ל-stock_raw, 2 - golden_bars
+_SCHEMA_VERSION = 2
+
+# סדר העדיפות ההתחלתי של הספקים באיחוד (ניתן לשינוי ב-set_provider_priority)
+DEFAULT_PROVIDER_PRIORITY = ("yahoo", "polygon", "fmp", "twelvedata", "alphavantage", "finnhub", "fred")
+
+# עמודות ה-OHLCV שמאוחדות: לכל עמודה - הערך של הספק העדיף שיש לו ערך
+_MERGED_FIELDS = ("open", "high", "low", "close", "volume", "adj_close")
+GOLDEN_COLUMNS = ("symbol", "date", "provider") + _MERGED_FIELDS + ("sources",)
+
+# איחוד הספקים בתוך SQLite: שורה אחת ל-(symbol, תאריך). provider הוא הספק העדיף של התאריך,
+# sources - כל הספקים לפי סדר העדיפות. ספק שאינו ב-provider_priority בא אחרי כולם
+_MERGE_SQL = """
+SELECT symbol, day, provider, {fields}, sources FROM (
+    SELECT symbol, day, provider,
+        {windows},
+        group_concat(provider, ',') OVER (PARTITION BY symbol, day ORDER BY rank, provider
+                                          ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING) AS sources,
+        row_number() OVER (PARTITION BY symbol, day ORDER BY rank, provider) AS n
+    FROM (
+        SELECT s.symbol, substr(s.date, 1, 10) AS day, s.provider, {source_fields},
+               COALESCE(p.rank, 1000000) AS rank
+        FROM stocks s LEFT JOIN provider_priority p ON p.provider = s.provider
+        WHERE {{where}}
+    )
+) WHERE n = 1
+""".format(
+    fields=", ".join(_MERGED_FIELDS),
+    windows=",\n        ".join(
+        f"first_value({f}) OVER (PARTITION BY symbol, day ORDER BY {f} IS NULL, rank, provider) AS {f}"
+        for f in _MERGED_FIELDS),
+    source_fields=", ".join(f"s.{f}" for f in _MERGED_FIELDS),
+)
+
+# תאריך עם ספק יחיד (רוב הנרות) נעתק כמו שהוא בלי חלונות; _MERGE_SQL רץ רק על תאריכים עם כמה ספקים
+_SINGLE_SOURCE_SQL = f"""
+SELECT symbol, substr(date, 1, 10), provider, {', '.join(_MERGED_FIELDS)}, provider
+FROM stocks s WHERE {{where}}
+GROUP BY symbol, substr(date, 1, 10) HAVING count(*) = 1
 """
+_MULTI_SOURCE_FILTER = """(s.symbol, substr(s.date, 1, 10)) IN (
+    SELECT symbol, substr(date, 1, 10) FROM stocks s WHERE {where}
+    GROUP BY symbol, substr(date, 1, 10) HAVING count(*) > 1
+)"""
+
+# הרשומה הגולמית נדחסת לכל שורה בנפרד. לרשומה קצרה zlib עם מילון מוגדר מראש של המפתחות
+# הנפוצים חוסך הרבה יותר מדחיסה רגילה; zstd משמש אם הספרייה מותקנת.
+# הבית הראשון של ה-blob מציין את הקידוד, כך שאפשר לקרוא blobs ישנים גם אחרי החלפה
+_RAW_ZLIB = b"\x01"
+_RAW_ZSTD = b"\x02"
+_RAW_DICTIONARY = (
+    b'{"symbol": "", "date": " 00:00:00", "provider": "yahoo", "open": , "high": , "low": , '
+    b'"close": , "volume": , "adj_close": , "dividends": 0.0, "stock_splits": 0.0, "Dividends": 0.0, '
+    b'"Stock Splits": 0.0, "Capital Gains": 0.0}'
+)
 
 class StockDB:
-    def get_merged_rows(self, symbol: str, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
+    def get_merged_rows(self, symbol, start_date: str = None, end_date: str = None) -> List[Dict[str, Any]]:
         """
-        מחזיר רשומות מאוחדות לכל סימבול-תאריך, עם מידע משולב מכל הספקים
+        מחזיר רשומות מאוחדות לכל סימבול-תאריך, עם מידע משולב מכל הספקים (מטבלת golden_bars)
+
+        Args:
+            symbol: סימבול או רשימת סימבולים
+            start_date, end_date: תאריכי ISO (כולל)
         """
-        sql = "SELECT * FROM stocks WHERE symbol = ?"
-        params = [symbol]
+        cur = self._golden_cursor(symbol, start_date, end_date)
+        columns = [desc[0] for desc in cur.description]
+        rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+        for d in rows:
+            d["sources"] = d["sources"].split(",") if d["sources"] else []
+        return rows
+
+    def get_merged_frame(self, symbol, start_date: str = None, end_date: str = None):
+        """
+        הנרות המאוחדים כ-DataFrame עם עמודות symbol ו-date (date כ-datetime64), ממוין לפי symbol ו-date
+        """
+        import pandas as pd
+
+        frame = pd.DataFrame(self._golden_cursor(symbol, start_date, end_date).fetchall(),
+                             columns=list(GOLDEN_COLUMNS))
+        frame["date"] = pd.to_datetime(frame["date"], format="%Y-%m-%d")
+        for field in _MERGED_FIELDS:
+            frame[field] = frame[field].astype("float64")  # None -> NaN
+        return frame
+
+    def _golden_cursor(self, symbol, start_date: str = None, end_date: str = None):
+        symbols = [symbol] if isinstance(symbol, str) else list(symbol)
+        sql = f"SELECT {', '.join(GOLDEN_COLUMNS)} FROM golden_bars WHERE symbol IN ({', '.join('?' * len(symbols))})"
+        params: List[Any] = list(symbols)
         if start_date:
             sql += " AND date >= ?"
-            params.append(start_date)
+            params.append(start_date[:10])
         if end_date:
             sql += " AND date <= ?"
-            params.append(end_date)
-        sql += " ORDER BY date ASC"
-        cur = self.conn.execute(sql, params)
-        columns = [desc[0] for desc in cur.description]
-        # איחוד לפי (symbol, date)
-        merged = {}
-        for row in cur.fetchall():
-            d = dict(zip(columns, row))
-            key = (d["symbol"], d["date"])
-            # Parse raw_data JSON if needed
-            if d.get("raw_data"):
-                import json
-                try:
-                    d["raw_data"] = json.loads(d["raw_data"])
-                except Exception:
-                    pass
-            if key not in merged:
-                merged[key] = {**d, "sources": [d["provider"]]}
-            else:
-                # עדכן שדות חסרים/ריקים מהספק הנוסף
-                for field in ["open", "high", "low", "close", "volume", "adj_close"]:
-                    if merged[key].get(field) is None and d.get(field) is not None:
-                        merged[key][field] = d[field]
-                merged[key]["sources"].append(d["provider"])
-                # אפשר להוסיף איחוד raw_data לפי צורך
-        return list(merged.values())
+            params.append(end_date[:10])
+        sql += " ORDER BY symbol ASC, date ASC"
+        return self.conn.execute(sql, params)
+
+    def get_provider_priority(self) -> List[str]:
+        """סדר העדיפות של הספקים באיחוד"""
+        return [row[0] for row in self.conn.execute("SELECT provider FROM provider_priority ORDER BY rank ASC")]
+
+    def set_provider_priority(self, providers: List[str]):
+        """קביעת סדר העדיפות ובניית golden_bars מחדש"""
+        ranks = [(provider, rank) for rank, provider in enumerate(dict.fromkeys(providers))]
+
+        def write(conn):
+            conn.execute("DELETE FROM provider_priority")
+            conn.executemany("INSERT INTO provider_priority (provider, rank) VALUES (?, ?)", ranks)
+            _refresh_golden(conn)
+
+        self._writer.execute(write)
+        self.columns.clear()
+
+    def rebuild_golden_bars(self):
+        """בנייה מלאה של golden_bars מ-stocks"""
+        self._writer.execute(_refresh_golden)
+        self.columns.clear()
+
     def __init__(self, db_path: Optional[str] = None):
+        from .db_writer import get_writer
+
         self.db_path = str(db_path) if db_path else str(DB_PATH)
-        self.conn = sqlite3.connect(self.db_path)
-        self.conn.execute("PRAGMA journal_mode=WAL;")
-        self.conn.execute("PRAGMA synchronous=NORMAL;")
-        # פיצול לשתי קריאות execute
-        self.conn.execute("""
-        CREATE TABLE IF NOT EXISTS stocks (
-            symbol TEXT NOT NULL,
-            date TEXT NOT NULL,
-            provider TEXT,
-            open REAL,
-            high REAL,
-            low REAL,
-            close REAL,
-            volume INTEGER,
-            adj_close REAL,
-            raw_data TEXT,
-            PRIMARY KEY (symbol, date, provider)
-        );
-        """)
-        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_symbol_date ON stocks(symbol, date);")
-        self.conn.commit()
-
-    def insert_rows(self, rows: List[Dict[str, Any]], provider: Optional[str] = None):
-        import json
-        sql = """
-        INSERT OR REPLACE INTO stocks (symbol, date, provider, open, high, low, close, volume, adj_close, raw_data)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        self._columns = None
+        # חיבור קריאה לכל thread; כל הכתיבות עוברות דרך ה-writer המשותף של הקובץ
+        self._local = threading.local()
+        self._writer = get_writer(self.db_path, setup=partial(_setup_database, db_path=self.db_path))
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """חיבור הקריאה של ה-thread הנוכחי (query_only - כתיבה רק דרך ה-writer)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            from .db_writer import connect
+            conn = connect(self.db_path)
+            conn.execute("PRAGMA query_only = ON")
+            self._local.conn = conn
+        return conn
+
+    def get_write_stats(self) -> Dict[str, Any]:
+        """מדדי ה-writer של הקובץ (קצב, גודל טרנזקציות, השהיה)"""
+        return self._writer.get_stats()
+
+    def insert_rows(self, rows: List[Dict[str, Any]], provider: Optional[str] = None, wait: bool = True):
+        """
+        כתיבת שורות יומיות (דרך ה-writer - שורות מכמה קוראים נכתבות יחד בטרנזקציה אחת)
+
+        Args:
+            wait: False - חזרה מיד עם Future שמסתיים אחרי ה-commit (ליצרנים שכותבים הרבה)
+
+        Returns:
+            מספר השורות שנכתבו (או Future שמחזיר אותו כש-wait=False)
         """
         data = []
+        raw = []
         for row in rows:
             symbol = row.get("symbol")
             date = row.get("date")
@@ -99,14 +255,186 @@ class StockDB:
             close = row.get("close")
             volume = row.get("volume")
             adj_close = row.get("adj_close")
-            raw_data = json.dumps(row, ensure_ascii=False)
             prov = provider if provider else row.get("provider")
-            data.append((symbol, date, prov, open_, high, low, close, volume, adj_close, raw_data))
-        self.conn.executemany(sql, data)
-        self.conn.commit()
+            data.append((symbol, date, prov, open_, high, low, close, volume, adj_close))
+            raw.append((symbol, date, prov, _encode_raw(row)))
+        return self._write_rows(data, raw, wait)
+
+    def insert_frame(self, symbol: str, provider: str, df, wait: bool = True):
+        """
+        כתיבת DataFrame היסטוריה יומית ישירות מהעמודות (בלי dict לכל שורה)
+
+        Args:
+            df: index של תאריכים (DatetimeIndex, גם עם אזור זמן - נלקח התאריך המקומי) או עמודת Date.
+                עמודות Open/High/Low/Close/Volume/Adj Close (או באותיות קטנות); שאר העמודות
+                (Dividends, Stock Splits...) נשמרות ברשומה הגולמית, רק בשורות שיש בהן ערך שאינו 0
+            wait: כמו ב-insert_rows
+
+        Returns:
+            מספר השורות שנכתבו (או Future שמחזיר אותו כש-wait=False)
+        """
+        import numpy as np
+        import pandas as pd
+
+        if df is None or df.empty:
+            return _done_future(0) if not wait else 0
+        frame = df.rename(columns=lambda c: _FRAME_COLUMNS.get(c, c))
+        if not isinstance(frame.index, pd.DatetimeIndex):
+            date_column = next((c for c in ("date", "Date", "Datetime") if c in frame.columns), None)
+            if date_column is None:
+                raise ValueError("insert_frame needs a DatetimeIndex or a date column")
+            frame = frame.set_index(pd.DatetimeIndex(pd.to_datetime(frame.pop(date_column))))
+        # התאריך המקומי של כל נר (בלי strftime לכל ערך)
+        index = frame.index.tz_localize(None) if frame.index.tz is not None else frame.index
+        dates = np.datetime_as_string(index.values.astype("datetime64[D]"))
+        keep = ~pd.Index(dates).duplicated(keep="last")
+        if not keep.all():
+            frame, dates = frame[keep], dates[keep]
+        n = len(frame)
+
+        def column(name, as_int=False):
+            if name not in frame.columns:
+                return [None] * n
+            values = frame[name].to_numpy(dtype=np.float64, na_value=np.nan)
+            missing = np.isnan(values)
+            if as_int:
+                values = np.where(missing, 0, values).astype(np.int64)
+            if not missing.any():
+                return values.tolist()
+            out = values.astype(object)
+            out[missing] = None
+            return out.tolist()
+
+        dates = dates.tolist()
+        symbols, providers = [symbol] * n, [provider] * n
+        data = list(zip(symbols, dates, providers, column("open"), column("high"), column("low"),
+                        column("close"), column("volume", as_int=True), column("adj_close")))
+
+        # רשומה גולמית רק לשורות שיש בהן ערך בעמודה נוספת (דיבידנד, פיצול...) - בשאר השורות
+        # כל המידע כבר בעמודות stocks, ודחיסת JSON לכל נר היא רוב העלות של הכתיבה
+        extra = [c for c in frame.columns if c not in STOCK_COLUMNS]
+        raw = []
+        if extra:
+            values = frame[extra]
+            numeric = values.select_dtypes(include="number")
+            has_value = values.notna().to_numpy().any(axis=1)
+            if len(numeric.columns) == len(extra):
+                has_value = (numeric.fillna(0) != 0).to_numpy().any(axis=1)
+            names = [str(c) for c in frame.columns]
+            columns = [column(c) if frame[c].dtype.kind in "fiub" else frame[c].astype(object).tolist()
+                       for c in frame.columns]
+            for i in np.flatnonzero(has_value).tolist():
+                record = {"symbol": symbol, "date": dates[i], **{name: col[i] for name, col in zip(names, columns)}}
+                raw.append((symbol, dates[i], provider, _encode_raw(record)))
+        return self._write_rows(data, raw, wait)
+
+    def _write_rows(self, data: List[Tuple], raw: List[Tuple], wait: bool):
+        """
+        כתיבת שורות stocks + stock_raw ועדכון golden_bars כעבודה אחת של ה-writer (טרנזקציה אחת).
+        מחזיר את מספר השורות שנכתבו (או Future שלו כש-wait=False)
+        """
+        sql = """
+        INSERT OR REPLACE INTO stocks (symbol, date, provider, open, high, low, close, volume, adj_close)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        raw_sql = "INSERT OR REPLACE INTO stock_raw (symbol, date, provider, data) VALUES (?, ?, ?, ?)"
+
+        def write(conn):
+            for i in range(0, len(data), _WRITE_CHUNK_ROWS):
+                conn.executemany(sql, data[i:i + _WRITE_CHUNK_ROWS])
+            for i in range(0, len(raw), _WRITE_CHUNK_ROWS):
+                conn.executemany(raw_sql, raw[i:i + _WRITE_CHUNK_ROWS])
+            _refresh_golden_for(conn, data)
+            return len(data)
+
+        keys = {(row[0], row[2]) for row in data}
+        future = self._writer.submit(write, rows=len(data), on_commit=lambda: self._invalidate_columns(keys))
+        if not wait:
+            return future
+        return future.result()
 
-    def query(self, symbol: str, start_date: str = None, end_date: str = None, filters: Dict[str, Any] = None, provider: Optional[str] = None) -> List[Dict[str, Any]]:
-        sql = "SELECT * FROM stocks WHERE symbol = ?"
+    @property
+    def columns(self):
+        """העותק העמודתי של הנרות (תיקייה <db>.columns ליד קובץ ה-SQLite)"""
+        if self._columns is None:
+            from .columnar_store import ColumnarStore
+            self._columns = ColumnarStore(Path(self.db_path).with_suffix(".columns"))
+        return self._columns
+
+    def _invalidate_columns(self, keys):
+        """מחיקת העותקים העמודתיים של (symbol, provider) שנכתבו, ושל הנרות המאוחדים שלהם"""
+        for symbol, provider in keys:
+            self.columns.invalidate(symbol, provider)
+        for symbol in {symbol for symbol, _ in keys}:
+            self.columns.invalidate(symbol, None)
+
+    def _load_columns(self, symbol: str, provider: Optional[str]):
+        """העמודות של (symbol, provider) מהעותק העמודתי - נבנות מה-SQLite אם אין עותק"""
+        columns = self.columns.read(symbol, provider)
+        if columns is not None:
+            return columns
+        import numpy as np
+        from .columnar_store import rows_to_columns
+
+        # הדור נקרא לפני ה-SELECT: כתיבה שתסתיים עד שהעותק נשמר תפסול אותו
+        generation = self.columns.generation(symbol, provider)
+        # ללא ספק: הנרות המאוחדים מ-golden_bars
+        table = "stocks" if provider else "golden_bars"
+        sql = f"SELECT date, open, high, low, close, adj_close, volume FROM {table} WHERE symbol = ? AND date IS NOT NULL"
+        params = [symbol]
+        if provider:
+            sql += " AND provider = ?"
+            params.append(provider)
+        sql += " ORDER BY date ASC"
+        columns = rows_to_columns(self.conn.execute(sql, params).fetchall())
+        dates = columns["date"]
+        if len(dates) > 1:
+            keep = np.concatenate(([True], dates[1:] != dates[:-1]))
+            if not keep.all():
+                columns = {name: values[keep] for name, values in columns.items()}
+        self.columns.write(symbol, provider, columns, generation)
+        return columns
+
+    def query_arrays(self, symbol: str, start_date: str = None, end_date: str = None,
+                     provider: Optional[str] = None, columns: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        נרות יומיים כמערכי NumPy רציפים (views על memmap, ללא אובייקט Python לשורה)
+
+        Returns:
+            dict של עמודה -> מערך: date (datetime64[D]), open/high/low/close/adj_close (float64, NaN = חסר),
+            volume (int64)
+        """
+        from .columnar_store import COLUMNS, slice_dates
+
+        data = self._load_columns(symbol, provider)
+        first, last = slice_dates(data, start_date, end_date)
+        result = {}
+        for name in columns or COLUMNS:
+            values = data[name][first:last]
+            result[name] = values.view("datetime64[D]") if name == "date" else values
+        return result
+
+    def query_frame(self, symbol: str, start_date: str = None, end_date: str = None,
+                    provider: Optional[str] = None, columns: Optional[List[str]] = None):
+        """כמו query_arrays, כ-DataFrame עם index לפי date (העמודות אינן מועתקות)"""
+        import pandas as pd
+        from .columnar_store import PRICE_COLUMNS
+
+        names = [name for name in (columns or PRICE_COLUMNS + ("volume",)) if name != "date"]
+        arrays = self.query_arrays(symbol, start_date, end_date, provider, ["date"] + names)
+        index = pd.DatetimeIndex(arrays.pop("date").astype("datetime64[s]"), name="date")
+        return pd.DataFrame(arrays, index=index, copy=False)
+
+    def query(self, symbol: str, start_date: str = None, end_date: str = None, filters: Dict[str, Any] = None,
+              provider: Optional[str] = None, include_raw: bool = False) -> List[Dict[str, Any]]:
+        """
+        שורות stocks כ-dict לכל שורה
+
+        Args:
+            include_raw: הוספת raw_data (הרשומה הגולמית, מפוענחת מ-stock_raw). ברירת המחדל
+                         קוראת רק את עמודות ה-OHLCV
+        """
+        sql = f"SELECT {', '.join(STOCK_COLUMNS)} FROM stocks WHERE symbol = ?"
         params = [symbol]
         if start_date:
             sql += " AND date >= ?"
@@ -124,22 +452,363 @@ class StockDB:
         sql += " ORDER BY date ASC"
         cur = self.conn.execute(sql, params)
         columns = [desc[0] for desc in cur.description]
-        results = []
-        for row in cur.fetchall():
-            d = dict(zip(columns, row))
-            # Parse raw_data JSON if needed
-            if d.get("raw_data"):
-                import json
-                try:
-                    d["raw_data"] = json.loads(d["raw_data"])
-                except Exception:
-                    pass
-            results.append(d)
+        results = [dict(zip(columns, row)) for row in cur.fetchall()]
+        if include_raw and results:
+            raw = self._raw_blobs(symbol, start_date, end_date, provider)
+            for d in results:
+                blob = raw.get((d["date"], d["provider"]))
+                d["raw_data"] = _decode_raw(blob) if blob is not None else None
         return results
 
+    def get_raw_data(self, symbol: str, date: str, provider: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """הרשומה הגולמית של שורה אחת (None אם אין)"""
+        sql = "SELECT data FROM stock_raw WHERE symbol = ? AND date = ?"
+        params = [symbol, date]
+        if provider:
+            sql += " AND provider = ?"
+            params.append(provider)
+        row = self.conn.execute(sql, params).fetchone()
+        return _decode_raw(row[0]) if row else None
+
+    def _raw_blobs(self, symbol: str, start_date: str = None, end_date: str = None,
+                   provider: Optional[str] = None) -> Dict[Tuple[str, str], bytes]:
+        """(date, provider) -> blob דחוס, לטווח של שאילתה"""
+        sql = "SELECT date, provider, data FROM stock_raw WHERE symbol = ?"
+        params = [symbol]
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            sql += " AND date <= ?"
+            params.append(end_date)
+        if provider:
+            sql += " AND provider = ?"
+            params.append(provider)
+        return {(d, prov): blob for d, prov, blob in self.conn.execute(sql, params)}
+
+    def get_dates(self, symbol: str, provider: Optional[str] = None, start_date: str = None, end_date: str = None) -> List[str]:
+        """התאריכים (YYYY-MM-DD) שיש להם רשומה עבור symbol, ממוינים"""
+        sql = "SELECT DISTINCT substr(date, 1, 10) AS d FROM stocks WHERE symbol = ? AND date IS NOT NULL"
+        params = [symbol]
+        if provider:
+            sql += " AND provider = ?"
+            params.append(provider)
+        if start_date:
+            sql += " AND date >= ?"
+            params.append(start_date)
+        if end_date:
+            # תאריך עם שעה (2024-01-05 00:00:00) גדול מ-2024-01-05 כמחרוזת
+            sql += " AND substr(date, 1, 10) <= ?"
+            params.append(end_date)
+        sql += " ORDER BY d ASC"
+        return [row[0] for row in self.conn.execute(sql, params).fetchall()]
+
+    def get_date_ranges(self, symbol: str, provider: Optional[str] = None, max_gap_days: int = 1) -> List[Tuple[str, str]]:
+        """
+        טווחי התאריכים הרציפים הקיימים במסד עבור (symbol, provider)
+        פער של עד max_gap_days ימי מסחר חסרים (חגים) לא שובר את הרצף
+        """
+        ranges: List[Tuple[str, str]] = []
+        prev = None
+        for d in self.get_dates(symbol, provider):
+            if prev is not None and _business_days_between(prev, d) <= max_gap_days:
+                ranges[-1] = (ranges[-1][0], d)
+            else:
+                ranges.append((d, d))
+            prev = d
+        return ranges
+
+    def find_missing_ranges(self, symbol: str, start_date: str, end_date: str, provider: Optional[str] = None,
+                            max_gap_days: int = 1) -> List[Tuple[str, str]]:
+        """
+        טווחי התאריכים בתוך [start_date, end_date] שחסרים במסד (בתחילה, בסוף ובאמצע)
+
+        Args:
+            max_gap_days: פער פנימי או בתחילת הטווח של עד כמה ימי מסחר נחשב לחג ולא לחוסר.
+                          בסוף הטווח כל יום מסחר חסר נחשב (כדי שעדכון יומי יוריד את היום האחרון)
+        """
+        start_date, end_date = start_date[:10], end_date[:10]
+        known = self.get_history_start(symbol, provider) if provider is not None else None
+        if known is not None and known[0] <= start_date:
+            # הספק כבר החזיר שאין לו נרות לפני first_date
+            start_date = max(start_date, known[1])
+            if start_date > end_date:
+                return []
+        dates = self.get_dates(symbol, provider, start_date, end_date)
+        if not dates:
+            return [(start_date, end_date)] if _business_days_between(_previous_day(start_date), _next_day(end_date)) else []
+
+        missing: List[Tuple[str, str]] = []
+        if _business_days_between(_previous_day(start_date), dates[0]) > max_gap_days:
+            missing.append((start_date, _previous_day(dates[0])))
+        for prev, current in zip(dates, dates[1:]):
+            if _business_days_between(prev, current) > max_gap_days:
+                missing.append((_next_day(prev), _previous_day(current)))
+        if _business_days_between(dates[-1], _next_day(end_date)) > 0:
+            missing.append((_next_day(dates[-1]), end_date))
+        return missing
+
+    def get_history_start(self, symbol: str, provider: str) -> Optional[Tuple[str, str]]:
+        """(checked_from, first_date) - הספק אין לו נרות של הסימבול בטווח [checked_from, first_date), או None"""
+        row = self.conn.execute(
+            "SELECT checked_from, first_date FROM history_start WHERE symbol = ? AND provider = ?", (symbol, provider)
+        ).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def set_history_start(self, symbol: str, provider: str, checked_from: str, first_date: str):
+        """סימון [checked_from, first_date) כטווח שאין בו נרות אצל הספק (מרחיב סימון קיים)"""
+        checked_from, first_date = checked_from[:10], first_date[:10]
+        known = self.get_history_start(symbol, provider)
+        if known is not None and known[0] <= checked_from and known[1] >= first_date:
+            return
+        if known is not None and known[1] >= checked_from and known[0] <= first_date:
+            checked_from, first_date = min(checked_from, known[0]), max(first_date, known[1])
+
+        def write(conn):
+            conn.execute("INSERT OR REPLACE INTO history_start (symbol, provider, checked_from, first_date) "
+                         "VALUES (?, ?, ?, ?)", (symbol, provider, checked_from, first_date))
+
+        self._writer.execute(write)
+
+    def insert_intraday(self, symbol: str, interval: int, bars: List[Tuple]) -> int:
+        """
+        שמירת נרות תוך-יומיים בטרנזקציה אחת
+
+        Args:
+            interval: אורך הנר בדקות
+            bars: שורות (ts, open, high, low, close, volume) - ts ב-epoch שניות (ראו intraday.frame_to_bars)
+        """
+        sql = """
+        INSERT OR REPLACE INTO intraday_bars (symbol, interval, ts, open, high, low, close, volume)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        scale = INTRADAY_PRICE_SCALE
+
+        def scaled(price):
+            return None if price is None else round(price * scale)
+
+        data = [(symbol, interval, ts, scaled(open_), scaled(high), scaled(low), scaled(close), volume)
+                for ts, open_, high, low, close, volume in bars]
+        self._writer.execute(lambda conn: conn.executemany(sql, data), rows=len(data))
+        return len(data)
+
+    def query_intraday(self, symbol: str, interval: int, start_ts: int = None, end_ts: int = None):
+        """
+        נרות תוך-יומיים כ-DataFrame עם index של זמן UTC
+
+        Args:
+            start_ts, end_ts: טווח epoch בשניות [start_ts, end_ts)
+        """
+        import numpy as np
+        import pandas as pd
+
+        sql = "SELECT ts, open, high, low, close, volume FROM intraday_bars WHERE symbol = ? AND interval = ?"
+        params = [symbol, interval]
+        if start_ts is not None:
+            sql += " AND ts >= ?"
+            params.append(int(start_ts))
+        if end_ts is not None:
+            sql += " AND ts < ?"
+            params.append(int(end_ts))
+        sql += " ORDER BY ts ASC"
+        rows = self.conn.execute(sql, params).fetchall()
+        values = np.array(rows, dtype=np.float64).reshape(len(rows), 6)
+        values[:, 1:5] /= INTRADAY_PRICE_SCALE
+        index = pd.to_datetime(values[:, 0].astype(np.int64), unit="s", utc=True)
+        return pd.DataFrame(values[:, 1:], index=pd.Index(index, name="ts"),
+                            columns=["open", "high", "low", "close", "volume"])
+
+    def get_intraday_bounds(self, symbol: str, interval: int) -> Optional[Tuple[int, int]]:
+        """ה-ts הראשון והאחרון השמורים עבור (symbol, interval), או None"""
+        row = self.conn.execute(
+            "SELECT MIN(ts), MAX(ts) FROM intraday_bars WHERE symbol = ? AND interval = ?", (symbol, interval)
+        ).fetchone()
+        return None if row is None or row[0] is None else (row[0], row[1])
+
     def get_symbols(self) -> List[str]:
         cur = self.conn.execute("SELECT DISTINCT symbol FROM stocks")
         return [row[0] for row in cur.fetchall()]
 
     def close(self):
-        self.conn.close()
+        """סגירת חיבור הקריאה של ה-thread הנוכחי (ה-writer המשותף ממשיך לשרת מופעים אחרים)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_shared: Dict[str, StockDB] = {}
+_shared_lock = threading.Lock()
+
+
+def get_stock_db(db_path: Optional[str] = None) -> StockDB:
+    """מופע StockDB משותף לקובץ (בטוח לשימוש מכמה threads - חיבור קריאה לכל thread)"""
+    key = str(db_path) if db_path else str(DB_PATH)
+    with _shared_lock:
+        db = _shared.get(key)
+        if db is None:
+            db = StockDB(key)
+            _shared[key] = db
+        return db
+
+
+def _business_days_between(first: str, last: str) -> int:
+    """מספר ימי החול (ב'-ו') שבין שני תאריכים, לא כולל שניהם"""
+    day = date.fromisoformat(first[:10]) + timedelta(days=1)
+    end = date.fromisoformat(last[:10])
+    if day >= end:
+        return 0
+    # שבועות שלמים + שארית
+    total = (end - day).days
+    weeks, rest = divmod(total, 7)
+    count = weeks * 5
+    for i in range(rest):
+        if (day + timedelta(days=weeks * 7 + i)).weekday() < 5:
+            count += 1
+    return count
+
+
+def _next_day(d: str) -> str:
+    return (date.fromisoformat(d[:10]) + timedelta(days=1)).isoformat()
+
+
+def _previous_day(d: str) -> str:
+    return (date.fromisoformat(d[:10]) - timedelta(days=1)).isoformat()
+
+
+_zstd_module = False  # False - עוד לא נבדק
+
+
+def _zstd():
+    """(מודול zstandard, המילון) אם הספרייה מותקנת, אחרת None"""
+    global _zstd_module
+    if _zstd_module is False:
+        try:
+            import zstandard
+        except ImportError:
+            _zstd_module = None
+        else:
+            _zstd_module = (zstandard, zstandard.ZstdCompressionDict(_RAW_DICTIONARY,
+                                                                     dict_type=zstandard.DICT_TYPE_RAWCONTENT))
+    return _zstd_module
+
+
+def _encode_raw(row: Dict[str, Any]) -> bytes:
+    """רשומה גולמית -> blob דחוס"""
+    return _encode_raw_text(json.dumps(row, ensure_ascii=False, default=str))
+
+
+def _encode_raw_text(text: str) -> bytes:
+    data = text.encode("utf-8")
+    zstd = _zstd()
+    if zstd is not None:
+        module, dictionary = zstd
+        return _RAW_ZSTD + module.ZstdCompressor(dict_data=dictionary).compress(data)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=_RAW_DICTIONARY)
+    return _RAW_ZLIB + compressor.compress(data) + compressor.flush()
+
+
+def _decode_raw(blob: bytes) -> Any:
+    """blob דחוס -> הרשומה הגולמית (JSON מפוענח; מחרוזת אם אינו JSON תקין)"""
+    codec, payload = blob[:1], blob[1:]
+    if codec == _RAW_ZSTD:
+        zstd = _zstd()
+        if zstd is None:
+            raise RuntimeError("raw_data was compressed with zstd, but the zstandard package is not installed")
+        module, dictionary = zstd
+        data = module.ZstdDecompressor(dict_data=dictionary).decompress(payload)
+    else:
+        decompressor = zlib.decompressobj(-15, zdict=_RAW_DICTIONARY)
+        data = decompressor.decompress(payload) + decompressor.flush()
+    text = data.decode("utf-8")
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _setup_database(conn: sqlite3.Connection, db_path: str):
+    """יצירת הסכמה ושדרוג מסד קיים - רץ ב-writer פעם אחת לכל קובץ, לפני הכתיבה הראשונה"""
+    conn.executescript(CREATE_TABLE_SQL)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= _SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _migrate(conn, version)
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    if version < 2:
+        # עותקים עמודתיים מאוחדים שנבנו לפני golden_bars
+        from .columnar_store import ColumnarStore
+        ColumnarStore(Path(db_path).with_suffix(".columns")).clear()
+
+
+def _migrate(conn: sqlite3.Connection, version: int):
+    """שדרוג סכמה לפי PRAGMA user_version (בתוך טרנזקציה)"""
+    if version < 1:
+        _migrate_raw_data(conn)
+    if version < 2:
+        if not conn.execute("SELECT 1 FROM provider_priority LIMIT 1").fetchone():
+            conn.executemany("INSERT INTO provider_priority (provider, rank) VALUES (?, ?)",
+                             [(p, rank) for rank, p in enumerate(DEFAULT_PROVIDER_PRIORITY)])
+        _refresh_golden(conn)
+
+
+def _migrate_raw_data(conn: sqlite3.Connection):
+    """העברת raw_data (JSON בתוך stocks) של מסד ישן ל-stock_raw הדחוסה והסרת העמודה"""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(stocks)")]
+    if "raw_data" not in columns:
+        return
+    cur = conn.execute("SELECT symbol, date, provider, raw_data FROM stocks WHERE raw_data IS NOT NULL")
+    while True:
+        batch = cur.fetchmany(5000)
+        if not batch:
+            break
+        conn.executemany(
+            "INSERT OR REPLACE INTO stock_raw (symbol, date, provider, data) VALUES (?, ?, ?, ?)",
+            [(symbol, d, prov, _encode_raw_text(text)) for symbol, d, prov, text in batch])
+    try:
+        conn.execute("ALTER TABLE stocks DROP COLUMN raw_data")
+    except sqlite3.OperationalError:
+        # SQLite ישן (לפני 3.35) - העמודה נשארת ריקה
+        conn.execute("UPDATE stocks SET raw_data = NULL")
+
+
+def _refresh_golden(conn: sqlite3.Connection, symbol: str = None, start_date: str = None, end_date: str = None):
+    """
+    חישוב מחדש של golden_bars - לכל המסד, או לסימבול בטווח תאריכים (בתוך טרנזקציה קיימת)
+    """
+    where, params = "1", []
+    if symbol is not None:
+        where, params = "s.symbol = ? AND s.date >= ? AND substr(s.date, 1, 10) <= ?", [symbol, start_date, end_date]
+        conn.execute("DELETE FROM golden_bars WHERE symbol = ? AND date BETWEEN ? AND ?", (symbol, start_date, end_date))
+    else:
+        conn.execute("DELETE FROM golden_bars")
+    insert = f"INSERT OR REPLACE INTO golden_bars ({', '.join(GOLDEN_COLUMNS)}) "
+    conn.execute(insert + _SINGLE_SOURCE_SQL.format(where=where), params)
+    multi_where = f"{where} AND {_MULTI_SOURCE_FILTER.format(where=where)}"
+    conn.execute(insert + _MERGE_SQL.format(where=multi_where), params + params)
+
+
+def _refresh_golden_for(conn: sqlite3.Connection, data: List[Tuple]):
+    """עדכון golden_bars לטווח התאריכים שנכתב לכל סימבול (שורות בפורמט של insert_rows)"""
+    spans: Dict[str, Tuple[str, str]] = {}
+    for row in data:
+        symbol, day = row[0], (row[1] or "")[:10]
+        if not day:
+            continue
+        first, last = spans.get(symbol, (day, day))
+        spans[symbol] = (min(first, day), max(last, day))
+    for symbol, (first, last) in spans.items():
+        _refresh_golden(conn, symbol, first, last)
+
+
+def _done_future(value: Any):
+    from concurrent.futures import Future
+    future = Future()
+    future.set_result(value)
+    return future
@@ -0,0 +1,135 @@
+"""
+בדיקת המסלול האסינכרוני מול שרת HTTP מקומי (aiohttp.web) - הספקים מופנים אליו דרך base_url
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("aiohttp")
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from core.config import config
+from data_management.data_router import DataRequest, DataRouter
+from data_management.providers.finnhub_provider import FinnhubProvider
+from data_management.providers.fmp_provider import FMPProvider
+from data_management.rate_limiter import TokenBucketLimiter
+
+
+def _make_app(hits):
+    """FMP תחת /fmp, Finnhub תחת /finnhub, ו-/down שמחזיר 503 לכל בקשה"""
+
+    async def fmp_quote(request):
+        hits.append(request.path)
+        symbols = request.match_info["symbols"].split(",")
+        return web.json_response([
+            {"symbol": s, "price": 100.0 + i, "volume": 1000, "change": 1.0, "changesPercentage": 1.0}
+            for i, s in enumerate(symbols) if s != "NOPE"
+        ])
+
+    async def finnhub_quote(request):
+        hits.append(request.path)
+        return web.json_response({"c": 17.5})
+
+    async def down(request):
+        hits.append(request.path)
+        return web.json_response({"error": "unavailable"}, status=503)
+
+    app = web.Application()
+    app.router.add_get("/fmp/quote/{symbols}", fmp_quote)
+    app.router.add_get("/finnhub/quote", finnhub_quote)
+    app.router.add_get("/down/{tail:.*}", down)
+    return app
+
+
+def _provider(cls, base_url):
+    """ספק עם מפתח בדיקה, כתובת השרת המקומי ומגביל קצב שלא מעכב את הבדיקה"""
+    provider = cls()
+    provider.api_key = "test"
+    provider.base_url = base_url
+    provider._rate_limiter = TokenBucketLimiter(provider.name, per_second=1000)
+    return provider
+
+
+@pytest.fixture
+def router(monkeypatch):
+    """DataRouter בלי מטמון דיסק (כדי שערכים מהרצה קודמת לא יוגשו)"""
+    monkeypatch.setattr(config.data, "disk_cache_enabled", False)
+    return DataRouter()
+
+
+def _run_with_server(scenario):
+    """הרצת scenario(server_url, hits) מול שרת מקומי שעולה ויורד סביבו"""
+    async def main():
+        hits = []
+        server = TestServer(_make_app(hits), host="127.0.0.1")
+        await server.start_server()
+        try:
+            return await scenario(str(server.make_url("")).rstrip("/"), hits)
+        finally:
+            await server.close()
+    return asyncio.run(main())
+
+
+def test_provider_quotes_async(router):
+    async def scenario(url, hits):
+        fmp = _provider(FMPProvider, f"{url}/fmp")
+        try:
+            quote = await fmp.get_quote_async("AAPL")
+            quotes = await fmp.get_quotes_async(["AAPL", "MSFT", "NOPE"])
+        finally:
+            await fmp.close_async()
+        return quote, quotes, hits
+
+    quote, quotes, hits = _run_with_server(scenario)
+    assert quote.symbol == "AAPL" and quote.price == 100.0
+    assert set(quotes) == {"AAPL", "MSFT"}
+    assert quotes["MSFT"].price == 101.0
+    # כל הסימבולים של ה-batch בבקשה אחת
+    assert hits == ["/fmp/quote/AAPL", "/fmp/quote/AAPL,MSFT,NOPE"]
+
+
+def test_router_quote_async(router):
+    router._routing_config["quote"] = {"primary": "fmp", "fallback": [], "cache_ttl": 30,
+                                       "max_retries": 0, "deadline_ms": 5000}
+
+    async def scenario(url, hits):
+        fmp = _provider(FMPProvider, f"{url}/fmp")
+        router.register_provider("fmp", fmp)
+        try:
+            first = await router.get_quote_async("AAPL")
+            second = await router.get_quote_async("AAPL")
+        finally:
+            await fmp.close_async()
+        return first, second, hits
+
+    first, second, hits = _run_with_server(scenario)
+    assert first.price == 100.0
+    assert second.price == 100.0
+    assert hits == ["/fmp/quote/AAPL"]  # הבקשה השנייה מה-cache
+
+
+def test_router_data_async_falls_back_on_failure(router):
+    router._routing_config["VIX"] = {"primary": "fmp", "fallback": ["finnhub"], "cache_ttl": 300,
+                                     "max_retries": 0, "deadline_ms": 5000, "adaptive_ranking": False,
+                                     "hedge": {"enabled": False}}
+
+    async def scenario(url, hits):
+        fmp = _provider(FMPProvider, f"{url}/down")
+        finnhub = _provider(FinnhubProvider, f"{url}/finnhub")
+        router.register_provider("fmp", fmp)
+        router.register_provider("finnhub", finnhub)
+        try:
+            data = await router.get_data_async(DataRequest(data_type="VIX"))
+        finally:
+            await fmp.close_async()
+            await finnhub.close_async()
+        return data, hits
+
+    data, hits = _run_with_server(scenario)
+    assert data is not None and data.price == 17.5
+    assert hits[0].startswith("/down/quote/")
+    assert hits[-1] == "/finnhub/quote"
+    # ה-503 נספר ככישלון של fmp
+    assert router._breakers.get("fmp", "VIX").get_stats()["failure_rate"] > 0
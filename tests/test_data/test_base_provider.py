@@ -0,0 +1,107 @@
+"""
+BaseProvider._fetch_json - בקשות זהות במקביל חולקות קריאה, וכל קורא מקבל את השגיאה לפי ה-scope שלו
+"""
+
+import threading
+import time
+
+import pytest
+
+from data_management.providers.base_provider import BaseProvider
+from data_management.rate_limiter import TokenBucketLimiter
+from data_management.retry_policy import Deadline, DeadlineExceeded, request_scope
+
+
+class FakeJsonProvider(BaseProvider):
+    """ספק שבו ה-GET ממתין ל-release ואז זורק error (או מחזיר payload)"""
+
+    def __init__(self, error=None, payload=None):
+        super().__init__(name="FakeJson")
+        self._rate_limiter = TokenBucketLimiter(self.name, per_second=1000)
+        self.entered, self.release = threading.Event(), threading.Event()
+        self.error, self.payload = error, payload
+        self.calls = 0
+
+    def _http_get_json(self, url, params):
+        self.calls += 1
+        self.entered.set()
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return self.payload
+
+    def _fetch_data(self):
+        return None
+
+    def get_vix(self):
+        return None
+
+    def get_quote(self, symbol):
+        return None
+
+    def fetch(self):
+        return self._fetch_json("key", "http://test/x", {}, lambda data: data, default="default")
+
+
+def _leader_and_waiter(provider, leader_scope, waiter_scope):
+    """leader מתחיל את הקריאה, waiter מצטרף אליה; מחזיר (תוצאה או שגיאה) של כל אחד"""
+    outcomes = {}
+
+    def run(name, scope):
+        try:
+            with scope():
+                outcomes[name] = provider.fetch()
+        except Exception as e:
+            outcomes[name] = e
+
+    leader = threading.Thread(target=run, args=("leader", leader_scope))
+    leader.start()
+    assert provider.entered.wait(5)
+    waiter = threading.Thread(target=run, args=("waiter", waiter_scope))
+    waiter.start()
+    while not provider._single_flight.get_stats()["coalesced"]:
+        time.sleep(0.001)
+    provider.release.set()
+    leader.join(5)
+    waiter.join(5)
+    assert provider.calls == 1
+    return outcomes
+
+
+def _outside_router():
+    return request_scope(None, propagate_errors=False)
+
+
+def _inside_router():
+    return request_scope(Deadline(5))
+
+
+def test_waiter_inside_router_gets_the_error():
+    provider = FakeJsonProvider(error=ConnectionError("reset"))
+    outcomes = _leader_and_waiter(provider, _outside_router, _inside_router)
+    assert outcomes["leader"] == "default"
+    assert isinstance(outcomes["waiter"], ConnectionError)
+
+
+def test_waiter_outside_router_gets_the_default():
+    provider = FakeJsonProvider(error=ConnectionError("reset"))
+    outcomes = _leader_and_waiter(provider, _inside_router, _outside_router)
+    assert isinstance(outcomes["leader"], ConnectionError)
+    assert outcomes["waiter"] == "default"
+
+
+def test_waiter_stops_at_its_own_deadline():
+    provider = FakeJsonProvider(payload={"ok": True})
+    leader = threading.Thread(target=provider.fetch)
+    leader.start()
+    assert provider.entered.wait(5)
+    try:
+        started = time.monotonic()
+        with request_scope(Deadline(0.05)):
+            with pytest.raises(DeadlineExceeded):
+                provider.fetch()
+        assert time.monotonic() - started < 1
+    finally:
+        provider.release.set()
+        leader.join(5)
+    assert provider.fetch() == {"ok": True}  # תוצאת הקריאה המשותפת נשמרה ב-cache
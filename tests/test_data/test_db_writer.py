@@ -0,0 +1,113 @@
+"""
+DBWriter - כמה עבודות בטרנזקציה אחת, ו-SAVEPOINT לכל עבודה: עבודה שנכשלה לא מפילה את ה-batch
+"""
+
+import sqlite3
+import threading
+
+import pytest
+
+from data_management.db_writer import DBWriter
+
+
+def _setup(conn):
+    conn.execute("CREATE TABLE t (k TEXT PRIMARY KEY, v INTEGER)")
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = DBWriter(str(tmp_path / "w.db"), setup=_setup)
+    yield writer
+    writer.close()
+
+
+def _insert(k, v):
+    return lambda conn: conn.execute("INSERT INTO t VALUES (?, ?)", (k, v)).rowcount
+
+
+def _rows(writer):
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        return dict(conn.execute("SELECT k, v FROM t"))
+    finally:
+        conn.close()
+
+
+def _batch(writer, fns, on_commit=None):
+    """הכנסת fns לתור בזמן שה-writer חסום, כך שכולן נכתבות ב-batch אחד"""
+    entered, release = threading.Event(), threading.Event()
+
+    def gate(conn):
+        entered.set()
+        release.wait(5)
+
+    gate_future = writer.submit(gate)
+    assert entered.wait(5)
+    futures = [writer.submit(fn, rows=1, on_commit=on_commit and on_commit(i)) for i, fn in enumerate(fns)]
+    release.set()
+    gate_future.result(5)
+    for future in futures:
+        future.exception(5)
+    return futures
+
+
+def test_failing_job_is_rolled_back_alone(writer):
+    committed = []
+
+    def partial_then_fail(conn):
+        conn.execute("INSERT INTO t VALUES ('b', 2)")
+        raise ValueError("bad row")
+
+    before = writer.get_stats()["transactions"]
+    futures = _batch(writer, [_insert("a", 1), partial_then_fail, _insert("c", 3)],
+                     on_commit=lambda i: lambda: committed.append(i))
+
+    assert futures[0].result() == 1 and futures[2].result() == 1
+    with pytest.raises(ValueError, match="bad row"):
+        futures[1].result()
+    assert _rows(writer) == {"a": 1, "c": 3}
+    assert committed == [0, 2]
+
+    stats = writer.get_stats()
+    assert stats["transactions"] == before + 2  # ה-gate וה-batch
+    assert stats["max_jobs_per_transaction"] == 3
+    assert stats["failed"] == 1
+
+
+def test_constraint_error_does_not_poison_batch(writer):
+    writer.execute(_insert("a", 1))
+    futures = _batch(writer, [_insert("a", 9), _insert("b", 2)])
+
+    assert isinstance(futures[0].exception(), sqlite3.IntegrityError)
+    assert futures[1].result() == 1
+    assert _rows(writer) == {"a": 1, "b": 2}
+
+
+def test_cancelled_job_is_skipped(writer):
+    entered, release = threading.Event(), threading.Event()
+    gate = writer.submit(lambda conn: (entered.set(), release.wait(5)))
+    assert entered.wait(5)
+    skipped = writer.submit(_insert("a", 1))
+    kept = writer.submit(_insert("b", 2))
+    assert skipped.cancel()
+    release.set()
+    gate.result(5)
+
+    assert kept.result(5) == 1
+    assert _rows(writer) == {"b": 2}
+
+
+def test_failing_on_commit_still_resolves_future(writer):
+    def boom():
+        raise RuntimeError("callback")
+
+    assert writer.execute(_insert("a", 1), on_commit=boom) == 1
+    assert _rows(writer) == {"a": 1}
+
+
+def test_setup_error_is_raised_by_constructor(tmp_path):
+    def bad_setup(conn):
+        raise sqlite3.OperationalError("no schema")
+
+    with pytest.raises(sqlite3.OperationalError, match="no schema"):
+        DBWriter(str(tmp_path / "bad.db"), setup=bad_setup)
@@ -1 +1,36 @@
-# stub
+"""
+FRED - אירועים כלכליים: סדרה שנכשלה לא נבלעת בתוך DataRouter
+"""
+
+from datetime import date
+
+import pytest
+
+from data_management.providers.fred_provider import FREDProvider
+from data_management.retry_policy import request_scope
+
+
+@pytest.fixture
+def fred(monkeypatch):
+    """FRED עם מפתח בדיקה, שבו הסדרה CPIAUCSL נכשלת והשאר מחזירות אירוע"""
+    provider = FREDProvider()
+    provider.api_key = "test"
+
+    def fetch_json(cache_key, url, params, parse, default=None):
+        if params["series_id"] == "CPIAUCSL":
+            raise ConnectionError("connection reset")
+        return parse({"observations": [{"date": date.today().isoformat(), "value": "1.0"}]})
+
+    monkeypatch.setattr(provider, "_fetch_json", fetch_json)
+    return provider
+
+
+def test_partial_events_outside_router(fred):
+    events = fred.get_economic_events()
+    assert [event["name"] for event in events] == ["Fed Rate Decision", "Unemployment Data"]
+
+
+def test_failed_series_raises_inside_router(fred):
+    with request_scope(None):
+        with pytest.raises(ConnectionError):
+            fred.get_economic_events()
@@ -0,0 +1,147 @@
+"""
+HistorySync - תכנון הטווחים החסרים, הורדה בסבבים, סוף הטווח בסשן האחרון שנסגר, ובלי לבקש שוב את התקופה שלפני ההנפקה
+"""
+
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from data_management.history_sync import HistorySync, last_completed_session
+from data_management.providers.base_provider import HistoryBatchResult
+from data_management.stock_db import StockDB
+
+LISTED = "2024-03-01"
+
+
+class FakeHistoryProvider:
+    """ספק היסטוריה בלי הורדה מרובת-סימבולים: נרות בימי חול מ-LISTED, end אינו כולל"""
+
+    def __init__(self, listed=LISTED):
+        self.listed = listed
+        self.calls = []
+
+    def get_historical_data(self, symbol, start_date, end_date):
+        self.calls.append((symbol, start_date, end_date))
+        days = pd.bdate_range(max(start_date, self.listed), end_date, inclusive="left")
+        if len(days) == 0:
+            return None
+        return pd.DataFrame({"Open": 10.0, "High": 11.0, "Low": 9.0, "Close": 10.5, "Volume": 1000}, index=days)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = StockDB(str(tmp_path / "stocks.db"))
+    yield db
+    db._writer.close()
+
+
+def _utc(text):
+    return datetime.fromisoformat(text).replace(tzinfo=timezone.utc)
+
+
+def test_last_completed_session():
+    assert last_completed_session(_utc("2024-06-12 21:00")) == "2024-06-12"  # 17:00 בניו יורק
+    assert last_completed_session(_utc("2024-06-12 15:00")) == "2024-06-11"  # המסחר עוד פתוח
+    assert last_completed_session(_utc("2024-06-17 13:00")) == "2024-06-14"  # שני בבוקר -> שישי
+    assert last_completed_session(_utc("2024-06-16 22:00")) == "2024-06-14"  # ראשון
+
+
+def test_plan_stops_at_last_completed_session(db):
+    sync = HistorySync(db, FakeHistoryProvider(), provider_name="yahoo")
+    gaps = sync.plan(["AAA"], "2024-01-01", "2999-01-01")["AAA"]
+    assert gaps == [("2024-01-01", last_completed_session())]
+
+
+def test_leading_gap_before_listing_is_not_planned_again(db):
+    provider = FakeHistoryProvider()
+    sync = HistorySync(db, provider, provider_name="yahoo")
+
+    result = sync.sync(["AAA"], "2024-01-01", "2024-03-29")
+    assert result.failed == {}
+    assert db.get_dates("AAA", "yahoo")[0] == LISTED
+    assert db.get_history_start("AAA", "yahoo") == ("2024-01-01", LISTED)
+
+    assert sync.plan(["AAA"], "2024-01-01", "2024-03-29") == {"AAA": []}
+    # טווח שמתחיל לפני הסימון עדיין מתוכנן
+    assert sync.plan(["AAA"], "2023-06-01", "2024-03-29") == {"AAA": [("2023-06-01", "2024-02-29")]}
+
+
+def test_empty_leading_gap_is_not_a_failure(db):
+    db.insert_rows([{"symbol": "AAA", "date": d.strftime("%Y-%m-%d"), "close": 10.0}
+                    for d in pd.bdate_range(LISTED, "2024-03-29")], provider="yahoo")
+    provider = FakeHistoryProvider()
+    sync = HistorySync(db, provider, provider_name="yahoo")
+
+    result = sync.sync(["AAA"], "2024-01-01", "2024-03-29")
+    assert provider.calls == [("AAA", "2024-01-01", LISTED)]
+    assert result.failed == {}
+    assert sync.plan(["AAA"], "2024-01-01", "2024-03-29") == {"AAA": []}
+
+
+def _seed(db, days, symbol="AAA"):
+    db.insert_rows([{"symbol": symbol, "date": d, "close": 10.0} for d in days], provider="yahoo")
+
+
+def test_missing_ranges_head_middle_and_tail(db):
+    _seed(db, ["2024-01-03", "2024-01-04", "2024-01-05", "2024-01-11", "2024-01-12"])
+    assert db.find_missing_ranges("AAA", "2023-12-27", "2024-01-19", provider="yahoo") == [
+        ("2023-12-27", "2024-01-02"),
+        ("2024-01-06", "2024-01-10"),
+        ("2024-01-13", "2024-01-19"),
+    ]
+
+
+def test_missing_ranges_tolerate_single_holidays(db):
+    # 2024-01-15 (MLK) חסר - יום אחד נחשב לחג; בתחילה 2024-01-01 (ראש השנה) חסר
+    _seed(db, ["2024-01-02", "2024-01-12", "2024-01-16"] + [f"2024-01-{d:02d}" for d in range(3, 12)])
+    assert db.find_missing_ranges("AAA", "2024-01-01", "2024-01-16", provider="yahoo") == []
+    # בסוף הטווח כל יום חסר נחשב
+    assert db.find_missing_ranges("AAA", "2024-01-01", "2024-01-17", provider="yahoo") == [("2024-01-17", "2024-01-17")]
+
+
+def test_missing_ranges_weekend_only_range(db):
+    assert db.find_missing_ranges("AAA", "2024-01-06", "2024-01-07", provider="yahoo") == []
+    assert db.find_missing_ranges("AAA", "2024-01-06", "2024-01-08", provider="yahoo") == [("2024-01-06", "2024-01-08")]
+
+
+def test_missing_ranges_are_per_provider(db):
+    _seed(db, ["2024-01-02", "2024-01-03"])
+    assert db.find_missing_ranges("AAA", "2024-01-02", "2024-01-03", provider="yahoo") == []
+    assert db.find_missing_ranges("AAA", "2024-01-02", "2024-01-03", provider="fmp") == [("2024-01-02", "2024-01-03")]
+
+
+class FakeBulkProvider(FakeHistoryProvider):
+    """ספק עם iter_historical_data_bulk: chunk אחד לכל סבב, סימבול BAD תמיד נכשל"""
+
+    def __init__(self):
+        super().__init__(listed="2000-01-01")
+        self.bulk_calls = []
+
+    def iter_historical_data_bulk(self, ranges):
+        self.bulk_calls.append(dict(ranges))
+        result = HistoryBatchResult()
+        for symbol, (start, end) in ranges.items():
+            if symbol == "BAD":
+                result.failed[symbol] = "HTTP 500"
+            else:
+                result.frames[symbol] = self.get_historical_data(symbol, start, end)
+        yield result
+
+
+def test_sync_fetches_each_gap_round_in_one_bulk_call(db):
+    _seed(db, ["2024-01-03", "2024-01-04", "2024-01-10"], symbol="AAA")
+    provider = FakeBulkProvider()
+    sync = HistorySync(db, provider, provider_name="yahoo")
+    progress = []
+
+    result = sync.sync(["AAA", "BBB", "BAD"], "2024-01-02", "2024-01-12", on_progress=progress.append)
+    # סבב 1: הפער הראשון של כל סימבול (ל-AAA יום חסר אחד בתחילה - חג), סבב 2: הפער השני של AAA
+    assert provider.bulk_calls == [
+        {"AAA": ("2024-01-05", "2024-01-10"), "BBB": ("2024-01-02", "2024-01-13"), "BAD": ("2024-01-02", "2024-01-13")},
+        {"AAA": ("2024-01-11", "2024-01-13")},
+    ]
+    assert result.bars == {"AAA": 5, "BBB": 9}
+    assert result.failed == {"BAD": "HTTP 500"}
+    assert len(progress) == 2
+    assert sync.plan(["AAA", "BBB"], "2024-01-02", "2024-01-12") == {"AAA": [], "BBB": []}
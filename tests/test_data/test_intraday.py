@@ -0,0 +1,125 @@
+"""
+נרות תוך-יומיים - חלוקה לחלונות לפי מגבלות הספק, המרת DataFrame לשורות ותכנון הסנכרון
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_management.intraday import (IntradaySync, frame_to_bars, get_interval, split_windows, to_epoch,
+                                      to_utc)
+from data_management.stock_db import StockDB
+
+NOW = datetime(2024, 6, 12, 18, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = StockDB(str(tmp_path / "stocks.db"))
+    yield db
+    db._writer.close()
+
+
+def test_get_interval():
+    assert get_interval("5m").minutes == 5
+    assert get_interval(get_interval("1m")).seconds == 60
+    with pytest.raises(ValueError):
+        get_interval("2h")
+
+
+def test_time_conversions():
+    assert to_utc("2024-06-12T10:00:00") == datetime(2024, 6, 12, 10, tzinfo=timezone.utc)
+    assert to_utc("2024-06-12T10:00:00-04:00") == datetime(2024, 6, 12, 14, tzinfo=timezone.utc)
+    assert to_epoch("1970-01-02") == 86400
+    assert to_epoch(1718186400.9) == 1718186400
+    assert to_utc(0) == datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def test_split_windows_respects_window_length():
+    windows = split_windows("1m", NOW - timedelta(days=20), NOW, now=NOW)
+    assert [(end - start).days for start, end in windows] == [7, 7, 6]
+    assert windows[0][0] == NOW - timedelta(days=20)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+    assert windows[-1][1] == NOW
+
+
+def test_split_windows_clamps_to_lookback_and_now():
+    windows = split_windows("5m", NOW - timedelta(days=100), NOW + timedelta(days=3), now=NOW)
+    assert windows == [(NOW - timedelta(days=59), NOW)]
+    assert split_windows("1m", NOW - timedelta(days=60), NOW - timedelta(days=40), now=NOW) == []
+    assert split_windows("15m", NOW, NOW - timedelta(hours=1), now=NOW) == []
+
+
+def test_frame_to_bars():
+    index = pd.DatetimeIndex(["2024-06-12 13:30", "2024-06-12 13:31"])
+    frame = pd.DataFrame({"Open": [1.0, np.nan], "High": [2.0, 2.5], "Low": [0.5, 0.6],
+                          "Close": [1.5, 2.0], "Volume": [100.0, np.nan]}, index=index)
+    bars = frame_to_bars(frame)
+    assert bars == [(1718199000, 1.0, 2.0, 0.5, 1.5, 100), (1718199060, None, 2.5, 0.6, 2.0, None)]
+    assert isinstance(bars[0][5], int)
+
+    eastern = frame.tz_localize("America/New_York")
+    assert frame_to_bars(eastern)[0][0] == 1718199000 + 4 * 3600
+    assert frame_to_bars(frame.drop(columns=["Volume"]))[0][5] is None
+    assert frame_to_bars(None) == []
+
+
+def _bars(start, count, step=900):
+    return [(start + i * step, 1.0, 1.0, 1.0, 1.0, 10) for i in range(count)]
+
+
+def test_plan_fetches_only_what_is_missing(db):
+    now = to_epoch(datetime.now(timezone.utc))
+    first = now - 10 * 86400
+    db.insert_intraday("AAA", 15, _bars(first, 8))
+    sync = IntradaySync(db, provider=None, interval="15m")
+
+    start = now - 20 * 86400
+    assert sync.plan(["AAA", "BBB"], start, now) == {
+        "AAA": [(start, first), (first + 8 * 900, now)],
+        "BBB": [(start, now)],
+    }
+    # פער של פחות מיום לפני הנר הראשון לא מבוקש
+    assert sync.plan(["AAA"], first - 3600, now) == {"AAA": [(first + 8 * 900, now)]}
+    # אין מה להוריד אחרי הנר האחרון
+    assert sync.plan(["AAA"], first, first + 8 * 900) == {}
+
+
+def test_plan_clamps_start_to_lookback(db):
+    now = to_epoch(datetime.now(timezone.utc))
+    sync = IntradaySync(db, provider=None, interval="1m")
+    (span,) = sync.plan(["AAA"], now - 90 * 86400, now)["AAA"]
+    assert abs(span[0] - (now - 29 * 86400)) <= 5
+
+
+class FakeIntradayProvider:
+    def __init__(self):
+        self.plans = []
+
+    def iter_intraday_data(self, plan, interval):
+        self.plans.append((plan, interval))
+        for symbol, spans in plan.items():
+            if symbol == "BAD":
+                yield symbol, None, "no data"
+                continue
+            for first, last in spans:
+                index = pd.to_datetime(list(range(first, last, 900)), unit="s")
+                yield symbol, pd.DataFrame({"Open": 1.0, "High": 1.0, "Low": 1.0, "Close": 1.0, "Volume": 5},
+                                           index=index), None
+
+
+def test_sync_stores_new_bars_and_skips_up_to_date(db):
+    now = to_epoch(datetime.now(timezone.utc)) // 900 * 900
+    provider = FakeIntradayProvider()
+    sync = IntradaySync(db, provider, interval="15m")
+
+    result = sync.sync(["AAA", "BAD"], now - 3600, now)
+    assert result.bars == {"AAA": 4}
+    assert result.failed == {"BAD": "no data"}
+    assert db.get_intraday_bounds("AAA", 15) == (now - 3600, now - 900)
+
+    again = sync.sync(["AAA"], now - 3600, now)
+    assert again.skipped == ["AAA"] and again.total_bars == 0
+    assert len(provider.plans) == 2 and provider.plans[1][0] == {}
@@ -0,0 +1,148 @@
+"""
+SingleFlight / AsyncSingleFlight - איחוד קריאות זהות שרצות במקביל
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from data_management.single_flight import AsyncSingleFlight, SingleFlight, WaitTimeout
+
+
+def _run_concurrently(flight, key, fn, callers=5):
+    """callers threads קוראים ל-flight.do(key, fn) יחד; מחזיר את התוצאות (או השגיאות)"""
+    outcomes = [None] * callers
+    barrier = threading.Barrier(callers)
+
+    def run(i):
+        barrier.wait()
+        try:
+            outcomes[i] = flight.do(key, fn)
+        except Exception as e:
+            outcomes[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def _slow(release, result=None, error=None, calls=None):
+    def fn():
+        if calls is not None:
+            calls.append(1)
+        release.wait(5)
+        if error is not None:
+            raise error
+        return result
+    return fn
+
+
+def _release_when_coalesced(flight, release, waiters):
+    """שחרור הקריאה אחרי שכל הממתינים הצטרפו אליה"""
+    def watch():
+        while flight.get_stats()["coalesced"] < waiters:
+            time.sleep(0.001)
+        release.set()
+    threading.Thread(target=watch).start()
+
+
+def test_concurrent_calls_share_one_execution():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+    _release_when_coalesced(flight, release, 4)
+    outcomes = _run_concurrently(flight, "k", _slow(release, result=42, calls=calls))
+    assert outcomes == [42] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_error_is_raised_to_every_caller():
+    flight, release = SingleFlight(), threading.Event()
+    error = ConnectionError("reset")
+    _release_when_coalesced(flight, release, 4)
+    outcomes = _run_concurrently(flight, "k", _slow(release, error=error))
+    assert all(outcome is error for outcome in outcomes)
+    assert not flight.in_flight("k")
+
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("k", lambda: 1) == 1
+    assert flight.do("k", lambda: 2) == 2
+    assert flight.get_stats()["executed"] == 2
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: flight.do("b", lambda: "inner")) == "inner"
+    assert flight.get_stats()["coalesced"] == 0
+
+
+def test_waiter_timeout_leaves_the_call_running():
+    flight, release = SingleFlight(), threading.Event()
+    leader = threading.Thread(target=flight.do, args=("k", _slow(release, result=1)))
+    leader.start()
+    while not flight.in_flight("k"):
+        time.sleep(0.001)
+    with pytest.raises(WaitTimeout):
+        flight.do("k", lambda: 2, timeout=0.01)
+    assert flight.in_flight("k")
+    release.set()
+    leader.join(5)
+    assert not flight.in_flight("k")
+
+
+def test_async_calls_share_one_task():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("k", fetch) for _ in range(5)))
+
+    assert asyncio.run(main()) == ["value"] * 5
+    assert len(calls) == 1
+    assert flight.get_stats() == {"in_flight": 0, "executed": 1, "coalesced": 4}
+
+
+def test_async_waiter_cancel_does_not_cancel_the_task():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return "value"
+
+    async def main():
+        first = asyncio.create_task(flight.do("k", fetch))
+        second = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "value"
+
+
+def test_async_waiter_timeout():
+    flight = AsyncSingleFlight()
+
+    async def fetch():
+        await asyncio.sleep(0.2)
+        return "value"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("k", fetch))
+        await asyncio.sleep(0)
+        with pytest.raises(WaitTimeout):
+            await flight.do("k", fetch, timeout=0.01)
+        return await leader
+
+    assert asyncio.run(main()) == "value"
@@ -0,0 +1,187 @@
+"""
+StockDB - כתיבה, קריאה והעותק העמודתי (כל בדיקה על קובץ SQLite זמני)
+"""
+
+import pytest
+
+from data_management import columnar_store
+from data_management.stock_db import StockDB
+
+
+def _bar(date, close, symbol="AAA"):
+    return {"symbol": symbol, "date": date, "open": close, "high": close + 1, "low": close - 1,
+            "close": close, "adj_close": close, "volume": 1000}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = StockDB(str(tmp_path / "stocks.db"))
+    yield db
+    db._writer.close()
+
+
+def test_write_during_cold_column_build_is_not_cached(db, monkeypatch):
+    db.insert_rows([_bar("2024-01-02", 10.0), _bar("2024-01-03", 11.0)], provider="yahoo")
+
+    original = columnar_store.rows_to_columns
+
+    def build_then_write(rows):
+        # הכתיבה מסתיימת (commit + invalidate) אחרי ה-SELECT ולפני שמירת העותק
+        columns = original(rows)
+        db.insert_rows([_bar("2024-01-04", 12.0)], provider="yahoo")
+        return columns
+
+    monkeypatch.setattr(columnar_store, "rows_to_columns", build_then_write)
+    stale = db.query_arrays("AAA", provider="yahoo")
+    assert len(stale["close"]) == 2
+    monkeypatch.setattr(columnar_store, "rows_to_columns", original)
+
+    assert not db.columns.has("AAA", "yahoo")
+    fresh = db.query_arrays("AAA", provider="yahoo")
+    assert fresh["close"].tolist() == [10.0, 11.0, 12.0]
+    assert db.columns.has("AAA", "yahoo")
+
+
+def test_write_invalidates_columnar_copy(db):
+    db.insert_rows([_bar("2024-01-02", 10.0)], provider="yahoo")
+    assert db.query_arrays("AAA", provider="yahoo")["close"].tolist() == [10.0]
+    assert db.columns.has("AAA", "yahoo")
+
+    db.insert_rows([_bar("2024-01-03", 11.0)], provider="yahoo")
+    assert not db.columns.has("AAA", "yahoo")
+    assert db.query_arrays("AAA")["close"].tolist() == [10.0, 11.0]
+
+
+def test_merged_rows_keyword_and_list(db):
+    db.insert_rows([_bar("2024-01-02", 10.0), _bar("2024-01-02", 20.0, symbol="BBB")], provider="yahoo")
+    assert [row["close"] for row in db.get_merged_rows(symbol="AAA")] == [10.0]
+    rows = db.get_merged_rows(["AAA", "BBB"], start_date="2024-01-01", end_date="2024-01-31")
+    assert [(row["symbol"], row["close"]) for row in rows] == [("AAA", 10.0), ("BBB", 20.0)]
+
+
+def _merged(db, symbol="AAA"):
+    return [(row["date"], row["provider"], row["close"], row["sources"]) for row in db.get_merged_rows(symbol)]
+
+
+def test_merged_rows_follow_default_priority(db):
+    db.insert_rows([_bar("2024-01-02", 20.0), _bar("2024-01-03", 21.0)], provider="fmp")
+    db.insert_rows([_bar("2024-01-02", 10.0)], provider="yahoo")
+    # נר עם שעה ונר בלי שעה של אותו יום מתאחדים לשורה אחת
+    db.insert_rows([_bar("2024-01-03 00:00:00", 31.0)], provider="polygon")
+
+    assert _merged(db) == [("2024-01-02", "yahoo", 10.0, ["yahoo", "fmp"]),
+                           ("2024-01-03", "polygon", 31.0, ["polygon", "fmp"])]
+
+
+def test_merged_field_falls_back_when_preferred_is_null(db):
+    db.insert_rows([dict(_bar("2024-01-02", 10.0), volume=None, adj_close=None)], provider="yahoo")
+    db.insert_rows([dict(_bar("2024-01-02", 20.0), volume=5000, adj_close=19.5)], provider="fmp")
+
+    row = db.get_merged_rows("AAA")[0]
+    assert (row["provider"], row["close"]) == ("yahoo", 10.0)
+    assert (row["volume"], row["adj_close"]) == (5000, 19.5)
+
+
+def test_set_provider_priority_rebuilds_golden_bars(db):
+    db.insert_rows([_bar("2024-01-02", 10.0)], provider="yahoo")
+    db.insert_rows([_bar("2024-01-02", 20.0)], provider="fmp")
+    db.query_arrays("AAA")
+    assert db.columns.has("AAA", None)
+
+    db.set_provider_priority(["fmp", "yahoo", "fmp"])
+    assert db.get_provider_priority() == ["fmp", "yahoo"]
+    assert _merged(db) == [("2024-01-02", "fmp", 20.0, ["fmp", "yahoo"])]
+    assert not db.columns.has("AAA", None)
+    assert db.query_arrays("AAA")["close"].tolist() == [20.0]
+
+
+def test_unranked_providers_come_last(db):
+    db.set_provider_priority(["fmp"])
+    db.insert_rows([_bar("2024-01-02", 30.0)], provider="zeta")
+    db.insert_rows([_bar("2024-01-02", 20.0)], provider="alpha")
+    assert _merged(db) == [("2024-01-02", "alpha", 20.0, ["alpha", "zeta"])]
+
+    db.insert_rows([_bar("2024-01-02", 10.0)], provider="fmp")
+    assert _merged(db) == [("2024-01-02", "fmp", 10.0, ["fmp", "alpha", "zeta"])]
+
+
+def test_later_write_updates_golden_bars(db):
+    db.insert_rows([_bar("2024-01-02", 10.0), _bar("2024-01-03", 11.0)], provider="fmp")
+    db.insert_rows([_bar("2024-01-03", 21.0)], provider="yahoo")
+
+    merged = db.get_merged_frame("AAA")
+    assert merged["provider"].tolist() == ["fmp", "yahoo"]
+    assert merged["close"].tolist() == [10.0, 21.0]
+
+
+def _history_frame():
+    import pandas as pd
+
+    index = pd.DatetimeIndex(["2024-01-02 00:00", "2024-01-03 00:00", "2024-01-04 00:00"],
+                             tz="America/New_York", name="Date")
+    return pd.DataFrame({
+        "Open": [10.0, 11.0, 12.0],
+        "High": [11.0, 12.0, 13.0],
+        "Low": [9.0, 10.0, 11.0],
+        "Close": [10.5, 11.5, float("nan")],
+        "Volume": [1000, 2000, 3000],
+        "Adj Close": [10.4, 11.4, 12.4],
+        "Dividends": [0.0, 0.25, 0.0],
+    }, index=index)
+
+
+def _history_rows():
+    return [
+        {"symbol": "AAA", "date": "2024-01-02", "open": 10.0, "high": 11.0, "low": 9.0, "close": 10.5,
+         "volume": 1000, "adj_close": 10.4},
+        {"symbol": "AAA", "date": "2024-01-03", "open": 11.0, "high": 12.0, "low": 10.0, "close": 11.5,
+         "volume": 2000, "adj_close": 11.4, "Dividends": 0.25},
+        {"symbol": "AAA", "date": "2024-01-04", "open": 12.0, "high": 13.0, "low": 11.0, "close": None,
+         "volume": 3000, "adj_close": 12.4},
+    ]
+
+
+def test_insert_frame_matches_insert_rows(db):
+    assert db.insert_frame("AAA", "yahoo", _history_frame()) == 3
+    assert db.insert_rows(_history_rows(), provider="fmp") == 3
+
+    def strip(rows):
+        return [{k: v for k, v in row.items() if k != "provider"} for row in rows]
+
+    from_frame = db.query("AAA", provider="yahoo")
+    assert strip(from_frame) == strip(db.query("AAA", provider="fmp"))
+    assert [type(row["volume"]) for row in from_frame] == [int] * 3
+
+    # מהמסגרת נשמרת רשומה גולמית רק לשורה עם דיבידנד
+    assert db.get_raw_data("AAA", "2024-01-02", provider="yahoo") is None
+    raw = db.get_raw_data("AAA", "2024-01-03", provider="yahoo")
+    assert raw["Dividends"] == 0.25
+    assert {k: raw[k] for k in ("symbol", "date", "open", "close", "volume", "adj_close")} == {
+        "symbol": "AAA", "date": "2024-01-03", "open": 11.0, "close": 11.5, "volume": 2000, "adj_close": 11.4}
+    assert db.get_raw_data("AAA", "2024-01-03", provider="fmp") == _history_rows()[1]
+
+
+def test_insert_frame_date_column_and_duplicates(db):
+    import pandas as pd
+
+    frame = _history_frame().reset_index()
+    frame["Date"] = frame["Date"].dt.tz_localize(None)
+    frame = pd.concat([frame, frame.iloc[[0]].assign(Close=99.0)], ignore_index=True)
+
+    assert db.insert_frame("AAA", "yahoo", frame) == 3  # התאריך הכפול נכתב פעם אחת, האחרון
+    assert [row["close"] for row in db.query("AAA")] == [99.0, 11.5, None]
+    with pytest.raises(ValueError):
+        db.insert_frame("AAA", "yahoo", frame.drop(columns="Date"))
+
+
+def test_insert_without_wait_returns_future(db):
+    import pandas as pd
+
+    rows_future = db.insert_rows(_history_rows(), provider="fmp", wait=False)
+    frame_future = db.insert_frame("AAA", "yahoo", _history_frame(), wait=False)
+    assert rows_future.result(5) == 3
+    assert frame_future.result(5) == 3
+    assert len(db.query("AAA")) == 6
+
+    assert db.insert_frame("AAA", "yahoo", pd.DataFrame()) == 0
+    assert db.insert_frame("AAA", "yahoo", None, wait=False).result(0) == 0
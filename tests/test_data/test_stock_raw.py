@@ -0,0 +1,121 @@
+"""
+stock_raw - דחיסת הרשומה הגולמית והשדרוג של מסד ישן (raw_data בתוך stocks, user_version 0)
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+from data_management import stock_db
+from data_management.stock_db import DEFAULT_PROVIDER_PRIORITY, StockDB, _decode_raw, _encode_raw
+
+_OLD_STOCKS_SQL = """
+CREATE TABLE stocks (
+    symbol TEXT NOT NULL,
+    date TEXT NOT NULL,
+    provider TEXT,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume INTEGER,
+    adj_close REAL,
+    raw_data TEXT,
+    PRIMARY KEY (symbol, date, provider)
+)
+"""
+
+
+def _row(date, close, symbol="AAA", **extra):
+    row = {"symbol": symbol, "date": date, "open": close, "high": close + 1, "low": close - 1,
+           "close": close, "adj_close": close, "volume": 1000}
+    row.update(extra)
+    return row
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = StockDB(str(tmp_path / "stocks.db"))
+    yield db
+    db._writer.close()
+
+
+def test_encode_round_trip_and_compresses():
+    row = _row("2024-01-02", 10.5, Dividends=0.0, **{"Stock Splits": 0.0}, name="מניה")
+    blob = _encode_raw(row)
+    assert blob[:1] in (stock_db._RAW_ZLIB, stock_db._RAW_ZSTD)
+    assert len(blob) < len(json.dumps(row).encode("utf-8"))
+    assert _decode_raw(blob) == row
+
+
+def test_decode_non_json_returns_text():
+    assert _decode_raw(stock_db._encode_raw_text("not json")) == "not json"
+
+
+def test_zstd_blob_without_library_fails_clearly(monkeypatch):
+    monkeypatch.setattr(stock_db, "_zstd_module", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        _decode_raw(stock_db._RAW_ZSTD + b"payload")
+
+
+def test_raw_data_round_trip_through_db(db):
+    rows = [_row("2024-01-02", 10.0, Dividends=0.25, note="ex-div"),
+            _row("2024-01-03", 11.0)]
+    db.insert_rows(rows, provider="yahoo")
+
+    assert db.get_raw_data("AAA", "2024-01-02", provider="yahoo") == rows[0]
+    assert db.get_raw_data("AAA", "2024-01-04") is None
+    queried = db.query("AAA", include_raw=True)
+    assert [q["raw_data"] for q in queried] == rows
+    assert "raw_data" not in db.query("AAA")[0]
+
+
+def test_old_database_is_migrated(tmp_path):
+    path = str(tmp_path / "old.db")
+    raw = {"symbol": "AAA", "date": "2024-01-02", "Dividends": 0.5}
+    conn = sqlite3.connect(path)
+    conn.execute(_OLD_STOCKS_SQL)
+    conn.executemany("INSERT INTO stocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", [
+        ("AAA", "2024-01-02", "fmp", 10.0, 11.0, 9.0, 10.0, 100, 10.0, json.dumps(raw)),
+        ("AAA", "2024-01-02", "yahoo", 10.1, 11.1, 9.1, 10.1, 200, 10.1, "plain text"),
+        ("AAA", "2024-01-03", "fmp", 12.0, 13.0, 11.0, 12.0, 300, 12.0, None),
+    ])
+    conn.commit()
+    conn.close()
+
+    db = StockDB(path)
+    try:
+        assert db.conn.execute("PRAGMA user_version").fetchone()[0] == stock_db._SCHEMA_VERSION
+        columns = [row[1] for row in db.conn.execute("PRAGMA table_info(stocks)")]
+        if "raw_data" in columns:  # SQLite לפני 3.35 - העמודה נשארת ריקה
+            assert db.conn.execute("SELECT count(*) FROM stocks WHERE raw_data IS NOT NULL").fetchone()[0] == 0
+        assert db.conn.execute("SELECT count(*) FROM stock_raw").fetchone()[0] == 2
+        assert db.get_raw_data("AAA", "2024-01-02", provider="fmp") == raw
+        assert db.get_raw_data("AAA", "2024-01-02", provider="yahoo") == "plain text"
+        assert db.get_raw_data("AAA", "2024-01-03", provider="fmp") is None
+        assert len(db.query("AAA")) == 3
+
+        assert db.get_provider_priority() == list(DEFAULT_PROVIDER_PRIORITY)
+        merged = db.get_merged_rows("AAA")
+        assert [(m["date"], m["provider"], m["close"]) for m in merged] == [
+            ("2024-01-02", "yahoo", 10.1), ("2024-01-03", "fmp", 12.0)]
+        assert merged[0]["sources"] == ["yahoo", "fmp"]
+    finally:
+        db._writer.close()
+
+
+def test_migration_runs_once(tmp_path):
+    path = str(tmp_path / "stocks.db")
+    db = StockDB(path)
+    db.insert_rows([_row("2024-01-02", 10.0)], provider="yahoo")
+    db.set_provider_priority(["fmp", "yahoo"])
+    db._writer.close()
+
+    reopened = StockDB(path)
+    try:
+        # פתיחה חוזרת לא זורעת מחדש את סדר העדיפות ולא מוחקת נתונים
+        assert reopened.get_provider_priority() == ["fmp", "yahoo"]
+        assert reopened.get_raw_data("AAA", "2024-01-02") == _row("2024-01-02", 10.0)
+    finally:
+        reopened._writer.close()
@@ -1 +1,45 @@
-# stub
+"""
+YahooProvider - בניית QuoteBatch מתשובת yf.download (בלי רשת: yf.download מוחלף ב-DataFrame קבוע)
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_management.providers import yahoo_provider
+from data_management.providers.yahoo_provider import YahooProvider
+
+
+def _download_frame():
+    """3 ימים: ל-AAA יש נר בכל יום, ל-BBB אין נר ביום האחרון (הושהה), CCC בלי נתונים"""
+    index = pd.to_datetime(["2024-01-02", "2024-01-03", "2024-01-04"])
+    columns = pd.MultiIndex.from_product([["AAA", "BBB", "CCC"], ["Close", "Volume"]])
+    data = [
+        [10.0, 100, 20.0, 200, np.nan, np.nan],
+        [11.0, 110, 22.0, 220, np.nan, np.nan],
+        [12.0, 120, np.nan, np.nan, np.nan, np.nan],
+    ]
+    return pd.DataFrame(data, index=index, columns=columns)
+
+
+@pytest.fixture
+def provider(monkeypatch):
+    monkeypatch.setattr(yahoo_provider.yf, "download", lambda **kwargs: _download_frame())
+    return YahooProvider()
+
+
+def test_quote_batch_takes_volume_from_last_valid_row(provider):
+    batch = provider._fetch_quote_batch(["AAA", "BBB", "CCC"])
+    quotes = batch.to_quotes()
+
+    assert sorted(quotes) == ["AAA", "BBB"]
+    assert quotes["AAA"].price == 12.0 and quotes["AAA"].volume == 120
+    # המחיר והנפח מאותו נר (03.01), והשינוי מול הנר שלפניו
+    assert quotes["BBB"].price == 22.0 and quotes["BBB"].volume == 220
+    assert quotes["BBB"].change == pytest.approx(2.0)
+    assert quotes["BBB"].change_percent == pytest.approx(10.0)
+
+
+def test_quote_batch_keeps_requested_order(provider):
+    batch = provider._fetch_quote_batch(["BBB", "AAA"])
+    assert list(batch.symbols) == ["BBB", "AAA"]
@@ -0,0 +1,18 @@
+"""
+תקציב זמן הייבוא - ה-DataRouter נטען בלי pandas / numpy / yfinance / ib_insync
+"""
+
+from core.import_budget import check_import_budget, measure_import
+
+# בהפעלה קרה המודול לוקח ~100ms; ייבוא pandas לבדו חורג מהתקציב
+DATA_ROUTER_BUDGET_MS = 400
+
+
+def test_data_router_import_budget():
+    assert check_import_budget("data_management.data_router", DATA_ROUTER_BUDGET_MS) == []
+
+
+def test_data_router_defers_heavy_imports():
+    profile = measure_import("data_management.data_router")
+    assert profile.total_ms > 0
+    assert profile.heavy_loaded() == []
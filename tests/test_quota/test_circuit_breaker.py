@@ -0,0 +1,124 @@
+"""
+CircuitBreaker - מעברי המצבים closed -> open -> half_open -> closed/open, עם שעון מדומה
+"""
+
+import pytest
+
+from data_management.circuit_breaker import BreakerConfig, BreakerState, CircuitBreaker, CircuitBreakerRegistry
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(BreakerConfig(window_seconds=60, min_requests=4, failure_rate_threshold=0.5,
+                                        base_cooldown_seconds=10, max_cooldown_seconds=25, probe_timeout_seconds=5),
+                          clock=clock)
+
+
+def _trip(breaker):
+    for _ in range(4):
+        breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_stays_closed_below_min_requests(breaker):
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+
+
+def test_stays_closed_below_threshold(breaker):
+    for _ in range(3):
+        breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED  # 2/5 < 0.5
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN  # 3/6
+
+
+def test_old_outcomes_leave_the_window(breaker, clock):
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(61)
+    breaker.record_failure()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.get_stats()["window_requests"] == 1
+
+
+def test_open_rejects_until_cooldown(breaker, clock):
+    _trip(breaker)
+    assert not breaker.allow_request()
+    assert not breaker.is_available()
+    clock.advance(9.9)
+    assert not breaker.allow_request()
+    clock.advance(0.1)
+    assert breaker.state is BreakerState.HALF_OPEN
+
+
+def test_half_open_allows_a_single_probe(breaker, clock):
+    _trip(breaker)
+    clock.advance(10)
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    assert not breaker.is_available()
+    clock.advance(5)  # probe שלא דיווח משוחרר
+    assert breaker.allow_request()
+
+
+def test_probe_success_closes(breaker, clock):
+    _trip(breaker)
+    clock.advance(10)
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state is BreakerState.CLOSED
+    assert breaker.get_stats()["trips"] == 0
+
+
+def test_probe_failure_reopens_with_longer_cooldown(breaker, clock):
+    _trip(breaker)
+    clock.advance(10)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state is BreakerState.OPEN
+    assert breaker.get_stats()["cooldown_remaining"] == 20
+    clock.advance(20)
+    assert breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.get_stats()["cooldown_remaining"] == 25  # max_cooldown_seconds
+
+
+def test_released_probe_frees_the_slot(breaker, clock):
+    _trip(breaker)
+    clock.advance(10)
+    assert breaker.allow_request()
+    breaker.release()
+    assert breaker.allow_request()
+
+
+def test_registry_keeps_a_breaker_per_provider_and_type(clock):
+    registry = CircuitBreakerRegistry(BreakerConfig(min_requests=1), clock=clock)
+    registry.record_failure("fmp", "quote")
+    assert not registry.is_available("fmp", "quote")
+    assert registry.is_available("fmp", "VIX")
+    assert registry.is_available("yahoo", "quote")
+    assert registry.get_provider_stats("fmp")["quote"]["state"] == "open"
+    registry.reset("fmp")
+    assert registry.is_available("fmp", "quote")
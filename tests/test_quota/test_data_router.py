@@ -1 +1,186 @@
-# stub
+"""
+DataRouter - מפסקים לפי תוצאות בקשות, cache של תשובות ריקות ויצירת ספקים
+"""
+
+import threading
+import time
+
+import pytest
+
+from core.config import config
+from data_management.circuit_breaker import BreakerState
+from data_management.data_router import DataRequest, DataRouter
+from data_management.providers import registry
+from data_management.providers.base_provider import BaseProvider, QuoteData
+from data_management.rate_limiter import TokenBucketLimiter
+
+
+class FakeBatchProvider(BaseProvider):
+    """ספק batch מקומי: מחזיר מחיר לכל סימבול שמתחיל ב-A, או זורק error בכל chunk"""
+
+    supports_batch_quotes = True
+    max_batch_size = 2
+
+    def __init__(self, error=None):
+        super().__init__(name="FakeBatch")
+        self._rate_limiter = TokenBucketLimiter(self.name, per_second=1000)
+        self.error = error
+        self.calls = 0
+
+    def _fetch_data(self):
+        return None
+
+    def get_vix(self):
+        return None
+
+    def get_quote(self, symbol):
+        return self.get_quotes([symbol]).get(symbol)
+
+    def _fetch_quotes_batch(self, symbols):
+        from datetime import datetime
+        self.calls += 1
+        if self.error is not None:
+            raise self.error
+        return {s: QuoteData(s, 10.0, datetime.now()) for s in symbols if s.startswith("A")}
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(config.data, "disk_cache_enabled", False)
+    router = DataRouter()
+    router._routing_config["quote"]["fallback"] = []
+    return router
+
+
+def test_batch_outage_opens_breaker(router):
+    provider = FakeBatchProvider(error=ConnectionError("connection refused"))
+    router.register_provider("yahoo", provider)
+
+    for i in range(4):
+        result = router.get_quotes([f"A{i}", f"B{i}", f"C{i}"])
+        assert result.quotes == {}
+    assert provider.calls == 8  # כל ה-chunks נוסו
+    assert router._breakers.get("yahoo", "quote").state is BreakerState.OPEN
+
+    # מפסק פתוח - לא פונים לספק
+    router.get_quotes(["A9"])
+    assert provider.calls == 8
+
+
+def test_batch_not_found_is_not_a_failure(router):
+    provider = FakeBatchProvider()
+    router.register_provider("yahoo", provider)
+
+    for i in range(8):
+        assert router.get_quotes([f"ZZZ{i}"]).failed == [f"ZZZ{i}"]
+    assert router._breakers.get("yahoo", "quote").state is BreakerState.CLOSED
+    assert router.get_quotes(["AAPL"]).quotes["AAPL"].price == 10.0
+
+
+def test_partial_batch_failure_returns_what_succeeded(router):
+    class Flaky(FakeBatchProvider):
+        def _fetch_quotes_batch(self, symbols):
+            if "B1" in symbols:
+                self.calls += 1
+                raise ConnectionError("reset")
+            return super()._fetch_quotes_batch(symbols)
+
+    router.register_provider("yahoo", Flaky())
+    result = router.get_quotes(["A1", "A2", "B1", "A3"])
+    assert sorted(result.quotes) == ["A1", "A2"]
+    assert router._breakers.get("yahoo", "quote").get_stats()["failure_rate"] == 0.0
+
+
+class FakeEventsProvider(BaseProvider):
+    """ספק אירועים: מחזיר רשימה ריקה (אין אירועים בטווח) וסופר קריאות"""
+
+    def __init__(self):
+        super().__init__(name="FakeEvents")
+        self.calls = 0
+
+    def _fetch_data(self):
+        return None
+
+    def get_vix(self):
+        return None
+
+    def get_quote(self, symbol):
+        return None
+
+    def get_economic_events(self, days_ahead=30):
+        self.calls += 1
+        if self._in_backoff():
+            self._raise_if_unavailable(None)
+        return []
+
+
+def test_empty_result_is_cached(router):
+    provider = FakeEventsProvider()
+    router.register_provider("fred", provider)
+
+    assert router.get_economic_events() == []
+    assert router.get_economic_events() == []
+    assert provider.calls == 1  # הרשימה הריקה הוגשה מה-cache
+
+
+def test_empty_result_survives_restart(monkeypatch, tmp_path):
+    from data_management import data_router
+    from data_management.disk_cache import DiskCache
+    monkeypatch.setattr(config.data, "disk_cache_enabled", True)
+    monkeypatch.setattr(data_router, "DiskCache", lambda max_bytes: DiskCache(tmp_path / "cache.db", max_bytes))
+
+    first = DataRouter()
+    provider = FakeEventsProvider()
+    first.register_provider("fred", provider)
+    assert first.get_economic_events() == []
+
+    second = DataRouter()
+    second.register_provider("fred", provider)
+    assert second.get_economic_events() == []
+    assert provider.calls == 1
+
+
+def test_backoff_is_not_cached_as_empty(router):
+    provider = FakeEventsProvider()
+    router.register_provider("fred", provider)
+    provider._start_backoff(60)
+
+    request = DataRequest(data_type="economic_events", parameters={"days_ahead": 30})
+    assert router.get_data(request) is None  # שגיאה - לא "אין אירועים"
+    assert provider.calls == 1
+    # ה-backoff נגמר - פונים שוב לספק במקום להגיש "אין אירועים" מה-cache
+    provider._backoff_until = 0
+    assert router.get_economic_events() == []
+    assert provider.calls == 2
+
+
+def test_slow_provider_creation_does_not_block_others(router, monkeypatch):
+    entered, release = threading.Event(), threading.Event()
+    created = []
+
+    class SlowHealthCheck(FakeEventsProvider):
+        def test_connection(self):
+            entered.set()
+            release.wait(5)
+            return True
+
+    def create_provider(name, *args, **kwargs):
+        created.append(name)
+        return SlowHealthCheck() if name == "fred" else FakeEventsProvider()
+
+    monkeypatch.setattr(registry, "create_provider", create_provider)
+    router._providers.clear()
+
+    slow = [threading.Thread(target=router.get_provider, args=("fred",)) for _ in range(2)]
+    for thread in slow:
+        thread.start()
+    assert entered.wait(5)
+    # בדיקת החיבור של fred עדיין רצה - ספק אחר נוצר בלי לחכות לה
+    started = time.monotonic()
+    assert router.get_provider("yahoo") is not None
+    assert time.monotonic() - started < 1
+    release.set()
+    for thread in slow:
+        thread.join(5)
+    assert created.count("fred") == 1
+    assert created.count("yahoo") == 1
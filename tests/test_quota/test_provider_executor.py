@@ -0,0 +1,134 @@
+"""
+ProviderExecutor - מגבלת מקביליות לכל ספק, תור חסום, timeout וביטול
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from data_management.provider_executor import (CallCancelled, CallTimeout, ExecutorBusy, ProviderExecutor,
+                                               check_cancelled, is_cancelled)
+from data_management.retry_policy import Deadline, current_deadline, request_scope
+
+
+@pytest.fixture
+def executor():
+    executor = ProviderExecutor(max_workers=8, default_limit=2, max_queue=3, idle_timeout=1.0)
+    yield executor
+    executor.shutdown()
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def test_concurrency_is_capped_per_key(executor):
+    lock, running, peak = threading.Lock(), [0], [0]
+
+    def call():
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(0.02)
+        with lock:
+            running[0] -= 1
+        return True
+
+    executor.set_limit("slow", 2)
+    futures = [executor.submit("slow", call, queue_timeout=5) for _ in range(8)]
+    assert all(future.result(5) for future in futures)
+    assert peak[0] == 2
+    stats = executor.get_stats("slow")
+    assert stats["completed"] == 8 and stats["active"] == 0
+
+
+def test_a_busy_key_does_not_block_another(executor):
+    release = threading.Event()
+    executor.set_limit("busy", 1)
+    executor.submit("busy", release.wait, 5)
+    _wait_for(lambda: executor.get_stats("busy")["active"] == 1)
+    assert executor.run("other", lambda: "done", timeout=1) == "done"
+    release.set()
+
+
+def test_full_queue_rejects(executor):
+    release = threading.Event()
+    executor.set_limit("k", 1)
+    executor.submit("k", release.wait, 5)
+    _wait_for(lambda: executor.get_stats("k")["active"] == 1)
+    for _ in range(3):
+        executor.submit("k", lambda: None)
+    with pytest.raises(ExecutorBusy):
+        executor.submit("k", lambda: None)
+    assert executor.get_stats("k")["rejected"] == 1
+    release.set()
+
+
+def test_cancelling_a_queued_call_removes_it(executor):
+    release, ran = threading.Event(), []
+    executor.set_limit("k", 1)
+    executor.submit("k", release.wait, 5)
+    _wait_for(lambda: executor.get_stats("k")["active"] == 1)
+    queued = executor.submit("k", lambda: ran.append(1))
+    assert queued.cancel()
+    release.set()
+    _wait_for(lambda: executor.get_stats("k")["active"] == 0)
+    assert ran == []
+    assert executor.get_stats("k")["cancelled"] == 1
+
+
+def test_timeout_signals_the_running_call(executor):
+    seen = threading.Event()
+
+    def call():
+        while not is_cancelled():
+            time.sleep(0.005)
+        seen.set()
+        check_cancelled()
+
+    with pytest.raises(CallTimeout):
+        executor.run("k", call, timeout=0.05)
+    assert seen.wait(2)
+    _wait_for(lambda: executor.get_stats("k")["active"] == 0)
+    stats = executor.get_stats("k")
+    assert stats["timed_out"] == 1 and stats["cancelled"] == 1
+
+
+def test_nested_run_executes_inline(executor):
+    executor.set_limit("k", 1)
+    # הקריאה המקוננת לא ממתינה למקום שהקריאה החיצונית תופסת
+    assert executor.run("k", lambda: executor.run("k", lambda: "inner", timeout=1), timeout=1) == "inner"
+
+
+def test_context_is_passed_to_the_worker(executor):
+    deadline = Deadline(5)
+    with request_scope(deadline):
+        assert executor.run("k", current_deadline, timeout=1) is deadline
+
+
+def test_run_async_cancel_cancels_the_call(executor):
+    stopped = threading.Event()
+
+    def call():
+        try:
+            while True:
+                check_cancelled()
+                time.sleep(0.005)
+        except CallCancelled:
+            stopped.set()
+            raise
+
+    async def main():
+        task = asyncio.create_task(executor.run_async("k", call))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+    assert stopped.wait(2)
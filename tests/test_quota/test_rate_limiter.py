@@ -0,0 +1,156 @@
+"""
+Token bucket - קצב, שריון זמן, מצב משותף, מכסה יומית שנשמרת בקובץ והחזרת tokens של המתנה שבוטלה
+"""
+
+import asyncio
+import threading
+import time
+
+from data_management.rate_limiter import TokenBucketLimiter
+
+
+def test_daily_quota_survives_restart(tmp_path):
+    path = tmp_path / "rate_limits.db"
+    limiter = TokenBucketLimiter("daily", per_day=100, state_path=path)
+    for _ in range(3):
+        assert limiter.try_acquire()
+    limiter.close()
+
+    restarted = TokenBucketLimiter("daily", per_day=100, state_path=path)
+    assert 96.9 < restarted.remaining()["day"] < 97.1
+    restarted.close()
+
+
+def test_in_memory_quota_resets():
+    limiter = TokenBucketLimiter("daily", per_day=100)
+    assert limiter.try_acquire()
+    assert TokenBucketLimiter("daily", per_day=100).remaining()["day"] == 100
+
+
+def test_cancelled_wait_returns_tokens():
+    limiter = TokenBucketLimiter("cancel", per_second=1)
+    assert limiter.try_acquire()  # הדלי ריק - הבקשה הבאה ממתינה שנייה
+    cancel = threading.Event()
+    threading.Timer(0.05, cancel.set).start()
+
+    started = time.monotonic()
+    assert not limiter.acquire(cancel=cancel)
+    assert time.monotonic() - started < 0.5
+    assert limiter.get_stats()["cancelled"] == 1
+    # השריון הוחזר: הבקשה הבאה ממתינה פחות משנייה ולא כמעט שתיים
+    assert limiter._reserve(1, max_wait=1.0) is not None
+
+
+def test_cancelled_async_wait_returns_tokens():
+    limiter = TokenBucketLimiter("cancel_async", per_second=1)
+    assert limiter.try_acquire()
+
+    async def main():
+        task = asyncio.create_task(limiter.acquire_async())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            return True
+        return False
+
+    assert asyncio.run(main())
+    assert limiter.get_stats()["cancelled"] == 1
+    assert limiter._reserve(1, max_wait=1.0) is not None
+
+
+def test_burst_then_refill_rate():
+    limiter = TokenBucketLimiter("refill", per_second=10)
+    for _ in range(10):
+        assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    time.sleep(0.15)
+    assert limiter.try_acquire()  # ~1.5 tokens נוספו
+    assert not limiter.try_acquire()
+
+
+def test_acquire_waits_for_its_reservation():
+    limiter = TokenBucketLimiter("wait", per_second=20)
+    for _ in range(20):
+        assert limiter.try_acquire()
+    started = time.monotonic()
+    assert limiter.acquire()
+    assert limiter.acquire()
+    elapsed = time.monotonic() - started
+    assert 0.08 <= elapsed < 0.5  # שני tokens בקצב 20 לשנייה
+    assert limiter.get_stats()["acquired"] == 22
+
+
+def test_acquire_rejects_waits_longer_than_timeout():
+    limiter = TokenBucketLimiter("timeout", per_second=1)
+    assert limiter.try_acquire()
+    started = time.monotonic()
+    assert not limiter.acquire(timeout=0.1)
+    assert time.monotonic() - started < 0.05  # נדחה מיד, בלי לשריין
+    assert limiter.get_stats()["rejected"] == 1
+
+
+def test_concurrent_acquire_spreads_over_time():
+    limiter = TokenBucketLimiter("threads", per_second=50)
+    for _ in range(50):
+        assert limiter.try_acquire()
+    finished = []
+
+    def worker():
+        limiter.acquire()
+        finished.append(time.monotonic())
+
+    started = time.monotonic()
+    threads = [threading.Thread(target=worker) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    # כל thread שריין משבצת זמן משלו: האחרון מסיים אחרי ~5/50 שנייה
+    assert max(finished) - started >= 0.09
+
+
+def test_strictest_limit_wins():
+    limiter = TokenBucketLimiter("multi", per_second=100, per_minute=3)
+    for _ in range(3):
+        assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert set(limiter.remaining()) == {"second", "minute"}
+
+
+def test_shared_state_between_instances(tmp_path):
+    path = tmp_path / "rate_limits.db"
+    first = TokenBucketLimiter("shared", per_minute=5, state_path=path)
+    second = TokenBucketLimiter("shared", per_minute=5, state_path=path)
+    for _ in range(3):
+        assert first.try_acquire()
+    for _ in range(2):
+        assert second.try_acquire()
+    assert not first.try_acquire()
+    assert not second.try_acquire()
+    assert second.get_stats()["shared"]
+    first.close()
+    second.close()
+
+
+def test_acquire_async_does_not_block_the_loop():
+    limiter = TokenBucketLimiter("async", per_second=10)
+    for _ in range(10):
+        assert limiter.try_acquire()
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        assert await limiter.acquire_async()
+        task.cancel()
+        return ticks
+
+    assert asyncio.run(main()) >= 3
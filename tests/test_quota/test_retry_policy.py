@@ -0,0 +1,134 @@
+"""
+ניסיונות חוזרים ו-deadline - סיווג שגיאות, backoff, ושרשרת הספקים ב-DataRouter
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core.config import config
+from data_management.data_router import DataRequest, DataRouter
+from data_management.providers.base_provider import BaseProvider, QuoteData
+from data_management.retry_policy import (Deadline, DeadlineExceeded, RetryPolicy, current_deadline, http_status,
+                                          is_provider_failure, is_retryable, request_scope, should_propagate_errors)
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        super().__init__(f"HTTP {status}")
+        self.response = SimpleNamespace(status_code=status)
+
+
+def test_deadline_share_and_expiry():
+    deadline = Deadline(1.0)
+    assert 0.9 < deadline.remaining() <= 1.0
+    assert 0.4 < deadline.share(2).remaining() <= 0.5
+    assert Deadline(-1).expired()
+    assert Deadline(-1).remaining() == 0.0
+
+
+def test_backoff_is_bounded_jitter():
+    policy = RetryPolicy(base_delay=0.2, max_delay=1.0, multiplier=2.0)
+    for attempt in range(6):
+        delays = [policy.backoff(attempt) for _ in range(50)]
+        assert all(0 <= d <= min(1.0, 0.2 * 2 ** attempt) for d in delays)
+
+
+def test_error_classification():
+    assert http_status(HTTPError(503)) == 503
+    assert is_retryable(HTTPError(503))
+    assert is_retryable(TimeoutError())
+    assert is_retryable(ConnectionError())
+    assert not is_retryable(HTTPError(404))
+    assert not is_retryable(HTTPError(429))
+    assert not is_retryable(DeadlineExceeded())
+    assert not is_retryable(ValueError("bad symbol"))
+
+    assert is_provider_failure(HTTPError(429))
+    assert is_provider_failure(HTTPError(500))
+    assert not is_provider_failure(HTTPError(404))
+    assert not is_provider_failure(KeyError("price"))
+
+
+def test_request_scope_is_restored():
+    assert current_deadline() is None and not should_propagate_errors()
+    deadline = Deadline(1)
+    with request_scope(deadline):
+        assert current_deadline() is deadline and should_propagate_errors()
+        with request_scope(None, propagate_errors=False):
+            assert current_deadline() is None and not should_propagate_errors()
+        assert current_deadline() is deadline
+    assert current_deadline() is None and not should_propagate_errors()
+
+
+class ScriptedVix(BaseProvider):
+    """ספק VIX שכל קריאה בו לוקחת את הצעד הבא בתסריט: שגיאה לזריקה, שניות להמתנה, או מחיר"""
+
+    def __init__(self, name, script):
+        super().__init__(name=name)
+        self.script = list(script)
+        self.calls = 0
+
+    def _fetch_data(self):
+        return None
+
+    def get_quote(self, symbol):
+        return None
+
+    def get_vix(self):
+        self.calls += 1
+        step = self.script.pop(0) if self.script else None
+        if isinstance(step, Exception):
+            raise step
+        if isinstance(step, tuple):  # ("sleep", שניות)
+            time.sleep(step[1])
+            return None
+        return None if step is None else QuoteData("^VIX", step, None)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(config.data, "disk_cache_enabled", False)
+    router = DataRouter()
+    router._routing_config["VIX"] = {"primary": "fmp", "fallback": ["finnhub"], "cache_ttl": 60,
+                                     "max_retries": 1, "deadline_ms": 2000, "adaptive_ranking": False,
+                                     "hedge": {"enabled": False}}
+    return router
+
+
+def _register(router, primary, fallback):
+    router.register_provider("fmp", primary)
+    router.register_provider("finnhub", fallback)
+
+
+def test_transient_error_is_retried_on_the_same_provider(router):
+    primary, fallback = ScriptedVix("P", [ConnectionError("reset"), 20.0]), ScriptedVix("F", [30.0])
+    _register(router, primary, fallback)
+    assert router.get_data(DataRequest(data_type="VIX", use_cache=False)).price == 20.0
+    assert (primary.calls, fallback.calls) == (2, 0)
+
+
+def test_permanent_error_moves_to_the_next_provider(router):
+    primary, fallback = ScriptedVix("P", [HTTPError(404)]), ScriptedVix("F", [30.0])
+    _register(router, primary, fallback)
+    assert router.get_data(DataRequest(data_type="VIX", use_cache=False)).price == 30.0
+    assert (primary.calls, fallback.calls) == (1, 1)
+
+
+def test_retries_stop_at_max_retries(router):
+    primary = ScriptedVix("P", [ConnectionError("reset")] * 5)
+    fallback = ScriptedVix("F", [30.0])
+    _register(router, primary, fallback)
+    assert router.get_data(DataRequest(data_type="VIX", use_cache=False)).price == 30.0
+    assert primary.calls == 2
+
+
+def test_slow_provider_gets_its_share_of_the_deadline(router):
+    router._routing_config["VIX"]["deadline_ms"] = 400
+    primary, fallback = ScriptedVix("P", [("sleep", 2)]), ScriptedVix("F", [30.0])
+    _register(router, primary, fallback)
+    started = time.monotonic()
+    assert router.get_data(DataRequest(data_type="VIX", use_cache=False)).price == 30.0
+    # הספק הראשון קיבל חצי מהתקציב (~0.2 שניות) והשני את מה שנותר
+    assert time.monotonic() - started < 1.0
@@ -0,0 +1,131 @@
+"""
+RouterCache - TTL, פינוי LRU לפי מספר רשומות ותקציב זיכרון, ו-stale-while-revalidate
+"""
+
+import time
+
+import pytest
+
+from core.config import config
+from data_management.data_router import DataRouter
+from data_management.providers.base_provider import BaseProvider
+from data_management.router_cache import RouterCache, estimate_size
+
+
+class CountingEvents(BaseProvider):
+    """ספק אירועים שמחזיר בכל קריאה גרסה חדשה"""
+
+    def __init__(self):
+        super().__init__(name="CountingEvents")
+        self.calls = 0
+
+    def _fetch_data(self):
+        return None
+
+    def get_vix(self):
+        return None
+
+    def get_quote(self, symbol):
+        return None
+
+    def get_economic_events(self, days_ahead=30):
+        self.calls += 1
+        return [{"name": "CPI Release", "version": self.calls}]
+
+
+@pytest.fixture
+def cache():
+    cache = RouterCache(max_entries=3, max_bytes=10_000, default_ttl=60, cleanup_interval=0)
+    yield cache
+    cache.close()
+
+
+def _age(cache, key, seconds):
+    """הזזת זמן השמירה של רשומה אחורה"""
+    cache._entries[key].timestamp -= seconds
+
+
+def test_ttl_and_max_age(cache):
+    cache.set("k", "value", ttl=10)
+    assert cache.get("k") == "value"
+    _age(cache, "k", 5)
+    assert cache.get("k", max_age=2) is None  # ישנה מדי לבקשה הזו, אבל נשארת
+    assert "k" in cache
+    assert cache.get("k") == "value"
+    _age(cache, "k", 6)
+    assert cache.get("k") is None
+    assert "k" not in cache
+    assert cache.get_stats()["expirations"] == 1
+
+
+def test_lru_eviction_by_entries(cache):
+    for key in ("a", "b", "c"):
+        cache.set(key, key)
+    assert cache.get("a") == "a"  # a הופך לאחרון שנעשה בו שימוש
+    cache.set("d", "d")
+    assert cache.keys() == ["c", "a", "d"]
+    assert cache.get_stats()["evictions"] == 1
+
+
+def test_eviction_by_bytes(cache):
+    blob = "x" * 4000
+    cache.set("a", blob)
+    cache.set("b", blob)
+    cache.set("c", blob)
+    assert cache.keys() == ["b", "c"]
+    assert cache.get_stats()["total_bytes"] == 2 * estimate_size(blob)
+    cache.delete("b")
+    assert cache.get_stats()["total_bytes"] == estimate_size(blob)
+
+
+def test_entry_larger_than_budget_is_not_cached(cache):
+    cache.set("small", "x")
+    cache.set("huge", "x" * 20_000)
+    assert "huge" not in cache
+    assert cache.keys() == ["small"]
+
+
+def test_stale_window(cache):
+    cache.set("k", "value", ttl=10, stale_ttl=20)
+    _age(cache, "k", 15)
+    assert cache.get("k") is None
+    entry = cache.get_stale("k")
+    assert entry.data == "value" and entry.age >= 15
+    _age(cache, "k", 20)
+    assert cache.get_stale("k") is None
+    assert "k" not in cache
+
+
+def test_purge_expired(cache):
+    cache.set("old", 1, ttl=1)
+    cache.set("new", 2, ttl=100)
+    _age(cache, "old", 5)
+    assert cache.purge_expired() == 1
+    assert cache.keys() == ["new"]
+
+
+def test_clear_by_pattern(cache):
+    cache.set("quote:AAPL", 1)
+    cache.set("quote:MSFT", 2)
+    cache.set("VIX", 3)
+    assert cache.clear("quote:") == 2
+    assert cache.keys() == ["VIX"]
+
+
+def test_router_serves_stale_and_refreshes_in_background(monkeypatch):
+    monkeypatch.setattr(config.data, "disk_cache_enabled", False)
+    router = DataRouter()
+
+    provider = CountingEvents()
+    router.register_provider("fred", provider)
+    assert router.get_economic_events() == [{"name": "CPI Release", "version": 1}]
+
+    (key,) = router._global_cache.keys()
+    _age(router._global_cache, key, 3601)  # אחרי ה-TTL, בתוך max_stale_seconds
+    assert router.get_economic_events() == [{"name": "CPI Release", "version": 1}]
+
+    deadline = time.monotonic() + 5
+    while router._global_cache.get(key) is None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert provider.calls == 2
+    assert router.get_economic_events() == [{"name": "CPI Release", "version": 2}]
@@ -1,13 +1,13 @@
 
 from analytics import performance
 from core.logger import logger
-from data_management.data_router import DataRouter
+from data_management.data_router import get_data_router
 
 class WheelStrategy:
 	def __init__(self, account=None, ibkr_connector=None):
 		self.account = account
 		self.ibkr = ibkr_connector
-		self.data_router = DataRouter()
+		self.data_router = get_data_router()
 		self.vix_value = None
 		logger.info("WheelStrategy initialized for account %s", account)
 
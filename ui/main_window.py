@@ -182,8 +182,8 @@ class MainWindow(QMainWindow):
         header_layout.addStretch()
 
         # יצירת instance אחיד של DataRouter
-        from data_management.data_router import DataRouter
-        self.data_router = DataRouter()
+        from data_management.data_router import get_data_router
+        self.data_router = get_data_router()
 
         # VIX Gauge
         self.vix_gauge = VixGaugeWidget(data_router=self.data_router)
@@ -346,8 +346,8 @@ class MainWindow(QMainWindow):
     def update_vix_data(self):
         """עדכון נתוני VIX אמיתיים"""
         try:
-            from data_management.data_router import DataRouter
-            dr = DataRouter()
+            from data_management.data_router import get_data_router
+            dr = get_data_router()
             vix_data = dr.get_vix()
             if vix_data and hasattr(vix_data, 'price') and vix_data.price:
                 self.vix_gauge.set_vix_value(vix_data.price)
@@ -369,8 +369,8 @@ class MainWindow(QMainWindow):
     def update_market_data(self):
         """עדכון מצב שוק אמיתי"""
         try:
-            from data_management.data_router import DataRouter
-            dr = DataRouter()
+            from data_management.data_router import get_data_router
+            dr = get_data_router()
             market_data = dr.get_market_data()
             # נניח שמתקבל dict עם 'regime': 'Bull'/'Bear'
             regime = None
@@ -2,12 +2,13 @@ from PyQt6 import QtWidgets, QtCore
 
 class DataManagementTab(QtWidgets.QWidget):
     def download_range(self):
-        from data_management.data_router import DataRouter
-        from data_management.stock_db import StockDB
-        import datetime, pandas as pd
+        from data_management.data_router import get_data_router
+        from data_management.stock_db import get_stock_db
+        from data_management.history_sync import HistorySync
+        import datetime
         self.status_label.setText("מוריד נתונים לטווח תאריכים...")
-        router = DataRouter()
-        db = StockDB()
+        router = get_data_router()
+        db = get_stock_db()
         symbols = self.symbols_input.text().strip()
         if not symbols:
             symbols = "AAPL"
@@ -21,48 +22,16 @@ class DataManagementTab(QtWidgets.QWidget):
         except Exception:
             self.status_label.setText("פורמט תאריך לא תקין. יש להזין: dd-mm-yyyy")
             return
-        results = []
-        provider_order = ["yahoo", "finnhub", "alphavantage", "polygon", "twelvedata", "fmp"]
-        for symbol in symbol_list:
-            got_data = False
-            for provider_name in provider_order:
-                try:
-                    if hasattr(router, 'get_historical_data'):
-                        data = router.get_historical_data(symbol, start_dt.date().isoformat(), end_dt.date().isoformat(), provider=provider_name)
-                    else:
-                        data = router.get_quote(symbol, provider=provider_name)
-                except Exception as e:
-                    self.status_label.setText(f"שגיאה ({provider_name}) עבור {symbol}: {e}")
-                    continue
-                if isinstance(data, pd.DataFrame):
-                    if data.empty:
-                        self.status_label.setText(f"אין נתונים זמינים עבור {symbol} ({provider_name})")
-                        continue
-                    rows = data.to_dict('records')
-                else:
-                    rows = []
-                    if isinstance(data, list):
-                        for item in data:
-                            if hasattr(item, 'to_dict'):
-                                rows.append(item.to_dict())
-                            elif isinstance(item, dict):
-                                rows.append(item)
-                    elif hasattr(data, 'to_dict'):
-                        rows.append(data.to_dict())
-                    elif isinstance(data, dict):
-                        rows.append(data)
-                if not rows:
-                    self.status_label.setText(f"לא התקבלו נתונים עבור {symbol} ({provider_name})")
-                    continue
-                db.insert_rows(rows, provider=provider_name)
-                results.append(symbol)
-                got_data = True
-                break
-            if not got_data:
-                self.status_label.setText(f"לא נמצאו נתונים עבור {symbol} בכל הספקים")
+        # סנכרון מצטבר - רק התאריכים שחסרים במסד מורדים
+        sync = HistorySync(db, router.get_provider("yahoo"), provider_name="yahoo")
+        result = sync.sync(symbol_list, start_dt.date().isoformat(), end_dt.date().isoformat())
         db.close()
+        results = [s for s in symbol_list if s in result.bars or s in result.up_to_date]
         if results:
-            self.status_label.setText(f"הורדה הושלמה ושמורה ל-SQLite עבור: {', '.join(results)}")
+            status = f"הורדה הושלמה ושמורה ל-SQLite עבור: {', '.join(results)} ({result.total_bars} נרות חדשים)"
+            if result.failed:
+                status += f" | נכשלו: {', '.join(result.failed)}"
+            self.status_label.setText(status)
         else:
             self.status_label.setText("שגיאה בהורדת נתונים לטווח תאריכים")
     # הגדרה אחת בלבד ל-__init__ ולמבנה המחלקה
@@ -172,60 +141,28 @@ class DataManagementTab(QtWidgets.QWidget):
                 return
             self.status_label.setText(f"ממשיך הורדה מ-{last_ticker or to_do[0]} ({len(to_do)} סימבולים)")
             QtWidgets.QApplication.processEvents()
-            from data_management.data_router import DataRouter
-            from data_management.stock_db import StockDB
-            import pandas as pd
-            router = DataRouter()
-            db = StockDB()
-            provider_order = ["yahoo", "finnhub", "alphavantage", "polygon", "twelvedata", "fmp"]
-            for symbol in to_do:
-                got_data = False
-                for provider_name in provider_order:
-                    try:
-                        if provider_name == "yahoo":
-                            if hasattr(router, 'get_historical_data'):
-                                data = router._providers["yahoo"].get_historical_data(symbol, None, None, period="1y")
-                            else:
-                                data = router.get_quote(symbol, provider=provider_name)
-                        elif hasattr(router, 'get_historical_data'):
-                            data = router.get_historical_data(symbol, None, None, provider=provider_name)
-                        else:
-                            data = router.get_quote(symbol, provider=provider_name)
-                    except Exception as e:
-                        self.status_label.setText(f"שגיאה ({provider_name}) עבור {symbol}: {e}")
-                        QtWidgets.QApplication.processEvents()
-                        continue
-                    if isinstance(data, pd.DataFrame):
-                        if data.empty:
-                            self.status_label.setText(f"אין נתונים זמינים עבור {symbol} ({provider_name})")
-                            QtWidgets.QApplication.processEvents()
-                            continue
-                        rows = data.to_dict('records')
-                    else:
-                        rows = []
-                        if isinstance(data, list):
-                            for item in data:
-                                if hasattr(item, 'to_dict'):
-                                    rows.append(item.to_dict())
-                                elif isinstance(item, dict):
-                                    rows.append(item)
-                        elif hasattr(data, 'to_dict'):
-                            rows.append(data.to_dict())
-                        elif isinstance(data, dict):
-                            rows.append(data)
-                    if not rows:
-                        self.status_label.setText(f"לא התקבלו נתונים עבור {symbol} ({provider_name})")
-                        QtWidgets.QApplication.processEvents()
-                        continue
-                    db.insert_rows(rows, provider=provider_name)
-                    got_data = True
-                    break
-                # עדכון cache
-                done.add(symbol)
+            from data_management.data_router import get_data_router
+            from data_management.stock_db import get_stock_db
+            from data_management.history_sync import HistorySync
+            import datetime
+            router = get_data_router()
+            db = get_stock_db()
+            end_date = datetime.date.today()
+            start_date = end_date - datetime.timedelta(days=365)
+            errors = cache.get("errors", {})
+
+            def save_progress(result):
+                # סימבולים שה-chunk שלהם נשמר (או שלא היה חסר להם דבר) מסומנים כגמורים
+                finished = [s for s in to_do if s in result.bars or s in result.up_to_date or s in result.failed]
+                done.update(finished)
+                errors.update(result.failed)
                 with open(cache_path, "w", encoding="utf-8") as f:
-                    json.dump({"done": list(done), "last_ticker": symbol, "errors": cache.get("errors", {})}, f, ensure_ascii=False, indent=2)
-                self.status_label.setText(f"הורדה הושלמה עבור {symbol}")
+                    json.dump({"done": list(done), "last_ticker": finished[-1] if finished else last_ticker, "errors": errors}, f, ensure_ascii=False, indent=2)
+                self.status_label.setText(f"הורדה הושלמה עבור {len(finished)}/{len(to_do)} סימבולים ({result.total_bars} נרות חדשים)")
                 QtWidgets.QApplication.processEvents()
+
+            sync = HistorySync(db, router.get_provider("yahoo"), provider_name="yahoo")
+            save_progress(sync.sync(to_do, start_date.isoformat(), end_date.isoformat(), on_progress=save_progress))
             db.close()
             self.status_label.setText(f"הורדה הושלמה לכל הסימבולים!")
             QtWidgets.QApplication.processEvents()
@@ -271,20 +208,22 @@ class DataManagementTab(QtWidgets.QWidget):
         QDesktopServices.openUrl(QUrl.fromLocalFile(folder))
 
     def show_data_table(self):
-        from data_management.stock_db import StockDB
-        symbol = self.symbols_input.text().strip().upper()
-        if not symbol:
+        from data_management.stock_db import get_stock_db
+        import datetime
+        symbols = [s.strip().upper() for s in self.symbols_input.text().split(",") if s.strip()]
+        if not symbols:
             self.status_label.setText("יש להזין סימבול להצגה")
             return
-        start_date = self.date_from.text().strip()
-        end_date = self.date_to.text().strip()
-        import re
-        pattern = r"^(\d{2}-\d{2}-\d{4})$"
-        if not re.match(pattern, start_date) or not re.match(pattern, end_date):
+        symbol = ", ".join(symbols)
+        # השדות בפורמט dd-mm-yyyy, המסד שומר תאריכי ISO
+        try:
+            start_date = datetime.datetime.strptime(self.date_from.text().strip(), "%d-%m-%Y").strftime("%Y-%m-%d")
+            end_date = datetime.datetime.strptime(self.date_to.text().strip(), "%d-%m-%Y").strftime("%Y-%m-%d")
+        except ValueError:
             self.status_label.setText("פורמט תאריך לא תקין. יש להזין: dd-mm-yyyy")
             return
-        db = StockDB()
-        rows = db.get_merged_rows(symbol, start_date, end_date)
+        db = get_stock_db()
+        rows = db.get_merged_rows(symbols, start_date, end_date)
         db.close()
         if not rows:
             self.status_label.setText("לא נמצאו נתונים מאוחדים לתאריכים שבחרת")
@@ -316,12 +255,12 @@ class DataManagementTab(QtWidgets.QWidget):
         self.status_label.setText(f"הוצגו {len(rows)} רשומות מאוחדות עבור {symbol}")
         self.refresh_files_list()
     def download_year(self):
-        from data_management.data_router import DataRouter
-        from data_management.stock_db import StockDB
+        from data_management.data_router import get_data_router
+        from data_management.stock_db import get_stock_db
         import datetime
         self.status_label.setText("מוריד נתונים לשנה אחורה...")
-        router = DataRouter()
-        db = StockDB()
+        router = get_data_router()
+        db = get_stock_db()
         symbols = self.symbols_input.text().strip()
         if not symbols:
             symbols = "AAPL"
@@ -347,7 +286,11 @@ class DataManagementTab(QtWidgets.QWidget):
                     if data.empty:
                         self.status_label.setText(f"אין נתונים זמינים עבור {symbol} ({provider_name})")
                         continue
-                    rows = data.to_dict('records')
+                    # כתיבה ישירה מהעמודות (התאריכים נלקחים מה-index)
+                    db.insert_frame(symbol, provider_name, data)
+                    results.append(symbol)
+                    got_data = True
+                    break
                 else:
                     rows = []
                     if isinstance(data, list):
@@ -376,10 +319,10 @@ class DataManagementTab(QtWidgets.QWidget):
             self.status_label.setText("שגיאה בהורדת נתונים לשנה אחורה")
 
     def download_day(self):
-        from data_management.data_router import DataRouter
+        from data_management.data_router import get_data_router
         import json, os, datetime
         self.status_label.setText("מוריד נתונים ליום אחרון...")
-        router = DataRouter()
+        router = get_data_router()
         symbols = self.symbols_input.text().strip()
         if not symbols:
             symbols = "AAPL"
@@ -398,13 +341,13 @@ class DataManagementTab(QtWidgets.QWidget):
             self.status_label.setText(f"הורדה הושלמה עבור: {', '.join(results)}")
             self.refresh_files_list()
         else:
-            from data_management.stock_db import StockDB
+            from data_management.stock_db import get_stock_db
             import pandas as pd
             import logging
             logger = logging.getLogger("download_year")
             self.status_label.setText("מוריד נתונים לשנה אחורה... (פעולה עשויה להימשך מספר שניות)")
-            router = DataRouter()
-            db = StockDB()
+            router = get_data_router()
+            db = get_stock_db()
             symbols = self.symbols_input.text().strip()
             if not symbols:
                 symbols = "AAPL"
@@ -439,7 +382,12 @@ class DataManagementTab(QtWidgets.QWidget):
                             self.status_label.setText(f"אין נתונים זמינים עבור {symbol} ({provider_name})")
                             QtWidgets.QApplication.processEvents()
                             continue
-                        rows = data.to_dict('records')
+                        # כתיבה ישירה מהעמודות (התאריכים נלקחים מה-index)
+                        db.insert_frame(symbol, provider_name, data)
+                        results.append(symbol)
+                        got_data = True
+                        logger.info(f"[download_year] הצלחה עבור {symbol} דרך {provider_name}")
+                        break
                     else:
                         rows = []
                         if isinstance(data, list):
@@ -8,9 +8,9 @@ class WheelStrategyWidget(QtWidgets.QWidget):
     def __init__(self):
         super().__init__()
         from trading.options.wheel_strategy import WheelStrategy
-        from data_management.data_router import DataRouter
+        from data_management.data_router import get_data_router
         self.strategy = WheelStrategy()
-        self.data_router = DataRouter()
+        self.data_router = get_data_router()
 
         layout = QtWidgets.QVBoxLayout()
 